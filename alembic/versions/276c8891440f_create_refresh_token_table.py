@@ -0,0 +1,43 @@
+"""create refresh_token table
+
+Revision ID: 276c8891440f
+Revises: ea2828c7685f
+Create Date: 2026-10-17 14:08:21.392117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = '276c8891440f'
+down_revision = 'ea2828c7685f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('refresh_token',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('family_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('hashed_token', sa.String(), nullable=False),
+    sa.Column('token_version', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('used_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_refresh_token_family_id'), 'refresh_token', ['family_id'], unique=False)
+    op.create_index(op.f('ix_refresh_token_hashed_token'), 'refresh_token', ['hashed_token'], unique=True)
+    op.create_index(op.f('ix_refresh_token_user_id'), 'refresh_token', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_refresh_token_user_id'), table_name='refresh_token')
+    op.drop_index(op.f('ix_refresh_token_hashed_token'), table_name='refresh_token')
+    op.drop_index(op.f('ix_refresh_token_family_id'), table_name='refresh_token')
+    op.drop_table('refresh_token')
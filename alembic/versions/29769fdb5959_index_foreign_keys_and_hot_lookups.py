@@ -0,0 +1,73 @@
+"""index foreign keys and hot lookups
+
+Revision ID: 29769fdb5959
+Revises: 276c8891440f
+Create Date: 2026-10-17 16:42:09.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = '29769fdb5959'
+down_revision = '276c8891440f'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns), each matching a query in app/crud
+INDEXES = [
+    ('ix_testresult_user_id_test_id_score', 'testresult', ['user_id', 'test_id', 'score']),
+    ('ix_testresult_test_id_score', 'testresult', ['test_id', 'score']),
+    ('ix_submission_assignment_id', 'submission', ['assignment_id']),
+    ('ix_submission_student_id_assignment_id', 'submission', ['student_id', 'assignment_id']),
+    ('ix_lesson_course_id_order', 'lesson', ['course_id', 'order']),
+    ('ix_assignment_lesson_id_due_date', 'assignment', ['lesson_id', 'due_date']),
+    ('ix_test_course_id', 'test', ['course_id']),
+    ('ix_course_instructor_id', 'course', ['instructor_id']),
+    ('ix_recommendation_user_id_score', 'recommendation', ['user_id', 'score']),
+    ('ix_chat_messages_user_id_created_at', 'chat_messages', ['user_id', 'created_at']),
+    ('ix_user_course_association_course_id_user_id', 'user_course_association', ['course_id', 'user_id']),
+]
+
+# Plain indexes on primary key columns, which the primary keys already index
+REDUNDANT_ID_INDEXES = [
+    'user', 'course', 'lesson', 'recommendation', 'test', 'assignment', 'testresult',
+    'submission', 'chat_messages',
+]
+
+
+def upgrade():
+    # Enrollment rows had no key: drop incomplete and repeated rows before adding one
+    op.execute('DELETE FROM user_course_association WHERE user_id IS NULL OR course_id IS NULL')
+    op.execute(
+        'DELETE FROM user_course_association a USING user_course_association b '
+        'WHERE a.ctid < b.ctid AND a.user_id = b.user_id AND a.course_id = b.course_id'
+    )
+    op.alter_column('user_course_association', 'user_id', existing_type=sa.String(), nullable=False)
+    op.alter_column('user_course_association', 'course_id', existing_type=sa.String(), nullable=False)
+    op.create_primary_key(
+        'user_course_association_pkey', 'user_course_association', ['user_id', 'course_id']
+    )
+
+    # Build and drop indexes without locking writes on the large tables
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for table in REDUNDANT_ID_INDEXES:
+            op.drop_index(op.f(f'ix_{table}_id'), table_name=table, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in REDUNDANT_ID_INDEXES:
+            op.create_index(
+                op.f(f'ix_{table}_id'), table, ['id'], unique=False, postgresql_concurrently=True
+            )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    op.drop_constraint('user_course_association_pkey', 'user_course_association', type_='primary')
+    op.alter_column('user_course_association', 'course_id', existing_type=sa.String(), nullable=True)
+    op.alter_column('user_course_association', 'user_id', existing_type=sa.String(), nullable=True)
@@ -0,0 +1,30 @@
+"""add version columns
+
+Revision ID: 2e501f14ab7d
+Revises: f654dbeb2d6f
+Create Date: 2026-10-17 19:12:48.601522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = '2e501f14ab7d'
+down_revision = 'f654dbeb2d6f'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ['course', 'lesson', 'test']
+
+
+def upgrade():
+    # A constant default does not rewrite the table
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_column(table, 'version')
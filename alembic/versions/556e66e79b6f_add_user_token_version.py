@@ -0,0 +1,25 @@
+"""add user token_version
+
+Revision ID: 556e66e79b6f
+Revises: 6c3be90d7022
+Create Date: 2026-10-17 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = '556e66e79b6f'
+down_revision = '6c3be90d7022'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('user', 'token_version')
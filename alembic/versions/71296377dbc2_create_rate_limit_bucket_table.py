@@ -0,0 +1,30 @@
+"""create rate_limit_bucket table
+
+Revision ID: 71296377dbc2
+Revises: c7b2badfd267
+Create Date: 2026-10-17 11:48:05.220741
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = '71296377dbc2'
+down_revision = 'c7b2badfd267'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_bucket',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_bucket')
@@ -0,0 +1,38 @@
+"""create user_import_job table
+
+Revision ID: 9b3f6c2d7e41
+Revises: 2e501f14ab7d
+Create Date: 2026-10-17 21:04:12.318270
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3f6c2d7e41'
+down_revision = '2e501f14ab7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_import_job',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.JSON(), nullable=False),
+    sa.Column('detail', sa.String(), nullable=True),
+    sa.Column('created_by', sa.Uuid(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['user.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('user_import_job')
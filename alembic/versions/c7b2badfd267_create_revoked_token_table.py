@@ -0,0 +1,36 @@
+"""create revoked_token table
+
+Revision ID: c7b2badfd267
+Revises: 556e66e79b6f
+Create Date: 2026-10-17 11:02:47.918233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7b2badfd267'
+down_revision = '556e66e79b6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revoked_token',
+    sa.Column('jti', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_revoked_token_expires_at'), 'revoked_token', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_revoked_token_revoked_at'), 'revoked_token', ['revoked_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_revoked_token_revoked_at'), table_name='revoked_token')
+    op.drop_index(op.f('ix_revoked_token_expires_at'), table_name='revoked_token')
+    op.drop_table('revoked_token')
@@ -0,0 +1,42 @@
+"""create api_key table
+
+Revision ID: ea2828c7685f
+Revises: 71296377dbc2
+Create Date: 2026-10-17 12:31:54.671309
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'ea2828c7685f'
+down_revision = '71296377dbc2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('api_key',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('prefix', sa.String(), nullable=False),
+    sa.Column('hashed_key', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('role', postgresql.ENUM('student', 'teacher', 'admin', name='user_role', create_type=False), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_api_key_hashed_key'), 'api_key', ['hashed_key'], unique=True)
+    op.create_index(op.f('ix_api_key_user_id'), 'api_key', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_api_key_user_id'), table_name='api_key')
+    op.drop_index(op.f('ix_api_key_hashed_key'), table_name='api_key')
+    op.drop_table('api_key')
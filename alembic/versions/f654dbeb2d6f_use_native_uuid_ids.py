@@ -0,0 +1,89 @@
+"""use native uuid ids
+
+Revision ID: f654dbeb2d6f
+Revises: 29769fdb5959
+Create Date: 2026-10-17 18:05:31.240117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'f654dbeb2d6f'
+down_revision = '29769fdb5959'
+branch_labels = None
+depends_on = None
+
+# Primary keys stored as text
+ID_TABLES = [
+    'user', 'course', 'lesson', 'recommendation', 'test', 'assignment', 'testresult',
+    'submission', 'chat_messages', 'api_key', 'refresh_token',
+]
+
+# (table, column, referenced table, ondelete) for every foreign key to a text ID,
+# named as PostgreSQL names them by default
+FOREIGN_KEYS = [
+    ('course', 'owner_id', 'user', None),
+    ('course', 'instructor_id', 'user', None),
+    ('lesson', 'course_id', 'course', None),
+    ('recommendation', 'user_id', 'user', None),
+    ('recommendation', 'course_id', 'course', None),
+    ('test', 'course_id', 'course', None),
+    ('assignment', 'lesson_id', 'lesson', None),
+    ('testresult', 'user_id', 'user', None),
+    ('testresult', 'test_id', 'test', None),
+    ('submission', 'student_id', 'user', None),
+    ('submission', 'assignment_id', 'assignment', None),
+    ('chat_messages', 'user_id', 'user', None),
+    ('api_key', 'user_id', 'user', 'CASCADE'),
+    ('refresh_token', 'user_id', 'user', 'CASCADE'),
+    ('revoked_token', 'user_id', 'user', 'CASCADE'),
+    ('user_course_association', 'user_id', 'user', None),
+    ('user_course_association', 'course_id', 'course', None),
+]
+
+# ID columns that reference no table
+OTHER_COLUMNS = [('refresh_token', 'family_id')]
+
+
+def _columns():
+    return (
+        [(table, 'id') for table in ID_TABLES]
+        + [(table, column) for table, column, _, _ in FOREIGN_KEYS]
+        + OTHER_COLUMNS
+    )
+
+
+def _drop_foreign_keys():
+    for table, column, _, _ in FOREIGN_KEYS:
+        op.drop_constraint(f'{table}_{column}_fkey', table, type_='foreignkey')
+
+
+def _create_foreign_keys():
+    for table, column, referent, ondelete in FOREIGN_KEYS:
+        op.create_foreign_key(
+            f'{table}_{column}_fkey', table, referent, [column], ['id'], ondelete=ondelete
+        )
+
+
+def upgrade():
+    # Keys and the columns pointing at them must change type together, which rewrites the tables
+    _drop_foreign_keys()
+    for table, column in _columns():
+        op.alter_column(
+            table, column, existing_type=sa.String(), type_=sa.Uuid(),
+            postgresql_using=f'"{column}"::uuid',
+        )
+    _create_foreign_keys()
+
+
+def downgrade():
+    _drop_foreign_keys()
+    for table, column in _columns():
+        op.alter_column(
+            table, column, existing_type=sa.Uuid(), type_=sa.String(),
+            postgresql_using=f'"{column}"::text',
+        )
+    _create_foreign_keys()
@@ -0,0 +1,100 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_current_admin_user
+from app.core.principal_cache import Principal
+from app.crud.api_key import ROLE_RANK, api_key
+from app.crud.user import user
+from app.crud.pagination import set_next_cursor, set_total
+from app.db.ids import UUIDStr
+from app.schemas.api_key import ApiKey as ApiKeySchema, ApiKeyCreate, ApiKeyCreated, ApiKeyUpdate
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[ApiKeySchema])
+def read_api_keys(
+        response: Response,
+        db: Session = Depends(get_db),
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        user_id: UUIDStr = None,
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Retrieve API keys.
+    """
+    if user_id:
+        api_keys = api_key.get_multi_by_user(
+            db=db, user_id=user_id, skip=skip, limit=limit, cursor=cursor, with_total=with_total
+        )
+    else:
+        api_keys = api_key.get_multi(
+            db=db, skip=skip, limit=limit, cursor=cursor, with_total=with_total
+        )
+    set_next_cursor(response, api_keys, limit, cursor)
+    set_total(response, api_keys)
+    return api_keys
+
+
+@router.post("/", response_model=ApiKeyCreated)
+def create_api_key(
+        *,
+        db: Session = Depends(get_db),
+        api_key_in: ApiKeyCreate,
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Create new API key for a service account.
+
+    The plaintext key is only returned in this response.
+    """
+    owner = user.get(db, id=api_key_in.user_id)
+    if not owner:
+        raise HTTPException(status_code=404, detail="User not found")
+    if api_key_in.role not in ROLE_RANK:
+        raise HTTPException(status_code=400, detail="Unknown role")
+    if ROLE_RANK[api_key_in.role] > ROLE_RANK.get(owner.role, 0):
+        raise HTTPException(status_code=400, detail="API key role cannot exceed the owner's role")
+
+    api_key_obj, plaintext = api_key.create(db=db, obj_in=api_key_in)
+    return {**ApiKeySchema.from_orm(api_key_obj).dict(), "key": plaintext}
+
+
+@router.put("/{api_key_id}", response_model=ApiKeySchema)
+def update_api_key(
+        *,
+        db: Session = Depends(get_db),
+        api_key_id: UUIDStr,
+        api_key_in: ApiKeyUpdate,
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Rename or deactivate an API key.
+    """
+    api_key_obj = api_key.get(db=db, id=api_key_id)
+    if not api_key_obj:
+        raise HTTPException(status_code=404, detail="API key not found")
+
+    return api_key.update(db=db, db_obj=api_key_obj, obj_in=api_key_in)
+
+
+@router.delete("/{api_key_id}", response_model=ApiKeySchema)
+def delete_api_key(
+        *,
+        db: Session = Depends(get_db),
+        api_key_id: UUIDStr,
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Revoke an API key.
+    """
+    api_key_obj = api_key.get(db=db, id=api_key_id)
+    if not api_key_obj:
+        raise HTTPException(status_code=404, detail="API key not found")
+
+    return api_key.remove(db=db, id=api_key_id)
@@ -1,28 +1,33 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.api.deps import check_batch_size, get_db, get_current_active_user, get_current_admin_user
+from app.core.principal_cache import Principal
 from app.models.assignment import Assignment
 from app.crud.assignment import assignment
 from app.crud.course import course
 from app.crud.lesson import lesson
-from app.schemas.assignment import Assignment as AssignmentSchema, AssignmentCreate, AssignmentUpdate
+from app.crud.pagination import set_next_cursor, set_total
+from app.db.ids import UUIDStr
+from app.schemas.assignment import Assignment as AssignmentSchema, AssignmentBatchUpdate, AssignmentCreate, AssignmentUpdate
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[AssignmentSchema])
 def read_assignments(
+        response: Response,
         db: Session = Depends(get_db),
         skip: int = 0,
         limit: int = 100,
-        lesson_id: str = None,
-        course_id: str = None,
-        current_user: User = Depends(get_current_active_user),
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        lesson_id: UUIDStr = None,
+        course_id: UUIDStr = None,
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve assignments.
@@ -39,7 +44,7 @@ def read_assignments(
             raise HTTPException(status_code=403, detail="Not enough permissions")
 
         assignments = assignment.get_multi_by_lesson(
-            db=db, lesson_id=lesson_id, skip=skip, limit=limit
+            db=db, lesson_id=lesson_id, skip=skip, limit=limit, cursor=cursor, with_total=with_total
         )
     elif course_id:
         # Check if user has access to this course
@@ -49,14 +54,19 @@ def read_assignments(
             raise HTTPException(status_code=403, detail="Not enough permissions")
 
         assignments = assignment.get_multi_by_course(
-            db=db, course_id=course_id, skip=skip, limit=limit
+            db=db, course_id=course_id, skip=skip, limit=limit, cursor=cursor, with_total=with_total
         )
     elif current_user.role == "admin":
-        assignments = assignment.get_multi(db=db, skip=skip, limit=limit)
+        assignments = assignment.get_multi(
+            db=db, skip=skip, limit=limit, cursor=cursor, with_total=with_total
+        )
     else:
         assignments = assignment.get_multi_by_user(
-            db=db, user_id=current_user.id, skip=skip, limit=limit
+            db=db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
         )
+    set_next_cursor(response, assignments, limit, cursor)
+    set_total(response, assignments)
     return assignments
 
 
@@ -65,7 +75,7 @@ def create_assignment(
         *,
         db: Session = Depends(get_db),
         assignment_in: AssignmentCreate,
-        current_user: User = Depends(get_current_admin_user),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Create new assignment.
@@ -79,12 +89,66 @@ def create_assignment(
     return assignment_obj
 
 
+@router.post("/batch", response_model=List[AssignmentSchema])
+def create_assignments(
+        *,
+        db: Session = Depends(get_db),
+        assignments_in: List[AssignmentCreate],
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Create many assignments in one transaction.
+    """
+    check_batch_size(assignments_in)
+    lesson_ids = list({assignment_in.lesson_id for assignment_in in assignments_in})
+    if len(lesson.get_by_ids(db=db, ids=lesson_ids)) != len(lesson_ids):
+        raise HTTPException(status_code=404, detail="Lesson not found")
+
+    return assignment.create_multi(db=db, objs_in=assignments_in)
+
+
+@router.patch("/batch", response_model=List[AssignmentSchema])
+def update_assignments(
+        *,
+        db: Session = Depends(get_db),
+        assignments_in: List[AssignmentBatchUpdate],
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Update many assignments in one transaction. Unknown IDs are left out of the response.
+    """
+    check_batch_size(assignments_in)
+    lesson_ids = list({
+        assignment_in.lesson_id for assignment_in in assignments_in if assignment_in.lesson_id
+    })
+    if len(lesson.get_by_ids(db=db, ids=lesson_ids)) != len(lesson_ids):
+        raise HTTPException(status_code=404, detail="Lesson not found")
+
+    return assignment.update_multi(
+        db=db, objs_in={assignment_in.id: assignment_in for assignment_in in assignments_in}
+    )
+
+
+@router.post("/batch/delete", response_model=List[AssignmentSchema])
+def delete_assignments(
+        *,
+        db: Session = Depends(get_db),
+        ids: List[UUIDStr] = Body(..., embed=True),
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Delete many assignments in one transaction. Unknown IDs are left out of the response.
+    """
+    check_batch_size(ids)
+    return assignment.remove_multi(db=db, ids=ids)
+
+
 @router.get("/{assignment_id}", response_model=AssignmentSchema)
 def read_assignment(
         *,
         db: Session = Depends(get_db),
-        assignment_id: str,
-        current_user: User = Depends(get_current_active_user),
+        assignment_id: UUIDStr,
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Get assignment by ID.
@@ -109,18 +173,17 @@ def read_assignment(
 def update_assignment(
         *,
         db: Session = Depends(get_db),
-        assignment_id: str,
+        assignment_id: UUIDStr,
         assignment_in: AssignmentUpdate,
-        current_user: User = Depends(get_current_admin_user),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Update an assignment.
     """
-    assignment_obj = assignment.get(db=db, id=assignment_id)
+    assignment_obj = assignment.update_by_id(db=db, id=assignment_id, obj_in=assignment_in)
     if not assignment_obj:
         raise HTTPException(status_code=404, detail="Assignment not found")
 
-    assignment_obj = assignment.update(db=db, db_obj=assignment_obj, obj_in=assignment_in)
     return assignment_obj
 
 
@@ -128,8 +191,8 @@ def update_assignment(
 def delete_assignment(
         *,
         db: Session = Depends(get_db),
-        assignment_id: str,
-        current_user: User = Depends(get_current_admin_user),
+        assignment_id: UUIDStr,
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Delete an assignment.
@@ -1,60 +1,133 @@
-from datetime import timedelta
-from typing import Any
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_current_user, oauth2_scheme
 from app.core.config import settings
-from app.core.security import create_access_token
+from app.core.principal_cache import Principal
+from app.core.rate_limit import login_throttle
+from app.core.revocation import revocation_store
+from app.core.security import create_access_token, verify_token
+from app.crud.refresh_token import refresh_token
 from app.crud.user import user
-from app.schemas.auth import Token, LoginRequest
+from app.models.user import User
+from app.schemas.auth import Token, LoginRequest, RefreshRequest
 
 router = APIRouter()
 
 
+def _client_ip(request: Request) -> Optional[str]:
+    return request.client.host if request.client else None
+
+
+def _access_token(user_obj: User) -> str:
+    return create_access_token(
+        user_obj.id,
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        role=user_obj.role,
+        is_active=user_obj.is_active,
+        token_version=user_obj.token_version,
+    )
+
+
+def _login_tokens(db: Session, user_obj: User) -> dict:
+    _, plaintext = refresh_token.create(db, user_obj=user_obj)
+    return {
+        "access_token": _access_token(user_obj),
+        "token_type": "bearer",
+        "refresh_token": plaintext,
+    }
+
+
 @router.post("/login", response_model=Token)
-def login_access_token(
+async def login_access_token(
+        request: Request,
         db: Session = Depends(get_db),
         form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user_obj = user.authenticate(db, email=form_data.username, password=form_data.password)
+    await run_in_threadpool(
+        login_throttle.check, email=form_data.username, ip=_client_ip(request)
+    )
+    user_obj = await user.authenticate_async(db, email=form_data.username, password=form_data.password)
     if not user_obj:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user_obj.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": create_access_token(
-            user_obj.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+    return await run_in_threadpool(_login_tokens, db, user_obj)
 
 
 @router.post("/login/json", response_model=Token)
-def login_access_token_json(
+async def login_access_token_json(
+        request: Request,
         login_data: LoginRequest,
         db: Session = Depends(get_db),
 ) -> Any:
     """
     Login using JSON request body.
     """
-    user_obj = user.authenticate(db, email=login_data.email, password=login_data.password)
+    await run_in_threadpool(
+        login_throttle.check, email=login_data.email, ip=_client_ip(request)
+    )
+    user_obj = await user.authenticate_async(db, email=login_data.email, password=login_data.password)
     if not user_obj:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user_obj.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return await run_in_threadpool(_login_tokens, db, user_obj)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(
+        refresh_in: RefreshRequest,
+        db: Session = Depends(get_db),
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    """
+    rotated = refresh_token.rotate(db, token=refresh_in.refresh_token)
+    if rotated is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    user_obj, plaintext = rotated
     return {
-        "access_token": create_access_token(
-            user_obj.id, expires_delta=access_token_expires
-        ),
+        "access_token": _access_token(user_obj),
         "token_type": "bearer",
-    }
\ No newline at end of file
+        "refresh_token": plaintext,
+    }
+
+
+@router.post("/logout", response_model=bool)
+def logout(
+        db: Session = Depends(get_db),
+        token: str = Depends(oauth2_scheme),
+        current_user: Principal = Depends(get_current_user),
+        refresh_in: Optional[RefreshRequest] = None,
+) -> Any:
+    """
+    Revoke the access token used for this request, and the refresh token
+    family if a refresh token is given.
+    """
+    if refresh_in is not None:
+        db_obj = refresh_token.get_by_token(db, token=refresh_in.refresh_token)
+        if db_obj is not None and db_obj.user_id == current_user.id:
+            refresh_token.revoke_family(db, family_id=db_obj.family_id)
+
+    payload = verify_token(token)
+    if not payload.get("jti"):
+        raise HTTPException(status_code=400, detail="Token cannot be revoked")
+
+    revocation_store.revoke(
+        db,
+        jti=payload["jti"],
+        expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+        user_id=current_user.id,
+    )
+    return True
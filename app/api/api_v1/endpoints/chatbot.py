@@ -8,15 +8,10 @@ router = APIRouter()
 
 @router.post("/send", response_model=ChatResponse)
 def send_message(message_data: ChatMessageCreate, db: Session = Depends(get_db)):
-    # Сохраняем сообщение в базу данных
-    user_message = chatbot.create_message(db=db, obj_in=message_data)
-
     # Здесь может быть логика ответа ИИ. Пока просто заглушка:
-    ai_response = f"Echo: {user_message.message}"
+    ai_response = f"Echo: {message_data.message}"
 
-    # Обновим сообщение с ответом
-    user_message.response = ai_response
-    db.commit()
-    db.refresh(user_message)
+    # Сохраняем сообщение вместе с ответом одной записью
+    chatbot.create_message(db=db, obj_in=message_data.copy(update={"response": ai_response}))
 
     return {"message": ai_response}
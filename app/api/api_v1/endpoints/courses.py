@@ -1,13 +1,21 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.api.deps import (
+    get_db, get_if_match_version, get_read_db, get_current_active_user,
+    get_current_active_user_async, get_current_admin_user, set_etag,
+)
+from app.core.principal_cache import Principal
 from app.models.course import Course
-from app.crud.course import course
+from app.crud.course import async_course, course
+from app.crud.user import user
+from app.crud.pagination import set_next_cursor, set_total
+from app.db.ids import UUIDStr
+from app.db.session import commit_or_flush
 from app.schemas.course import Course as CourseSchema, CourseCreate, CourseUpdate
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -24,21 +32,29 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[CourseSchema])
-def read_courses(
-        db: Session = Depends(get_db),
+async def read_courses(
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
         skip: int = 0,
         limit: int = 100,
-        current_user: User = Depends(get_current_active_user),
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Retrieve courses.
     """
     if current_user.role == "admin":
-        courses = course.get_multi(db, skip=skip, limit=limit)
+        courses = await async_course.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, with_total=with_total
+        )
     else:
-        courses = course.get_multi_by_user(
-            db=db, user_id=current_user.id, skip=skip, limit=limit
+        courses = await async_course.get_multi_by_user(
+            db=db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
         )
+    set_next_cursor(response, courses, limit, cursor)
+    set_total(response, courses)
     return courses
 
 
@@ -47,7 +63,7 @@ def create_course(
         *,
         db: Session = Depends(get_db),
         course_in: CourseCreate,
-        current_user: User = Depends(get_current_admin_user),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Create new course.
@@ -57,44 +73,51 @@ def create_course(
 
 
 @router.get("/{course_id}", response_model=CourseSchema)
-def read_course(
+async def read_course(
         *,
-        db: Session = Depends(get_db),
-        course_id: str,
-        current_user: User = Depends(get_current_active_user),
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
+        course_id: UUIDStr,
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get course by ID.
     """
-    course_obj = course.get(db=db, id=course_id)
+    course_obj = await async_course.get(db=db, id=course_id)
     if not course_obj:
         raise HTTPException(status_code=404, detail="Course not found")
 
     # Check if user has access to this course
-    if current_user.role != "admin" and not course.is_user_enrolled(
+    if current_user.role != "admin" and not await async_course.is_user_enrolled(
             db=db, user_id=current_user.id, course_id=course_id
     ):
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
+    set_etag(response, course_obj)
     return course_obj
 
 
 @router.put("/{course_id}", response_model=CourseSchema)
 def update_course(
         *,
+        response: Response,
         db: Session = Depends(get_db),
-        course_id: str,
+        course_id: UUIDStr,
         course_in: CourseUpdate,
-        current_user: User = Depends(get_current_admin_user),
+        version: Optional[int] = Depends(get_if_match_version),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Update a course.
+
+    Send the ETag from reading the course as If-Match to get a 409 instead of
+    overwriting changes made since.
     """
-    course_obj = course.get(db=db, id=course_id)
+    course_obj = course.update_by_id(db=db, id=course_id, obj_in=course_in, version=version)
     if not course_obj:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    course_obj = course.update(db=db, db_obj=course_obj, obj_in=course_in)
+    set_etag(response, course_obj)
     return course_obj
 
 
@@ -102,8 +125,8 @@ def update_course(
 def delete_course(
         *,
         db: Session = Depends(get_db),
-        course_id: str,
-        current_user: User = Depends(get_current_admin_user),
+        course_id: UUIDStr,
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Delete a course.
@@ -120,8 +143,8 @@ def delete_course(
 def enroll_in_course(
     *,
     db: Session = Depends(get_db),
-    course_id: str,
-    current_user: models.User = Depends(get_current_active_user),
+    course_id: UUIDStr,
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Enroll current user in a course.
@@ -130,10 +153,10 @@ def enroll_in_course(
     if not course_obj:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    if current_user in course_obj.students:
+    user_obj = user.get(db=db, id=current_user.id)
+    if user_obj in course_obj.students:
         raise HTTPException(status_code=400, detail="User already enrolled in this course")
 
-    course_obj.students.append(current_user)
-    db.commit()
-    db.refresh(course_obj)
+    course_obj.students.append(user_obj)
+    commit_or_flush(db)
     return course_obj
\ No newline at end of file
@@ -1,46 +1,60 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.api.deps import (
+    check_batch_size, get_db, get_if_match_version, get_read_db,
+    get_current_active_user, get_current_active_user_async, get_current_admin_user, set_etag,
+)
+from app.core.principal_cache import Principal
 from app.models.lesson import Lesson
-from app.crud.lesson import lesson
-from app.crud.course import course
-from app.schemas.lesson import Lesson as LessonSchema, LessonCreate, LessonUpdate
+from app.crud.lesson import async_lesson, lesson
+from app.crud.course import async_course, course
+from app.crud.pagination import set_next_cursor, set_total
+from app.db.ids import UUIDStr
+from app.schemas.lesson import Lesson as LessonSchema, LessonBatchUpdate, LessonCreate, LessonUpdate
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[LessonSchema])
-def read_lessons(
-        db: Session = Depends(get_db),
+async def read_lessons(
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
         skip: int = 0,
         limit: int = 100,
-        course_id: str = None,
-        current_user: User = Depends(get_current_active_user),
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        course_id: UUIDStr = None,
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Retrieve lessons.
     """
     if course_id:
         # Check if user has access to this course
-        if current_user.role != "admin" and not course.is_user_enrolled(
+        if current_user.role != "admin" and not await async_course.is_user_enrolled(
                 db=db, user_id=current_user.id, course_id=course_id
         ):
             raise HTTPException(status_code=403, detail="Not enough permissions")
 
-        lessons = lesson.get_multi_by_course(
-            db=db, course_id=course_id, skip=skip, limit=limit
+        lessons = await async_lesson.get_multi_by_course(
+            db=db, course_id=course_id, skip=skip, limit=limit, cursor=cursor, with_total=with_total
         )
     elif current_user.role == "admin":
-        lessons = lesson.get_multi(db=db, skip=skip, limit=limit)
+        lessons = await async_lesson.get_multi(
+            db=db, skip=skip, limit=limit, cursor=cursor, with_total=with_total
+        )
     else:
-        lessons = lesson.get_multi_by_user(
-            db=db, user_id=current_user.id, skip=skip, limit=limit
+        lessons = await async_lesson.get_multi_by_user(
+            db=db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
         )
+    set_next_cursor(response, lessons, limit, cursor)
+    set_total(response, lessons)
     return lessons
 
 
@@ -49,7 +63,7 @@ def create_lesson(
         *,
         db: Session = Depends(get_db),
         lesson_in: LessonCreate,
-        current_user: User = Depends(get_current_admin_user),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Create new lesson.
@@ -63,45 +77,105 @@ def create_lesson(
     return lesson_obj
 
 
-@router.get("/{lesson_id}", response_model=LessonSchema)
-def read_lesson(
+@router.post("/batch", response_model=List[LessonSchema])
+def create_lessons(
+        *,
+        db: Session = Depends(get_db),
+        lessons_in: List[LessonCreate],
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Create many lessons in one transaction.
+    """
+    check_batch_size(lessons_in)
+    course_ids = list({lesson_in.course_id for lesson_in in lessons_in})
+    if len(course.get_by_ids(db=db, ids=course_ids)) != len(course_ids):
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    return lesson.create_multi(db=db, objs_in=lessons_in)
+
+
+@router.patch("/batch", response_model=List[LessonSchema])
+def update_lessons(
         *,
         db: Session = Depends(get_db),
-        lesson_id: str,
-        current_user: User = Depends(get_current_active_user),
+        lessons_in: List[LessonBatchUpdate],
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Update many lessons in one transaction. Unknown IDs are left out of the response.
+    Items that set `version` must still be at it, or the batch fails with a 409.
+    """
+    check_batch_size(lessons_in)
+    course_ids = list({lesson_in.course_id for lesson_in in lessons_in if lesson_in.course_id})
+    if len(course.get_by_ids(db=db, ids=course_ids)) != len(course_ids):
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    return lesson.update_multi(
+        db=db, objs_in={lesson_in.id: lesson_in for lesson_in in lessons_in}
+    )
+
+
+@router.post("/batch/delete", response_model=List[LessonSchema])
+def delete_lessons(
+        *,
+        db: Session = Depends(get_db),
+        ids: List[UUIDStr] = Body(..., embed=True),
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Delete many lessons in one transaction. Unknown IDs are left out of the response.
+    """
+    check_batch_size(ids)
+    return lesson.remove_multi(db=db, ids=ids)
+
+
+@router.get("/{lesson_id}", response_model=LessonSchema)
+async def read_lesson(
+        *,
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
+        lesson_id: UUIDStr,
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get lesson by ID.
     """
-    lesson_obj = lesson.get(db=db, id=lesson_id)
+    lesson_obj = await async_lesson.get(db=db, id=lesson_id)
     if not lesson_obj:
         raise HTTPException(status_code=404, detail="Lesson not found")
 
     # Check if user has access to this lesson's course
-    if current_user.role != "admin" and not course.is_user_enrolled(
+    if current_user.role != "admin" and not await async_course.is_user_enrolled(
             db=db, user_id=current_user.id, course_id=lesson_obj.course_id
     ):
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
+    set_etag(response, lesson_obj)
     return lesson_obj
 
 
 @router.put("/{lesson_id}", response_model=LessonSchema)
 def update_lesson(
         *,
+        response: Response,
         db: Session = Depends(get_db),
-        lesson_id: str,
+        lesson_id: UUIDStr,
         lesson_in: LessonUpdate,
-        current_user: User = Depends(get_current_admin_user),
+        version: Optional[int] = Depends(get_if_match_version),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Update a lesson.
+
+    Send the ETag from reading the lesson as If-Match to get a 409 instead of
+    overwriting changes made since.
     """
-    lesson_obj = lesson.get(db=db, id=lesson_id)
+    lesson_obj = lesson.update_by_id(db=db, id=lesson_id, obj_in=lesson_in, version=version)
     if not lesson_obj:
         raise HTTPException(status_code=404, detail="Lesson not found")
 
-    lesson_obj = lesson.update(db=db, db_obj=lesson_obj, obj_in=lesson_in)
+    set_etag(response, lesson_obj)
     return lesson_obj
 
 
@@ -109,8 +183,8 @@ def update_lesson(
 def delete_lesson(
         *,
         db: Session = Depends(get_db),
-        lesson_id: str,
-        current_user: User = Depends(get_current_admin_user),
+        lesson_id: UUIDStr,
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Delete a lesson.
@@ -127,8 +201,8 @@ def delete_lesson(
 def complete_lesson(
         *,
         db: Session = Depends(get_db),
-        lesson_id: str,
-        current_user: User = Depends(get_current_active_user),
+        lesson_id: UUIDStr,
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Mark lesson as completed by current user.
@@ -1,12 +1,17 @@
 from typing import Any, List
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user
-from app.models.user import User
+from app.api.deps import (
+    get_db, get_deadline, get_read_db, get_current_active_user, get_current_active_user_async,
+)
+from app.core.deadline import Deadline
+from app.core.principal_cache import Principal
 from app.crud.recommendation import recommendation
-from app.crud.course import course
+from app.crud.course import async_course
+from app.db.ids import UUIDStr
 from app.schemas.recommendation import CourseRecommendation, LessonRecommendation, UserBasedRecommendation
 from app.services.recommendation_service import RecommendationService
 
@@ -14,72 +19,78 @@ router = APIRouter()
 
 
 @router.get("/courses")
-def get_course_recommendations(
-    db: Session = Depends(get_db),
+async def get_course_recommendations(
+    db: AsyncSession = Depends(get_read_db),
     limit: int = 5,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user_async),
 ):
     user_id = current_user.id
-    recommended_courses = RecommendationService.get_recommendations(db, user_id, limit)
+    recommended_courses = await db.run_sync(
+        lambda session: RecommendationService.get_recommendations(session, user_id, limit)
+    )
     return recommended_courses
 
 @router.get("/lessons/{course_id}", response_model=List[LessonRecommendation])
-def get_lesson_recommendations(
+async def get_lesson_recommendations(
         *,
-        db: Session = Depends(get_db),
-        course_id: str,
+        db: AsyncSession = Depends(get_read_db),
+        course_id: UUIDStr,
         limit: int = Query(3, ge=1, le=10),
-        current_user: User = Depends(get_current_active_user),
+        deadline: Deadline = Depends(get_deadline),
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get recommended lessons within a course based on user's progress.
     """
     # Check if user has access to this course
-    if not course.is_user_enrolled(db=db, user_id=current_user.id, course_id=course_id):
+    if not await async_course.is_user_enrolled(db=db, user_id=current_user.id, course_id=course_id):
         raise HTTPException(status_code=403, detail="Not enough permissions")
+    deadline.check("ranking lessons")
 
-    recommended_lessons = recommendation.get_recommended_lessons(
-        db=db,
+    recommended_lessons = await db.run_sync(lambda session: recommendation.get_recommended_lessons(
+        db=session,
         user_id=current_user.id,
         course_id=course_id,
         limit=limit
-    )
+    ))
     return recommended_lessons
 
 
 @router.get("/similar-users", response_model=List[UserBasedRecommendation])
-def get_similar_users_recommendations(
+async def get_similar_users_recommendations(
         *,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_read_db),
         limit: int = Query(5, ge=1, le=20),
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get recommendations based on similar users' activities.
     """
-    user_based_recommendations = recommendation.get_similar_users_recommendations(
-        db=db,
-        user_id=current_user.id,
-        limit=limit
+    user_based_recommendations = await db.run_sync(
+        lambda session: recommendation.get_similar_users_recommendations(
+            db=session,
+            user_id=current_user.id,
+            limit=limit
+        )
     )
     return user_based_recommendations
 
 
 @router.get("/next-steps", response_model=List[LessonRecommendation])
-def get_next_steps(
+async def get_next_steps(
         *,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_read_db),
         limit: int = Query(3, ge=1, le=10),
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get personalized next steps for the user across all enrolled courses.
     """
-    next_steps = recommendation.get_user_next_steps(
-        db=db,
+    next_steps = await db.run_sync(lambda session: recommendation.get_user_next_steps(
+        db=session,
         user_id=current_user.id,
         limit=limit
-    )
+    ))
     return next_steps
 
 
@@ -87,9 +98,9 @@ def get_next_steps(
 def submit_recommendation_feedback(
         *,
         db: Session = Depends(get_db),
-        recommendation_id: str,
+        recommendation_id: UUIDStr,
         is_helpful: bool,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Submit feedback for a recommendation to improve future recommendations.
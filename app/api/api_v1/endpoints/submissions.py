@@ -1,16 +1,19 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.api.deps import get_db, get_current_active_user, get_current_admin_user, get_deadline
+from app.core.deadline import Deadline
+from app.core.principal_cache import Principal
 from app.models.submission import Submission
 from app.crud.submission import submission
 from app.crud.assignment import assignment
 from app.crud.course import course
 from app.crud.lesson import lesson
+from app.crud.pagination import set_next_cursor, set_total
+from app.db.ids import UUIDStr
 from app.schemas.submission import Submission as SubmissionSchema, SubmissionCreate, SubmissionUpdate
 
 router = APIRouter()
@@ -18,11 +21,15 @@ router = APIRouter()
 
 @router.get("/", response_model=List[SubmissionSchema])
 def read_submissions(
+        response: Response,
         db: Session = Depends(get_db),
         skip: int = 0,
         limit: int = 100,
-        assignment_id: str = None,
-        current_user: User = Depends(get_current_active_user),
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        assignment_id: UUIDStr = None,
+        deadline: Deadline = Depends(get_deadline),
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve submissions.
@@ -34,11 +41,13 @@ def read_submissions(
             raise HTTPException(status_code=404, detail="Assignment not found")
 
         lesson_obj = lesson.get(db=db, id=assignment_obj.lesson_id)
+        deadline.check("listing submissions")
 
         # Admin can see all submissions, users can only see their own
         if current_user.role == "admin":
             submissions = submission.get_multi_by_assignment(
-                db=db, assignment_id=assignment_id, skip=skip, limit=limit
+                db=db, assignment_id=assignment_id, skip=skip, limit=limit, cursor=cursor,
+                with_total=with_total,
             )
         else:
             # Check if user has access to this course
@@ -52,12 +61,17 @@ def read_submissions(
                 db=db, assignment_id=assignment_id, user_id=current_user.id
             )
     elif current_user.role == "admin":
-        submissions = submission.get_multi(db=db, skip=skip, limit=limit)
+        submissions = submission.get_multi(
+            db=db, skip=skip, limit=limit, cursor=cursor, with_total=with_total
+        )
     else:
         # Regular users can only see their own submissions
         submissions = submission.get_multi_by_user(
-            db=db, user_id=current_user.id, skip=skip, limit=limit
+            db=db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
         )
+    set_next_cursor(response, submissions, limit, cursor)
+    set_total(response, submissions)
     return submissions
 
 
@@ -66,7 +80,8 @@ def create_submission(
         *,
         db: Session = Depends(get_db),
         submission_in: SubmissionCreate,
-        current_user: User = Depends(get_current_active_user),
+        deadline: Deadline = Depends(get_deadline),
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Create new submission.
@@ -84,6 +99,7 @@ def create_submission(
             db=db, user_id=current_user.id, course_id=lesson_obj.course_id
     ):
         raise HTTPException(status_code=403, detail="Not enough permissions")
+    deadline.check("creating the submission")
 
     # Create submission with current user ID
     submission_data = submission_in.dict()
@@ -97,8 +113,8 @@ def create_submission(
 def read_submission(
         *,
         db: Session = Depends(get_db),
-        submission_id: str,
-        current_user: User = Depends(get_current_active_user),
+        submission_id: UUIDStr,
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Get submission by ID.
@@ -118,9 +134,9 @@ def read_submission(
 def update_submission(
         *,
         db: Session = Depends(get_db),
-        submission_id: str,
+        submission_id: UUIDStr,
         submission_in: SubmissionUpdate,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Update a submission.
@@ -148,8 +164,8 @@ def update_submission(
 def delete_submission(
         *,
         db: Session = Depends(get_db),
-        submission_id: str,
-        current_user: User = Depends(get_current_admin_user),
+        submission_id: UUIDStr,
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Delete a submission.
@@ -1,16 +1,19 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.api.deps import get_db, get_current_active_user, get_current_admin_user, get_deadline
+from app.core.deadline import Deadline
+from app.core.principal_cache import Principal
 from app.models.test_result import TestResult
 from app.crud.test_result import test_result
 from app.crud.test import test
 from app.crud.course import course
 from app.crud.lesson import lesson
+from app.crud.pagination import set_next_cursor, set_total
+from app.db.ids import UUIDStr
 from app.schemas.test_result import TestResultOut as TestResultSchema
 
 router = APIRouter()
@@ -18,11 +21,15 @@ router = APIRouter()
 
 @router.get("/", response_model=List[TestResultSchema])
 def read_test_results(
+        response: Response,
         db: Session = Depends(get_db),
         skip: int = 0,
         limit: int = 100,
-        test_id: str = None,
-        current_user: User = Depends(get_current_active_user),
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        test_id: UUIDStr = None,
+        deadline: Deadline = Depends(get_deadline),
+        current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve test results.
@@ -34,12 +41,15 @@ def read_test_results(
             raise HTTPException(status_code=404, detail="Test not found")
 
         lesson_obj = lesson.get(db=db, id=test_obj.lesson_id)
+        deadline.check("listing test results")
 
         # Admin can see all results, users can only see their own
         if current_user.role == "admin":
             results = test_result.get_multi_by_test(
-                db=db, test_id=test_id, skip=skip, limit=limit
+                db=db, test_id=test_id, skip=skip, limit=limit, cursor=cursor, with_total=with_total
             )
+            set_next_cursor(response, results, limit, cursor)
+            set_total(response, results)
         else:
             # Check if user has access to this course
             if not course.is_user_enrolled(
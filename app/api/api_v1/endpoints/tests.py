@@ -1,62 +1,78 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.api.deps import (
+    check_batch_size, get_db, get_if_match_version, get_read_db,
+    get_current_active_user_async, get_current_admin_user, set_etag,
+)
+from app.core.principal_cache import Principal
 from app.models.test import Test
-from app.crud.test import test
-from app.crud.course import course
-from app.crud.lesson import lesson
-from app.schemas.test import Test as TestSchema, TestCreate, TestUpdate, TestWithQuestions
+from app.crud.test import async_test, test
+from app.crud.course import async_course, course
+from app.crud.lesson import async_lesson, lesson
+from app.crud.pagination import set_next_cursor, set_total
+from app.db.ids import UUIDStr
+from app.schemas.test import Test as TestSchema, TestBatchUpdate, TestCreate, TestUpdate, TestWithQuestions
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[TestSchema])
-def read_tests(
-        db: Session = Depends(get_db),
+async def read_tests(
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
         skip: int = 0,
         limit: int = 100,
-        lesson_id: str = None,
-        course_id: str = None,
-        current_user: User = Depends(get_current_active_user),
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        lesson_id: UUIDStr = None,
+        course_id: UUIDStr = None,
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Retrieve tests.
     """
     if lesson_id:
-        lesson_obj = lesson.get(db=db, id=lesson_id)
+        lesson_obj = await async_lesson.get(db=db, id=lesson_id)
         if not lesson_obj:
             raise HTTPException(status_code=404, detail="Lesson not found")
 
         # Check if user has access to this lesson's course
-        if current_user.role != "admin" and not course.is_user_enrolled(
+        if current_user.role != "admin" and not await async_course.is_user_enrolled(
                 db=db, user_id=current_user.id, course_id=lesson_obj.course_id
         ):
             raise HTTPException(status_code=403, detail="Not enough permissions")
 
-        tests = test.get_multi_by_lesson(
-            db=db, lesson_id=lesson_id, skip=skip, limit=limit
-        )
+        tests = await db.run_sync(lambda session: test.get_multi_by_lesson(
+            db=session, lesson_id=lesson_id, skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+        ))
     elif course_id:
         # Check if user has access to this course
-        if current_user.role != "admin" and not course.is_user_enrolled(
+        if current_user.role != "admin" and not await async_course.is_user_enrolled(
                 db=db, user_id=current_user.id, course_id=course_id
         ):
             raise HTTPException(status_code=403, detail="Not enough permissions")
 
-        tests = test.get_multi_by_course(
-            db=db, course_id=course_id, skip=skip, limit=limit
-        )
+        tests = await db.run_sync(lambda session: test.get_multi_by_course(
+            db=session, course_id=course_id, skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+        ))
     elif current_user.role == "admin":
-        tests = test.get_multi(db=db, skip=skip, limit=limit)
-    else:
-        tests = test.get_multi_by_user(
-            db=db, user_id=current_user.id, skip=skip, limit=limit
+        tests = await async_test.get_multi(
+            db=db, skip=skip, limit=limit, cursor=cursor, with_total=with_total
         )
+    else:
+        tests = await db.run_sync(lambda session: test.get_multi_by_user(
+            db=session, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+        ))
+    set_next_cursor(response, tests, limit, cursor)
+    set_total(response, tests)
     return tests
 
 
@@ -65,7 +81,7 @@ def create_test(
         *,
         db: Session = Depends(get_db),
         test_in: TestCreate,
-        current_user: User = Depends(get_current_admin_user),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Create new test.
@@ -79,49 +95,105 @@ def create_test(
     return test_obj
 
 
-@router.get("/{test_id}", response_model=TestWithQuestions)
-def read_test(
+@router.post("/batch", response_model=List[TestSchema])
+def create_tests(
+        *,
+        db: Session = Depends(get_db),
+        tests_in: List[TestCreate],
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Create many tests in one transaction.
+    """
+    check_batch_size(tests_in)
+    course_ids = list({test_in.course_id for test_in in tests_in})
+    if len(course.get_by_ids(db=db, ids=course_ids)) != len(course_ids):
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    return test.create_multi(db=db, objs_in=tests_in)
+
+
+@router.patch("/batch", response_model=List[TestSchema])
+def update_tests(
         *,
         db: Session = Depends(get_db),
-        test_id: str,
-        current_user: User = Depends(get_current_active_user),
+        tests_in: List[TestBatchUpdate],
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Update many tests in one transaction. Unknown IDs are left out of the response.
+    Items that set `version` must still be at it, or the batch fails with a 409.
+    """
+    check_batch_size(tests_in)
+    return test.update_multi(db=db, objs_in={test_in.id: test_in for test_in in tests_in})
+
+
+@router.post("/batch/delete", response_model=List[TestSchema])
+def delete_tests(
+        *,
+        db: Session = Depends(get_db),
+        ids: List[UUIDStr] = Body(..., embed=True),
+        current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Delete many tests in one transaction. Unknown IDs are left out of the response.
+    """
+    check_batch_size(ids)
+    return test.remove_multi(db=db, ids=ids)
+
+
+@router.get("/{test_id}", response_model=TestWithQuestions)
+async def read_test(
+        *,
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
+        test_id: UUIDStr,
+        current_user: Principal = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get test by ID with all questions.
     """
-    test_obj = test.get(db=db, id=test_id)
+    test_obj = await async_test.get(db=db, id=test_id)
     if not test_obj:
         raise HTTPException(status_code=404, detail="Test not found")
 
     # Get lesson and course info
-    lesson_obj = lesson.get(db=db, id=test_obj.lesson_id)
+    lesson_obj = await async_lesson.get(db=db, id=test_obj.lesson_id)
 
     # Check if user has access to this test's course
-    if current_user.role != "admin" and not course.is_user_enrolled(
+    if current_user.role != "admin" and not await async_course.is_user_enrolled(
             db=db, user_id=current_user.id, course_id=lesson_obj.course_id
     ):
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
     # Get test with questions
-    return test.get_test_with_questions(db=db, test_id=test_id)
+    set_etag(response, test_obj)
+    return await db.run_sync(lambda session: test.get_test_with_questions(
+        db=session, test_id=test_id
+    ))
 
 
 @router.put("/{test_id}", response_model=TestSchema)
 def update_test(
         *,
+        response: Response,
         db: Session = Depends(get_db),
-        test_id: str,
+        test_id: UUIDStr,
         test_in: TestUpdate,
-        current_user: User = Depends(get_current_admin_user),
+        version: Optional[int] = Depends(get_if_match_version),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Update a test.
+
+    Send the ETag from reading the test as If-Match to get a 409 instead of
+    overwriting changes made since.
     """
-    test_obj = test.get(db=db, id=test_id)
+    test_obj = test.update_by_id(db=db, id=test_id, obj_in=test_in, version=version)
     if not test_obj:
         raise HTTPException(status_code=404, detail="Test not found")
 
-    test_obj = test.update(db=db, db_obj=test_obj, obj_in=test_in)
+    set_etag(response, test_obj)
     return test_obj
 
 
@@ -129,8 +201,8 @@ def update_test(
 def delete_test(
         *,
         db: Session = Depends(get_db),
-        test_id: str,
-        current_user: User = Depends(get_current_admin_user),
+        test_id: UUIDStr,
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Delete a test.
@@ -147,9 +219,9 @@ def delete_test(
 def add_question_to_test(
         *,
         db: Session = Depends(get_db),
-        test_id: str,
+        test_id: UUIDStr,
         question_data: dict = Body(...),
-        current_user: User = Depends(get_current_admin_user),
+        current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Add a question to a test.
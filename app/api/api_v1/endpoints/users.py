@@ -1,28 +1,41 @@
-from typing import Any, List
+import logging
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Response, UploadFile
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.core.principal_cache import Principal
+from app.core.config import settings
 from app.crud.user import user
-from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
+from app.crud.user_import_job import user_import_job
+from app.crud.pagination import set_next_cursor, set_total
+from app.db.ids import UUIDStr
+from app.schemas.user import User as UserSchema, UserCreate, UserImportJob, UserUpdate
+from app.services import user_import
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[UserSchema])
 def read_users(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_admin_user),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Retrieve users.
     """
-    users = user.get_multi(db, skip=skip, limit=limit)
+    users = user.get_multi(db, skip=skip, limit=limit, cursor=cursor, with_total=with_total)
+    set_next_cursor(response, users, limit, cursor)
+    set_total(response, users)
     return users
 
 
@@ -31,7 +44,7 @@ def create_user(
     *,
     db: Session = Depends(get_db),
     user_in: UserCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Create new user.
@@ -46,14 +59,63 @@ def create_user(
     return user_obj
 
 
+@router.post("/import", response_model=UserImportJob, status_code=202)
+def import_users(
+    *,
+    db: Session = Depends(get_db),
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Queue a bulk import of users from a CSV or NDJSON file.
+
+    The import runs in the background; poll `GET /users/import/{job_id}` for
+    its progress and per-row errors.
+    """
+    fmt = format or user_import.detect_format(file.filename, file.content_type)
+    if fmt not in user_import.IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format {fmt!r}")
+    try:
+        content = file.file.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded")
+    rows = user_import.parse_rows(content, fmt)
+    if len(rows) > settings.USER_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Import is limited to {settings.USER_IMPORT_MAX_ROWS} rows",
+        )
+    job = user_import.submit_import(db, rows, created_by=current_user.id)
+    logger.info("User import %s of %s rows queued by %s", job.id, len(rows), current_user.id)
+    return job
+
+
+@router.get("/import/{job_id}", response_model=UserImportJob)
+def read_import_job(
+    *,
+    db: Session = Depends(get_db),
+    job_id: UUIDStr,
+    current_user: Principal = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Get the progress of a bulk import.
+    """
+    job = user_import_job.get(db, id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
 @router.get("/me", response_model=UserSchema)
 def read_user_me(
-    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Get current user.
     """
-    return current_user
+    return user.get(db, id=current_user.id)
 
 
 @router.put("/me", response_model=UserSchema)
@@ -61,20 +123,21 @@ def update_user_me(
     *,
     db: Session = Depends(get_db),
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Update own user.
     """
-    user_obj = user.update(db, db_obj=current_user, obj_in=user_in)
+    user_obj = user.get(db, id=current_user.id)
+    user_obj = user.update(db, db_obj=user_obj, obj_in=user_in)
     return user_obj
 
 
 @router.get("/{user_id}", response_model=UserSchema)
 def read_user_by_id(
-    user_id: str,
+    user_id: UUIDStr,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """
     Get a specific user by id.
@@ -98,9 +161,9 @@ def read_user_by_id(
 def update_user(
     *,
     db: Session = Depends(get_db),
-    user_id: str,
+    user_id: UUIDStr,
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Update a user.
@@ -119,8 +182,8 @@ def update_user(
 def delete_user(
     *,
     db: Session = Depends(get_db),
-    user_id: str,
-    current_user: User = Depends(get_current_admin_user),
+    user_id: UUIDStr,
+    current_user: Principal = Depends(get_current_admin_user),
 ) -> Any:
     """
     Delete a user.
@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import auth, users, courses, lessons, assignments, submissions, tests, test_results, recommendations, chatbot
+from app.api.api_v1.endpoints import auth, api_keys, users, courses, lessons, assignments, submissions, tests, test_results, recommendations, chatbot
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+api_router.include_router(api_keys.router, prefix="/api-keys", tags=["api-keys"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(courses.router, prefix="/courses", tags=["courses"])
 api_router.include_router(lessons.router, prefix="/lessons", tags=["lessons"])
@@ -1,62 +1,264 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from typing import Any, AsyncGenerator, Generator, Optional, Sized, Tuple
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.security import verify_token
-from app.db.session import SessionLocal
-from app.models.user import User
+from app.core.deadline import Deadline, request_deadline
+from app.core.principal_cache import Principal, api_key_cache, principal_cache
+from app.core.revocation import revocation_store
+from app.core.security import hash_api_key, verify_token
+from app.crud.api_key import api_key, async_api_key
+from app.db.replicas import READ_PIN_COOKIE, READ_PIN_HEADER, replica_router
+from app.db.session import REQUEST_DEADLINE, REQUEST_TRANSACTION, AsyncSessionLocal, SessionLocal
 from app.schemas.auth import TokenPayload
-from app.crud.user import user
+from app.crud.user import async_user, user
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False
+)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
 
-def get_db() -> Generator:
+
+def get_db(request: Request) -> Generator:
     """
     Get database session.
+
+    With DB_TRANSACTION_PER_REQUEST the request owns the transaction: CRUD
+    methods only flush and `commit_request_transaction` commits once at the end.
+
+    Queries run with the request's remaining time budget as statement_timeout.
     """
     db = SessionLocal()
+    db.info[REQUEST_DEADLINE] = request_deadline(request)
+    if settings.DB_TRANSACTION_PER_REQUEST:
+        db.info[REQUEST_TRANSACTION] = True
+        request.state.db = db
     try:
         yield db
     finally:
         db.close()
 
 
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session.
+    """
+    async with AsyncSessionLocal() as db:
+        db.info[REQUEST_DEADLINE] = request_deadline(request)
+        yield db
+
+
+def get_deadline(request: Request) -> Deadline:
+    """
+    Get the request's deadline, to check between the stages of an endpoint.
+    """
+    return request_deadline(request)
+
+
 def get_current_user(
+        request: Request,
         db: Session = Depends(get_db),
-        token: str = Depends(oauth2_scheme)
-) -> User:
+        token: Optional[str] = Depends(optional_oauth2_scheme),
+        api_key_value: Optional[str] = Depends(api_key_header),
+) -> Principal:
     """
-    Get current user from token.
+    Get current user from an API key or a bearer token.
+
+    API keys sent in the X-API-Key header are checked by their HMAC digest
+    and cached like principals, acting as their owner with the key's role.
+
+    The user lookup is served from the principal cache when possible, so the
+    database is only queried on a cache miss. Tokens carrying role/is_active
+    claims only need the user's token version on a miss; a token issued for
+    an older version is rejected, as is a token whose ID has been revoked.
+    """
+    principal = _authenticate(db, token, api_key_value)
+    # Lets the middleware pin this user to the primary after a write
+    request.state.principal_id = principal.id
+    return principal
+
+
+async def get_current_user_async(
+        request: Request,
+        token: Optional[str] = Depends(optional_oauth2_scheme),
+        api_key_value: Optional[str] = Depends(api_key_header),
+) -> Principal:
+    """
+    Get current user for async routes, see `get_current_user`.
+
+    Cache misses are looked up on a short-lived AsyncSession, so
+    authentication needs neither a threadpool thread nor a sync connection.
     """
+    principal = await _authenticate_async(request, token, api_key_value)
+    request.state.principal_id = principal.id
+    return principal
+
+
+def _authenticate(db: Session, token: Optional[str], api_key_value: Optional[str]) -> Principal:
+    if api_key_value:
+        return _get_api_key_principal(db, api_key_value)
+    token_data = _decode_token(token)
+    if token_data.jti is not None:
+        revocation_store.maybe_refresh()
+        _check_revocation(token_data)
+
+    principal = principal_cache.get(token_data.sub)
+    if principal is None:
+        principal = _load_principal(db, token_data)
+    return _check_token_version(principal, token_data)
+
+
+async def _authenticate_async(
+        request: Request, token: Optional[str], api_key_value: Optional[str]
+) -> Principal:
+    if api_key_value:
+        hashed_key = hash_api_key(api_key_value)
+        principal = api_key_cache.get(hashed_key)
+        if principal is None:
+            async with _auth_session(request) as db:
+                found = await async_api_key.get_valid_by_hash(db, hashed_key=hashed_key)
+            principal = _cache_api_key_principal(hashed_key, found)
+        return principal
+
+    token_data = _decode_token(token)
+    if token_data.jti is not None:
+        if revocation_store.refresh_due():
+            # Once per refresh interval; the revocation table is read with the sync CRUD
+            await run_in_threadpool(revocation_store.maybe_refresh)
+        _check_revocation(token_data)
+
+    principal = principal_cache.get(token_data.sub)
+    if principal is None:
+        async with _auth_session(request) as db:
+            if _has_claims(token_data):
+                principal = _claims_principal(
+                    token_data, await async_user.get_token_version(db, user_id=token_data.sub)
+                )
+            if principal is None:
+                principal = _user_principal(await async_user.get(db, id=token_data.sub))
+    return _check_token_version(principal, token_data)
+
+
+def _auth_session(request: Request) -> AsyncSession:
+    db = AsyncSessionLocal()
+    db.info[REQUEST_DEADLINE] = request_deadline(request)
+    return db
+
+
+def _decode_token(token: Optional[str]) -> TokenPayload:
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     try:
         payload = verify_token(token)
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
 
-    user_obj = user.get_user_by_id(db, user_id=token_data.sub)
+
+def _check_revocation(token_data: TokenPayload) -> None:
+    if revocation_store.is_revoked(token_data.jti):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token has been revoked",
+        )
+
+
+def _check_token_version(principal: Principal, token_data: TokenPayload) -> Principal:
+    if token_data.ver is not None and token_data.ver != principal.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    return principal
+
+
+def _get_api_key_principal(db: Session, api_key_value: str) -> Principal:
+    """
+    Resolve an API key to the principal it acts as.
+    """
+    hashed_key = hash_api_key(api_key_value)
+    principal = api_key_cache.get(hashed_key)
+    if principal is not None:
+        return principal
+    return _cache_api_key_principal(hashed_key, api_key.get_valid_by_hash(db, hashed_key=hashed_key))
+
+
+def _cache_api_key_principal(hashed_key: str, found: Optional[Tuple[Any, str]]) -> Principal:
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    key_obj, role = found
+    return api_key_cache.put(
+        Principal(id=key_obj.user_id, role=role, is_active=key_obj.is_active),
+        key=hashed_key,
+    )
+
+
+def _has_claims(token_data: TokenPayload) -> bool:
+    return (
+        token_data.role is not None
+        and token_data.is_active is not None
+        and token_data.ver is not None
+    )
+
+
+def _claims_principal(token_data: TokenPayload, token_version: Optional[int]) -> Optional[Principal]:
+    # The token's claims stand for the user while its version is current
+    if token_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    if token_version != token_data.ver:
+        return None
+    return principal_cache.put(Principal(
+        id=token_data.sub,
+        role=token_data.role,
+        is_active=token_data.is_active,
+        token_version=token_version,
+    ))
+
+
+def _user_principal(user_obj: Any) -> Principal:
     if not user_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    return user_obj
+    return principal_cache.put(user_obj)
 
 
-def get_current_active_user(
-        current_user: User = Depends(get_current_user),
-) -> User:
+def _load_principal(db: Session, token_data: TokenPayload) -> Principal:
     """
-    Get current active user.
+    Build the principal for a cache miss and store it in the cache.
     """
+    if _has_claims(token_data):
+        principal = _claims_principal(
+            token_data, user.get_token_version(db, user_id=token_data.sub)
+        )
+        if principal is not None:
+            return principal
+    return _user_principal(user.get_user_by_id(db, user_id=token_data.sub))
+
+
+def _require_active(current_user: Principal) -> Principal:
     if not current_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,9 +267,27 @@ def get_current_active_user(
     return current_user
 
 
+def get_current_active_user(
+        current_user: Principal = Depends(get_current_user),
+) -> Principal:
+    """
+    Get current active user.
+    """
+    return _require_active(current_user)
+
+
+async def get_current_active_user_async(
+        current_user: Principal = Depends(get_current_user_async),
+) -> Principal:
+    """
+    Get current active user for async routes.
+    """
+    return _require_active(current_user)
+
+
 def get_current_admin_user(
-        current_user: User = Depends(get_current_active_user),
-) -> User:
+        current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
     """
     Get current admin user.
     """
@@ -80,8 +300,8 @@ def get_current_admin_user(
 
 
 def get_current_teacher_user(
-        current_user: User = Depends(get_current_active_user),
-) -> User:
+        current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
     """
     Get current teacher user.
     """
@@ -90,4 +310,60 @@ def get_current_teacher_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges",
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def get_read_db(
+        request: Request,
+        current_user: Principal = Depends(get_current_user_async),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session for a read-only request.
+
+    Served by a read replica when one is healthy, unless the user wrote
+    recently and must read from the primary to see their own changes.
+    """
+    replica = None
+    if request.method in READ_ONLY_METHODS:
+        pin = request.headers.get(READ_PIN_HEADER) or request.cookies.get(READ_PIN_COOKIE)
+        replica = await replica_router.choose(current_user.id, pin=pin)
+    session_factory = replica.session_factory if replica is not None else AsyncSessionLocal
+    async with session_factory() as db:
+        db.info[REQUEST_DEADLINE] = request_deadline(request)
+        yield db
+
+
+def check_batch_size(items: Sized) -> None:
+    """
+    Reject batch requests larger than BATCH_MAX_ITEMS.
+    """
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batches are limited to {settings.BATCH_MAX_ITEMS} items",
+        )
+
+
+def get_if_match_version(if_match: Optional[str] = Header(None)) -> Optional[int]:
+    """
+    Get the version a client is editing from its If-Match header.
+
+    Returns None when the header is missing or "*", so the write is not
+    checked against a version.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid If-Match header")
+
+
+def set_etag(response: Response, obj: Any) -> None:
+    """
+    Tag a response with the version of the object it returns.
+    """
+    response.headers["ETag"] = f'"{obj.version}"'
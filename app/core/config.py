@@ -9,12 +9,77 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
+    # Shared JWT key ring: {"active": "<kid>", "keys": {"<kid>": "<secret>"}}
+    JWT_KEYS_FILE: Optional[str] = None
+    JWT_KEYS: Optional[str] = None
+    JWT_KEYS_RELOAD_SECONDS: int = 10
+    JWT_KEYS_KEEP_PREVIOUS: int = 2
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # HMAC key for API key hashes; required and identical on every worker, since
+    # changing it silently invalidates every stored key
+    API_KEY_PEPPER: str
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_REFRESH_SECONDS: int = 5
+    # "memory" limits per worker, "database" shares buckets across workers
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"
+    LOGIN_RATE_LIMIT_EMAIL_BURST: int = 5
+    LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE: float = 5
+    LOGIN_RATE_LIMIT_IP_BURST: int = 20
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE: float = 30
+    # bcrypt cost; when unset it can be calibrated against PASSWORD_HASH_TARGET_MS.
+    # Calibrating on startup is per host, prefer pinning BCRYPT_ROUNDS across nodes.
+    BCRYPT_ROUNDS: Optional[int] = None
+    BCRYPT_CALIBRATE_ON_STARTUP: bool = False
+    PASSWORD_HASH_TARGET_MS: int = 250
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    # Bulk user import; USER_IMPORT_PROCESSES defaults to one per CPU core
+    USER_IMPORT_PROCESSES: Optional[int] = None
+    USER_IMPORT_BATCH_SIZE: int = 1000
+    USER_IMPORT_MAX_ROWS: int = 50000
+    # Imports run in the background; more queued than this per process get a 503
+    USER_IMPORT_MAX_QUEUED_JOBS: int = 2
+    USER_IMPORT_RETRY_AFTER_SECONDS: int = 60
+    # Largest request accepted by the batch create/update/delete endpoints
+    BATCH_MAX_ITEMS: int = 5000
+    # Unfiltered list totals switch to the planner's row estimate above this size
+    COUNT_ESTIMATE_MIN_ROWS: int = 100000
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
     # Database
     DATABASE_URL: str
     TEST_DATABASE_URL: str
+    # Derived from DATABASE_URL with the asyncpg driver when not set
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Read replicas as a JSON list, same URL form as DATABASE_URL
+    DATABASE_REPLICA_URLS: List[str] = []
+    # Reads go to the primary for this long after a user's own write
+    REPLICA_PIN_SECONDS: int = 5
+    REPLICA_HEALTH_CHECK_SECONDS: int = 10
+    REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS: float = 1
+    # Per engine and per process; workers x (size + overflow) x 2 engines must
+    # stay below Postgres max_connections
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_USE_LIFO: bool = True
+    # One transaction per request: CRUD methods flush and the request commits once
+    DB_TRANSACTION_PER_REQUEST: bool = True
+    # Time budget per request in seconds, passed to Postgres as statement_timeout.
+    # REQUEST_DEADLINES overrides it per route, keyed "METHOD /path template".
+    REQUEST_DEADLINE_SECONDS: float = 10
+    REQUEST_DEADLINES: Dict[str, float] = {
+        "GET /api/v1/recommendations/courses": 20,
+        "GET /api/v1/recommendations/similar-users": 20,
+        "GET /api/v1/recommendations/next-steps": 20,
+    }
     # Security
     ADMIN_EMAIL: EmailStr = "admin@example.com"
     ADMIN_PASSWORD: str = "adminpassword"
@@ -25,6 +90,12 @@ class Settings(BaseSettings):
     # Project info
     PROJECT_NAME: str = "LMS Platform"
 
+    @validator("API_KEY_PEPPER")
+    def check_api_key_pepper(cls, v: str) -> str:
+        if len(v) < 32:
+            raise ValueError("API_KEY_PEPPER must be at least 32 characters")
+        return v
+
     class Config:
         case_sensitive = True
         env_file = ".env"
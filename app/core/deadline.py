@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.exceptions import GatewayTimeoutException
+from app.core.metrics import metrics
+
+
+class DeadlineStats:
+    def __init__(self):
+        """
+        Counts of requests that ran out of their time budget, per route.
+        """
+        self._lock = threading.Lock()
+        self.stage_timeouts: Counter = Counter()
+        self.statement_timeouts: Counter = Counter()
+
+    def record_stage_timeout(self, route: str) -> None:
+        with self._lock:
+            self.stage_timeouts[route] += 1
+
+    def record_statement_timeout(self, route: str) -> None:
+        with self._lock:
+            self.statement_timeouts[route] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get timeout counts, in total and per route.
+        """
+        with self._lock:
+            return {
+                "stage_timeouts": sum(self.stage_timeouts.values()),
+                "statement_timeouts": sum(self.statement_timeouts.values()),
+                "by_route": {
+                    route: {
+                        "stage_timeouts": self.stage_timeouts[route],
+                        "statement_timeouts": self.statement_timeouts[route],
+                    }
+                    for route in sorted(set(self.stage_timeouts) | set(self.statement_timeouts))
+                },
+            }
+
+
+deadline_stats = DeadlineStats()
+metrics.register("request_deadlines", deadline_stats.stats)
+
+
+class Deadline:
+    def __init__(self, budget: float, route: str = "", started_at: Optional[float] = None):
+        """
+        Time budget of a single request.
+
+        **Parameters**
+
+        * `budget`: Seconds the request may take
+        * `route`: Route the budget belongs to, used to label timeout metrics
+        * `started_at`: `time.monotonic()` when the request arrived, defaults to now
+        """
+        self.budget = budget
+        self.route = route
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.expires_at = self.started_at + budget
+
+    def remaining(self) -> float:
+        """
+        Seconds left before the deadline, negative once it has passed.
+        """
+        return self.expires_at - time.monotonic()
+
+    def check(self, stage: str = "") -> None:
+        """
+        Raise a 504 if the deadline has passed.
+
+        Call between the stages of an endpoint that runs several queries, so a
+        request that is already late does not start more work.
+        """
+        if self.remaining() <= 0:
+            deadline_stats.record_stage_timeout(self.route)
+            detail = "Request deadline exceeded"
+            if stage:
+                detail = f"{detail} before {stage}"
+            raise GatewayTimeoutException(detail)
+
+    def statement_timeout_ms(self) -> int:
+        """
+        Remaining budget as a Postgres statement_timeout.
+
+        Raises a 504 instead of returning 0, which would disable the timeout.
+        """
+        self.check()
+        return max(int(self.remaining() * 1000), 1)
+
+
+def route_key(request: Request) -> str:
+    """
+    Get the "METHOD /path" key of a request's route, using the path template.
+    """
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or request.url.path
+    return f"{request.method} {path}"
+
+
+def request_deadline(request: Request) -> Deadline:
+    """
+    Get the deadline of a request, creating it on first use.
+
+    The budget comes from REQUEST_DEADLINES for the request's route, else
+    REQUEST_DEADLINE_SECONDS, counted from when `start_request_deadline` saw
+    the request arrive.
+    """
+    deadline = getattr(request.state, "deadline", None)
+    if deadline is None:
+        key = route_key(request)
+        budget = settings.REQUEST_DEADLINES.get(key, settings.REQUEST_DEADLINE_SECONDS)
+        started_at = getattr(request.state, "started_at", None)
+        deadline = Deadline(budget, route=key, started_at=started_at)
+        request.state.deadline = deadline
+    return deadline
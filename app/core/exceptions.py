@@ -1,10 +1,12 @@
+from typing import Dict, Optional
+
 from fastapi import HTTPException, status
 
 
 class LMSException(HTTPException):
     """Base exception for LMS application."""
-    def __init__(self, status_code: int, detail: str):
-        super().__init__(status_code=status_code, detail=detail)
+    def __init__(self, status_code: int, detail: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
         self.status_code = status_code
         self.detail = detail
 
@@ -36,4 +38,29 @@ class BadRequestException(LMSException):
 class ConflictException(LMSException):
     """Exception raised when there is a conflict."""
     def __init__(self, detail: str = "Conflict"):
-        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class TooManyRequestsException(LMSException):
+    """Exception raised when a client exceeds a rate limit."""
+    def __init__(self, detail: str = "Too many requests", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class ServiceUnavailableException(LMSException):
+    """Exception raised when a bounded resource is saturated."""
+    def __init__(self, detail: str = "Service unavailable", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+class GatewayTimeoutException(LMSException):
+    """Exception raised when a request runs out of its time budget."""
+    def __init__(self, detail: str = "Request deadline exceeded"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
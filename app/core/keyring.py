@@ -0,0 +1,251 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KID = "default"
+
+
+def _hmac(secret: str, message: str) -> str:
+    digest = hmac.new(secret.encode(), message.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:16]).decode().rstrip("=")
+
+
+class KeyRing:
+    def __init__(
+            self,
+            keys_file: Optional[str] = None,
+            keys_json: Optional[str] = None,
+            fallback_secret: Optional[str] = None,
+            reload_interval: float = 10.0,
+            unknown_kid_reload_interval: float = 1.0,
+    ):
+        """
+        JWT signing keys shared by every worker process.
+
+        Keys are loaded from a JSON file or a JSON string of the form
+        `{"active": "<kid>", "keys": {"<kid>": "<secret>", ...}}`. Tokens are
+        signed with the active key and carry its `kid` in the header; any key
+        still in the ring is accepted for verification, so rotating the active
+        key does not invalidate tokens signed with the previous ones.
+
+        **Parameters**
+
+        * `keys_file`: Path to the shared key file, re-read when it changes
+        * `keys_json`: Key ring as a JSON string, used when no file is given
+        * `fallback_secret`: Single key used when neither file nor JSON is set
+        * `reload_interval`: Minimum seconds between key file change checks
+        * `unknown_kid_reload_interval`: Minimum seconds between forced reloads
+          for tokens signed with a key this process has not seen yet
+        """
+        self.keys_file = keys_file
+        self.keys_json = keys_json
+        self.fallback_secret = fallback_secret
+        self.reload_interval = reload_interval
+        self.unknown_kid_reload_interval = unknown_kid_reload_interval
+        self.active_kid = DEFAULT_KID
+        self.keys: Dict[str, str] = {}
+        self._loaded = False
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._forced_reload_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """
+        Load keys from the configured source.
+        """
+        if self.keys_file:
+            with open(self.keys_file, encoding="utf-8") as f:
+                data = json.load(f)
+            self._mtime = os.path.getmtime(self.keys_file)
+            self._checked_at = time.monotonic()
+        elif self.keys_json:
+            data = json.loads(self.keys_json)
+        else:
+            logger.warning(
+                "No JWT key ring configured, falling back to SECRET_KEY; tokens "
+                "are only valid across workers if SECRET_KEY is set explicitly"
+            )
+            data = {"active": DEFAULT_KID, "keys": {DEFAULT_KID: self.fallback_secret}}
+
+        keys = data.get("keys") or {}
+        active_kid = data.get("active")
+        if active_kid not in keys:
+            raise ValueError(f"Active JWT key {active_kid!r} is not in the key ring")
+        with self._lock:
+            self.keys = dict(keys)
+            self.active_kid = active_kid
+            self._loaded = True
+
+    def _maybe_reload(self) -> None:
+        if not self._loaded:
+            self.load()
+            return
+        if not self.keys_file:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.keys_file)
+            if mtime != self._mtime:
+                self.load()
+                logger.info("Reloaded JWT key ring, active key %s", self.active_kid)
+        except (OSError, ValueError):
+            logger.exception("Failed to reload JWT key ring, keeping current keys")
+
+    def _reload_for_unknown_kid(self) -> bool:
+        # Another instance may have rotated the key file since the last check.
+        # Rate-limited, so tokens with made-up kids cannot force a reload each.
+        if not self.keys_file:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._forced_reload_at is not None
+                and now - self._forced_reload_at < self.unknown_kid_reload_interval
+            ):
+                return False
+            self._forced_reload_at = now
+        try:
+            self.load()
+        except (OSError, ValueError):
+            logger.exception("Failed to reload JWT key ring, keeping current keys")
+            return False
+        return True
+
+    def key(self, kid: str) -> Optional[str]:
+        """
+        Get the secret of a key in the ring, or None if there is no such key.
+
+        An unknown kid reloads the key file once before giving up.
+        """
+        self._maybe_reload()
+        with self._lock:
+            secret = self.keys.get(kid)
+        if secret is None and self._reload_for_unknown_kid():
+            with self._lock:
+                secret = self.keys.get(kid)
+        return secret
+
+    def active_key(self) -> Tuple[str, str]:
+        """
+        Get the ID and secret of the active key.
+        """
+        self._maybe_reload()
+        with self._lock:
+            return self.active_kid, self.keys[self.active_kid]
+
+    def sign(self, message: str) -> str:
+        """
+        Sign a message with the active key.
+
+        Returns:
+            "<kid>.<signature>", to be checked with `verify`
+        """
+        kid, secret = self.active_key()
+        return f"{kid}.{_hmac(secret, message)}"
+
+    def verify(self, message: str, signed: str) -> bool:
+        """
+        Check a signature made by `sign` with any key still in the ring.
+        """
+        kid, _, signature = signed.rpartition(".")
+        secret = self.key(kid) if kid else None
+        return secret is not None and hmac.compare_digest(signature, _hmac(secret, message))
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        """
+        Sign claims with the active key.
+        """
+        kid, secret = self.active_key()
+        return jwt.encode(
+            claims, secret, algorithm=settings.ALGORITHM, headers={"kid": kid}
+        )
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a token against the key named by its `kid` header.
+
+        Tokens without a `kid` are checked against every key in the ring.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is not None:
+            secret = self.key(kid)
+            if secret is None:
+                raise JWTError("Unknown signing key")
+            candidates = [secret]
+        else:
+            self._maybe_reload()
+            with self._lock:
+                candidates = [self.keys[self.active_kid]] + [
+                    secret for key_id, secret in self.keys.items()
+                    if key_id != self.active_kid
+                ]
+
+        error: Optional[JWTError] = None
+        for secret in candidates:
+            try:
+                return jwt.decode(token, secret, algorithms=[settings.ALGORITHM])
+            except JWTError as e:
+                error = e
+        raise error
+
+
+def rotate_keys_file(path: str, keep: int) -> str:
+    """
+    Add a new active key to a key file, keeping at most `keep` previous keys.
+
+    Returns:
+        The new key ID
+    """
+    data = {"active": None, "keys": {}}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+    kid = f"{datetime.utcnow():%Y%m%d%H%M%S}-{secrets.token_hex(4)}"
+    keys = data.get("keys") or {}
+    keys[kid] = secrets.token_urlsafe(32)
+    previous = [key_id for key_id in keys if key_id != kid]
+    for key_id in previous[:max(len(previous) - keep, 0)]:
+        del keys[key_id]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"active": kid, "keys": keys}, f, indent=2)
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)
+    return kid
+
+
+keyring = KeyRing(
+    keys_file=settings.JWT_KEYS_FILE,
+    keys_json=settings.JWT_KEYS,
+    fallback_secret=settings.SECRET_KEY,
+    reload_interval=settings.JWT_KEYS_RELOAD_SECONDS,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rotate the JWT signing key file")
+    parser.add_argument("--file", default=settings.JWT_KEYS_FILE, required=settings.JWT_KEYS_FILE is None)
+    parser.add_argument("--keep", type=int, default=settings.JWT_KEYS_KEEP_PREVIOUS)
+    args = parser.parse_args()
+    print(rotate_keys_file(args.file, keep=args.keep))
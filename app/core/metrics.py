@@ -0,0 +1,76 @@
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Sequence
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Thread-safe cumulative histogram of observed values.
+
+        **Parameters**
+
+        * `buckets`: Sorted upper bounds of the buckets, in seconds for latencies
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record a single value.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get count, sum, max and cumulative bucket counts.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+            maximum = self._max
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = running + counts[-1]
+        return {
+            "count": cumulative["+Inf"],
+            "sum": total,
+            "max": maximum,
+            "buckets": cumulative,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Named collection of stats callables exposed on the /metrics endpoint.
+        """
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """
+        Register a callable returning a stats dict under the given name.
+        """
+        self._collectors[name] = collector
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Call every registered collector.
+        """
+        return {name: collector() for name, collector in self._collectors.items()}
+
+
+metrics = MetricsRegistry()
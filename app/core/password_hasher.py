@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.metrics import Histogram, metrics
+from app.core.security import calibrate_bcrypt_rounds, get_password_hash, verify_password
+
+
+class PasswordHasher:
+    def __init__(self, max_workers: int, queue_size: int, retry_after: int):
+        """
+        Dedicated, bounded executor for bcrypt hashing and verification.
+
+        Keeps password work off the shared AnyIO threadpool and rejects new
+        work with a 503 once all workers are busy and the queue is full.
+
+        **Parameters**
+
+        * `max_workers`: Number of threads hashing concurrently
+        * `queue_size`: Number of jobs allowed to wait for a free worker
+        * `retry_after`: Seconds advertised in the Retry-After header on rejection
+        """
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency = Histogram()
+        self.queue_wait = Histogram()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Schedule a hashing job, or raise a 503 if the executor is saturated.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ServiceUnavailableException(
+                detail="Too many password checks in progress, please retry",
+                retry_after=self.retry_after,
+            )
+        with self._lock:
+            self.queued += 1
+        try:
+            return self._executor.submit(self._run, fn, args, time.perf_counter())
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+
+    def _run(self, fn: Callable[..., Any], args: tuple, submitted_at: float) -> Any:
+        started_at = time.perf_counter()
+        self.queue_wait.observe(started_at - submitted_at)
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            self.latency.observe(time.perf_counter() - started_at)
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.submit(get_password_hash, password))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a password without blocking the event loop.
+        """
+        return await asyncio.wrap_future(
+            self.submit(verify_password, plain_password, hashed_password)
+        )
+
+    def hash_sync(self, password: str) -> str:
+        """
+        Hash a password on the executor and wait for the result.
+        """
+        return self.submit(get_password_hash, password).result()
+
+    def verify_sync(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a password on the executor and wait for the result.
+        """
+        return self.submit(verify_password, plain_password, hashed_password).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth, throughput and latency metrics.
+        """
+        with self._lock:
+            counters = {
+                "max_workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+        counters["hash_latency_seconds"] = self.latency.snapshot()
+        counters["queue_wait_seconds"] = self.queue_wait.snapshot()
+        return counters
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+metrics.register("password_hasher", password_hasher.stats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick a bcrypt cost for this host")
+    parser.add_argument("--target-ms", type=float, default=settings.PASSWORD_HASH_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    args = parser.parse_args()
+    rounds = calibrate_bcrypt_rounds(
+        args.target_ms, min_rounds=args.min_rounds, max_rounds=args.max_rounds
+    )
+    print(f"BCRYPT_ROUNDS={rounds}")
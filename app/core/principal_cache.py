@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Immutable snapshot of the authenticated user used for authorization.
+    """
+    id: str
+    role: str
+    is_active: bool
+    token_version: int = 0
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float, max_size: int):
+        """
+        Process-local TTL + LRU cache of principals keyed by user ID.
+
+        **Parameters**
+
+        * `ttl_seconds`: How long an entry stays valid after it was stored
+        * `max_size`: Maximum number of entries before the least recently used is evicted
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Principal]:
+        """
+        Get cached principal, or None if it is missing or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def put(self, user_obj: Any, key: Optional[str] = None) -> Principal:
+        """
+        Store a snapshot of the given user and return it.
+
+        Entries are keyed by the user ID unless another `key` is given.
+        """
+        principal = Principal(
+            id=str(user_obj.id),
+            role=user_obj.role,
+            is_active=bool(user_obj.is_active),
+            token_version=user_obj.token_version or 0,
+        )
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return principal
+        key = principal.id if key is None else key
+        with self._lock:
+            self._entries[key] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return principal
+
+    def invalidate(self, key: Any) -> None:
+        """
+        Drop the cached principal for a user after it was changed or removed.
+        """
+        with self._lock:
+            if self._entries.pop(str(key), None) is not None:
+                self.invalidations += 1
+
+    def invalidate_principal(self, principal_id: Any) -> None:
+        """
+        Drop every entry that resolves to the given user, whatever its key.
+        """
+        principal_id = str(principal_id)
+        with self._lock:
+            keys = [
+                key for key, (principal, _) in self._entries.items()
+                if principal.id == principal_id
+            ]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self) -> None:
+        """
+        Drop all cached principals.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+# API key principals, keyed by the key's HMAC digest
+api_key_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+metrics.register("principal_cache", principal_cache.stats)
+metrics.register("api_key_cache", api_key_cache.stats)
@@ -0,0 +1,210 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.exceptions import TooManyRequestsException
+from app.core.metrics import metrics
+from app.models.rate_limit_bucket import RateLimitBucket
+
+
+# Longest Retry-After advertised, also when a bucket never refills
+MAX_RETRY_AFTER_SECONDS = 3600
+
+
+class TokenBucketBackend(ABC):
+    """
+    Storage for token buckets. Subclass to share buckets between workers.
+    """
+
+    @abstractmethod
+    def consume(
+            self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens from the bucket if it has enough.
+
+        Returns:
+            Whether the tokens were taken, and seconds until they would be
+        """
+
+
+def _refill(
+        tokens: float, updated_at: float, now: float, capacity: float, refill_per_second: float
+) -> float:
+    return min(capacity, tokens + max(now - updated_at, 0.0) * refill_per_second)
+
+
+def _retry_after(tokens: float, cost: float, refill_per_second: float) -> float:
+    if refill_per_second <= 0:
+        return float("inf")
+    return max(cost - tokens, 0.0) / refill_per_second
+
+
+class InMemoryTokenBucketBackend(TokenBucketBackend):
+    def __init__(self, max_keys: int = 100000):
+        """
+        Process-local buckets; limits apply per worker.
+
+        **Parameters**
+
+        * `max_keys`: Maximum number of tracked keys, least recently used are dropped
+        """
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(
+            self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, now, capacity, refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else _retry_after(tokens, cost, refill_per_second)
+
+
+class DatabaseTokenBucketBackend(TokenBucketBackend):
+    def __init__(self, engine: Engine):
+        """
+        Buckets stored in the rate_limit_bucket table, shared by all workers.
+
+        **Parameters**
+
+        * `engine`: Engine used for the short locking transaction per attempt
+        """
+        self.engine = engine
+
+    def consume(
+            self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        table = RateLimitBucket.__table__
+        now = time.time()
+        with self.engine.begin() as conn:
+            conn.execute(
+                insert(table)
+                .values(key=key, tokens=capacity, updated_at=now)
+                .on_conflict_do_nothing(index_elements=[table.c.key])
+            )
+            tokens, updated_at = conn.execute(
+                table.select()
+                .with_only_columns(table.c.tokens, table.c.updated_at)
+                .where(table.c.key == key)
+                .with_for_update()
+            ).one()
+            tokens = _refill(tokens, updated_at, now, capacity, refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                table.update()
+                .where(table.c.key == key)
+                .values(tokens=tokens, updated_at=now)
+            )
+        return allowed, 0.0 if allowed else _retry_after(tokens, cost, refill_per_second)
+
+
+class LoginThrottle:
+    def __init__(
+            self,
+            backend: TokenBucketBackend,
+            email_burst: int,
+            email_per_minute: float,
+            ip_burst: int,
+            ip_per_minute: float,
+    ):
+        """
+        Token-bucket limits on login attempts per email and per client IP.
+
+        **Parameters**
+
+        * `backend`: Where the buckets are stored
+        * `email_burst`: Attempts allowed at once for a single email
+        * `email_per_minute`: Sustained attempts per minute for a single email
+        * `ip_burst`: Attempts allowed at once from a single IP
+        * `ip_per_minute`: Sustained attempts per minute from a single IP
+        """
+        self.backend = backend
+        self.email_burst = email_burst
+        self.email_per_minute = email_per_minute
+        self.ip_burst = ip_burst
+        self.ip_per_minute = ip_per_minute
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.throttled_email = 0
+        self.throttled_ip = 0
+
+    def check(self, *, email: str, ip: Optional[str]) -> None:
+        """
+        Count a login attempt, raising a 429 if either limit is exceeded.
+
+        Must be called before the password is verified, so throttled attempts
+        never reach bcrypt.
+        """
+        if ip:
+            allowed, retry_after = self.backend.consume(
+                f"login:ip:{ip}", self.ip_burst, self.ip_per_minute / 60.0
+            )
+            if not allowed:
+                self._reject("ip", retry_after)
+        allowed, retry_after = self.backend.consume(
+            f"login:email:{email.strip().lower()}", self.email_burst, self.email_per_minute / 60.0
+        )
+        if not allowed:
+            self._reject("email", retry_after)
+        with self._lock:
+            self.allowed += 1
+
+    def _reject(self, kind: str, retry_after: float) -> None:
+        with self._lock:
+            if kind == "ip":
+                self.throttled_ip += 1
+            else:
+                self.throttled_email += 1
+        raise TooManyRequestsException(
+            detail="Too many login attempts, please retry later",
+            retry_after=max(math.ceil(min(retry_after, MAX_RETRY_AFTER_SECONDS)), 1),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get login throttling counters.
+        """
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "allowed": self.allowed,
+                "throttled_email": self.throttled_email,
+                "throttled_ip": self.throttled_ip,
+            }
+
+
+def _create_backend() -> TokenBucketBackend:
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "database":
+        from app.db.session import engine
+
+        return DatabaseTokenBucketBackend(engine)
+    return InMemoryTokenBucketBackend()
+
+
+login_throttle = LoginThrottle(
+    backend=_create_backend(),
+    email_burst=settings.LOGIN_RATE_LIMIT_EMAIL_BURST,
+    email_per_minute=settings.LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE,
+    ip_burst=settings.LOGIN_RATE_LIMIT_IP_BURST,
+    ip_per_minute=settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE,
+)
+metrics.register("login_throttle", login_throttle.stats)
@@ -0,0 +1,192 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.crud.revoked_token import revoked_token
+from app.db.session import SessionLocal
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Fixed-size Bloom filter over strings.
+
+        **Parameters**
+
+        * `capacity`: Expected number of items
+        * `error_rate`: Target false positive rate at that capacity
+        """
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    def __init__(
+            self,
+            capacity: int,
+            error_rate: float,
+            refresh_interval: float,
+            refresh_overlap: timedelta = timedelta(minutes=1),
+            session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        """
+        Per-worker view of the revoked token table.
+
+        A Bloom filter answers the common "not revoked" case without touching
+        the exact set; positives are confirmed against the set of revoked JTIs
+        and their expiry. The view is refreshed incrementally from the database
+        and expired entries are pruned.
+
+        **Parameters**
+
+        * `capacity`: Expected number of live revocations, sizes the Bloom filter
+        * `error_rate`: Bloom filter false positive rate at capacity
+        * `refresh_interval`: Minimum seconds between refreshes from the database
+        * `refresh_overlap`: How far back each incremental refresh re-reads, to
+          catch revocations committed after a later one was already seen
+        * `session_factory`: Opens the session periodic refreshes run on, apart
+          from any request's session since pruning commits
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.refresh_overlap = refresh_overlap
+        self.session_factory = session_factory
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked: Dict[str, datetime] = {}
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.bloom_positives = 0
+        self.rejected = 0
+        self.refreshes = 0
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Check whether a token ID has been revoked.
+        """
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.bloom_positives += 1
+        expires_at = self._revoked.get(jti)
+        if expires_at is None or expires_at <= datetime.now(timezone.utc):
+            return False
+        self.rejected += 1
+        return True
+
+    def _add(self, jti: str, expires_at: datetime) -> None:
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        self._revoked[jti] = expires_at
+        self._bloom.add(jti)
+
+    def revoke(
+            self, db: Session, *, jti: str, expires_at: datetime, user_id: Optional[str] = None
+    ) -> None:
+        """
+        Persist a revocation and apply it to this worker immediately.
+        """
+        revoked_token.create(db, jti=jti, expires_at=expires_at, user_id=user_id)
+        with self._lock:
+            self._add(jti, expires_at)
+
+    def refresh_due(self) -> bool:
+        """
+        Check whether the refresh interval has elapsed, without touching the database.
+        """
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= self.refresh_interval
+        )
+
+    def maybe_refresh(self) -> None:
+        """
+        Refresh from the database if the refresh interval has elapsed.
+        """
+        if not self.refresh_due():
+            return
+        self._refreshed_at = time.monotonic()
+        with self.session_factory() as db:
+            self.refresh(db)
+
+    def refresh(self, db: Session) -> None:
+        """
+        Load revocations recorded since the last refresh and prune expired ones.
+        """
+        now = datetime.now(timezone.utc)
+        since = None if self._watermark is None else self._watermark - self.refresh_overlap
+        rows = revoked_token.get_revoked_since(db, since=since, now=now)
+        with self._lock:
+            for row in rows:
+                self._add(row.jti, row.expires_at)
+                revoked_at = row.revoked_at
+                if revoked_at is not None:
+                    if revoked_at.tzinfo is None:
+                        revoked_at = revoked_at.replace(tzinfo=timezone.utc)
+                    if self._watermark is None or revoked_at > self._watermark:
+                        self._watermark = revoked_at
+            if self._watermark is None:
+                self._watermark = now
+            pruned = self._prune(now)
+            self.refreshes += 1
+        if pruned:
+            revoked_token.remove_expired(db, now=now)
+
+    def _prune(self, now: datetime) -> int:
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+        for jti in expired:
+            del self._revoked[jti]
+        if expired or len(self._revoked) > self._bloom.capacity:
+            # Bloom filters cannot delete; rebuild from the live entries instead
+            bloom = BloomFilter(max(self.capacity, len(self._revoked) * 2), self.error_rate)
+            for jti in self._revoked:
+                bloom.add(jti)
+            self._bloom = bloom
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get revocation check counters.
+        """
+        return {
+            "revoked": len(self._revoked),
+            "checks": self.checks,
+            "bloom_positives": self.bloom_positives,
+            "rejected": self.rejected,
+            "refreshes": self.refreshes,
+        }
+
+
+revocation_store = RevocationStore(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    refresh_interval=settings.REVOCATION_REFRESH_SECONDS,
+)
+metrics.register("token_revocation", revocation_store.stats)
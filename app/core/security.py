@@ -1,21 +1,90 @@
+import hashlib
+import hmac
+import secrets
+import statistics
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
-from jose import jwt
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
 
 from app.core.config import settings
+from app.core.keyring import keyring
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
+def set_bcrypt_rounds(rounds: int) -> None:
+    """
+    Set the bcrypt work factor for new hashes.
+
+    Existing hashes with a different work factor are reported by
+    `password_needs_rehash` so they can be upgraded on the next login.
+
+    Args:
+        rounds: bcrypt log2 cost
+    """
+    pwd_context.update(
+        bcrypt__rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds
+    )
+
+
+def calibrate_bcrypt_rounds(
+        target_ms: float, min_rounds: int = 10, max_rounds: int = 16, samples: int = 3
+) -> int:
+    """
+    Benchmark bcrypt on this host and pick the highest cost within budget.
+
+    Args:
+        target_ms: Latency budget for a single hash in milliseconds
+        min_rounds: Lowest cost to consider, returned even if over budget
+        max_rounds: Highest cost to consider
+        samples: Hashes timed per candidate cost
+
+    Returns:
+        bcrypt log2 cost
+    """
+    rounds = min_rounds
+    for candidate in range(min_rounds, max_rounds + 1):
+        hasher = bcrypt.using(rounds=candidate)
+        timings = []
+        for _ in range(samples):
+            started_at = time.perf_counter()
+            hasher.hash("calibration-password")
+            timings.append((time.perf_counter() - started_at) * 1000)
+        elapsed_ms = statistics.median(timings)
+        if elapsed_ms > target_ms:
+            break
+        rounds = candidate
+        # Each extra round doubles the cost, no need to time one that cannot fit
+        if elapsed_ms * 2 > target_ms:
+            break
+    return rounds
+
+
+if settings.BCRYPT_ROUNDS:
+    set_bcrypt_rounds(settings.BCRYPT_ROUNDS)
+
+
+def create_access_token(
+        subject: str,
+        expires_delta: Optional[timedelta] = None,
+        *,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        token_version: Optional[int] = None,
+) -> str:
     """
     Create JWT access token.
 
     Args:
         subject: Subject of the token, usually user ID
         expires_delta: Token expiration time
+        role: User role to embed as a signed claim
+        is_active: User activity flag to embed as a signed claim
+        token_version: User token version the claims were issued for
 
     Returns:
         Encoded JWT token
@@ -27,16 +96,19 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
 
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
-    return encoded_jwt
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex}
+    if role is not None:
+        to_encode["role"] = role
+    if is_active is not None:
+        to_encode["is_active"] = is_active
+    if token_version is not None:
+        to_encode["ver"] = token_version
+    return keyring.encode(to_encode)
 
 
 def verify_token(token: str) -> Dict[str, Any]:
     """
-    Verify JWT token.
+    Verify JWT token against the shared key ring.
 
     Args:
         token: JWT token
@@ -44,11 +116,7 @@ def verify_token(token: str) -> Dict[str, Any]:
     Returns:
         Payload from token
     """
-    return jwt.decode(
-        token,
-        settings.SECRET_KEY,
-        algorithms=[settings.ALGORITHM]
-    )
+    return keyring.decode(token)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -65,6 +133,19 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a hash uses a different work factor than configured.
+
+    Args:
+        hashed_password: Hashed password
+
+    Returns:
+        True if the password should be hashed again
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """
     Get password hash.
@@ -75,4 +156,56 @@ def get_password_hash(password: str) -> str:
     Returns:
         Hashed password
     """
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+def generate_api_key() -> Tuple[str, str]:
+    """
+    Generate a new API key.
+
+    Returns:
+        Public prefix used to identify the key, and the full plaintext key
+    """
+    prefix = secrets.token_hex(4)
+    return prefix, f"lms_{prefix}_{secrets.token_urlsafe(32)}"
+
+
+def hash_api_key(api_key: str) -> str:
+    """
+    Hash an API key with HMAC-SHA256.
+
+    API keys are long random strings, so a fast keyed hash is enough and
+    verification costs microseconds instead of a bcrypt round.
+
+    Args:
+        api_key: Plaintext API key
+
+    Returns:
+        Hex digest of the keyed hash
+    """
+    return hmac.new(
+        settings.API_KEY_PEPPER.encode(), api_key.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def generate_refresh_token() -> str:
+    """
+    Generate a new opaque refresh token.
+    """
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(refresh_token: str) -> str:
+    """
+    Hash a refresh token with SHA-256.
+
+    Refresh tokens carry 256 bits of randomness, so an unkeyed fast hash is
+    enough to keep stolen database rows from being usable.
+
+    Args:
+        refresh_token: Plaintext refresh token
+
+    Returns:
+        Hex digest of the hash
+    """
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
@@ -0,0 +1,133 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.principal_cache import api_key_cache
+from app.core.security import generate_api_key, hash_api_key
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.pagination import fetch_page, paginate
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
+from app.models.api_key import ApiKey
+from app.models.user import User
+from app.schemas.api_key import ApiKeyCreate, ApiKeyUpdate
+
+ROLE_RANK = {"student": 0, "teacher": 1, "admin": 2}
+
+
+def effective_role(key_role: str, owner_role: str) -> str:
+    """
+    Role an API key acts with: its own role, capped at its owner's current role.
+    """
+    return min(key_role, owner_role, key=lambda role: ROLE_RANK.get(role, 0))
+
+
+def _valid_key_statement(hashed_key: str) -> Any:
+    # Active, unexpired key of an active owner, with the owner's role
+    return (
+        select(ApiKey, User.role)
+        .join(User, ApiKey.user_id == User.id)
+        .where(
+            ApiKey.hashed_key == hashed_key,
+            ApiKey.is_active == True,
+            User.is_active == True,
+            or_(ApiKey.expires_at == None, ApiKey.expires_at > datetime.now(timezone.utc)),
+        )
+        .limit(1)
+    )
+
+
+def _with_effective_role(row: Any) -> Optional[Tuple[ApiKey, str]]:
+    if row is None:
+        return None
+    key_obj, owner_role = row
+    return key_obj, effective_role(key_obj.role, owner_role)
+
+
+class CRUDApiKey(CRUDBase[ApiKey, ApiKeyCreate, ApiKeyUpdate]):
+    def create(self, db: Session, *, obj_in: ApiKeyCreate) -> Tuple[ApiKey, str]:
+        """
+        Create new API key.
+
+        Returns the stored key and the plaintext key, which is not kept.
+        """
+        prefix, plaintext = generate_api_key()
+        db_obj = ApiKey(
+            id=new_id(),
+            name=obj_in.name,
+            prefix=prefix,
+            hashed_key=hash_api_key(plaintext),
+            user_id=obj_in.user_id,
+            role=obj_in.role,
+            is_active=True,
+            expires_at=obj_in.expires_at,
+        )
+        db.add(db_obj)
+        commit_or_flush(db)
+        return db_obj, plaintext
+
+    def get_multi_by_user(
+            self,
+            db: Session,
+            *,
+            user_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
+    ) -> List[ApiKey]:
+        """
+        Get API keys by user.
+        """
+        query = (
+            db.query(ApiKey)
+            .filter(ApiKey.user_id == user_id)
+        )
+        return fetch_page(
+            paginate(query, ApiKey, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
+        )
+
+    def get_valid_by_hash(self, db: Session, *, hashed_key: str) -> Optional[Tuple[ApiKey, str]]:
+        """
+        Get an active, unexpired key whose owner is active.
+
+        Returns:
+            The key and the role it acts with, see `effective_role`
+        """
+        return _with_effective_role(db.execute(_valid_key_statement(hashed_key)).first())
+
+    def update(
+            self, db: Session, *, db_obj: ApiKey, obj_in: Union[ApiKeyUpdate, Dict[str, Any]]
+    ) -> ApiKey:
+        """
+        Update API key.
+        """
+        db_obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        api_key_cache.invalidate(db_obj.hashed_key)
+        return db_obj
+
+    def remove(self, db: Session, *, id: Any) -> ApiKey:
+        """
+        Remove API key.
+        """
+        obj = super().remove(db, id=id)
+        api_key_cache.invalidate(obj.hashed_key)
+        return obj
+
+
+class AsyncCRUDApiKey(AsyncCRUDBase[ApiKey, ApiKeyCreate, ApiKeyUpdate]):
+    async def get_valid_by_hash(
+            self, db: AsyncSession, *, hashed_key: str
+    ) -> Optional[Tuple[ApiKey, str]]:
+        """
+        Get an active, unexpired key whose owner is active, and the role it acts with.
+        """
+        return _with_effective_role((await db.execute(_valid_key_statement(hashed_key))).first())
+
+
+api_key = CRUDApiKey(ApiKey)
+async_api_key = AsyncCRUDApiKey(ApiKey)
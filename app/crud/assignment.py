@@ -1,9 +1,11 @@
-import uuid
 from typing import Any, Dict, List, Optional, Union
 
 from sqlalchemy.orm import Session
 
 from app.crud.base import CRUDBase
+from app.crud.pagination import fetch_page, paginate
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 from app.models.assignment import Assignment
 from app.schemas.assignment import AssignmentCreate, AssignmentUpdate
 
@@ -13,7 +15,7 @@ class CRUDAssignment(CRUDBase[Assignment, AssignmentCreate, AssignmentUpdate]):
         """
         Create new assignment.
         """
-        assignment_id = str(uuid.uuid4())
+        assignment_id = new_id()
         db_obj = Assignment(
             id=assignment_id,
             title=obj_in.title,
@@ -24,57 +26,83 @@ class CRUDAssignment(CRUDBase[Assignment, AssignmentCreate, AssignmentUpdate]):
             is_published=obj_in.is_published,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def get_multi_by_lesson(
-            self, db: Session, *, lesson_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            lesson_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[Assignment]:
         """
         Get assignments by lesson.
         """
-        return (
+        query = (
             db.query(Assignment)
             .filter(Assignment.lesson_id == lesson_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return fetch_page(
+            paginate(query, Assignment, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
         )
 
     def get_multi_by_course(
-            self, db: Session, *, course_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            course_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[Assignment]:
         """
         Get assignments by course.
         """
         from app.models.lesson import Lesson
 
-        return (
+        query = (
             db.query(Assignment)
             .join(Lesson, Assignment.lesson_id == Lesson.id)
             .filter(Lesson.course_id == course_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return fetch_page(
+            paginate(query, Assignment, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
         )
 
     def get_published_assignments(
-            self, db: Session, *, lesson_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            lesson_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
     ) -> List[Assignment]:
         """
         Get published assignments for a lesson.
         """
-        return (
+        query = (
             db.query(Assignment)
             .filter(Assignment.lesson_id == lesson_id, Assignment.is_published == True)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return paginate(query, Assignment, skip=skip, limit=limit, cursor=cursor).all()
 
     def get_assignments_due_soon(
-            self, db: Session, *, user_id: str, days: int = 7, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            user_id: str,
+            days: int = 7,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
     ) -> List[Assignment]:
         """
         Get assignments due within specified number of days.
@@ -93,7 +121,7 @@ class CRUDAssignment(CRUDBase[Assignment, AssignmentCreate, AssignmentUpdate]):
         # This assumes there's a many-to-many relationship between users and enrolled_courses
         course_ids = [course.id for course in user.enrolled_courses]
 
-        return (
+        query = (
             db.query(Assignment)
             .join(Lesson, Assignment.lesson_id == Lesson.id)
             .filter(
@@ -101,11 +129,11 @@ class CRUDAssignment(CRUDBase[Assignment, AssignmentCreate, AssignmentUpdate]):
                 Assignment.due_date <= due_date_cutoff,
                 Assignment.is_published == True
             )
-            .order_by(Assignment.due_date)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return fetch_page(paginate(
+            query, Assignment, skip=skip, limit=limit, cursor=cursor,
+            order_by=[Assignment.due_date],
+        ))
 
 
 assignment = CRUDAssignment(Assignment)
\ No newline at end of file
@@ -1,15 +1,133 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Boolean, bindparam, delete, inspect, insert, literal_column, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import MANYTOMANY, ONETOMANY, Session, selectinload
 
+from app.core.exceptions import ConflictException
+from app.crud.pagination import fetch_page, fetch_page_async, paginate
 from app.db.base_class import Base
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# INSERT constructs supporting ON CONFLICT, by dialect name
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+# Keys per lookup when counting rows an upsert will update
+UPSERT_PAGE_SIZE = 1000
+
+
+def _dependent_relationships(model: Type[Base]) -> List[Any]:
+    # Collections the ORM updates when the parent is deleted: it deletes or
+    # orphans their rows and clears many-to-many association rows, which a
+    # Core DELETE would leave behind to fail on the foreign keys
+    return [
+        relationship for relationship in inspect(model).relationships
+        if relationship.direction in (ONETOMANY, MANYTOMANY)
+    ]
+
+
+def _column_values(
+        model: Type[Base], obj_in: Union[BaseModel, Dict[str, Any]]
+) -> Dict[str, Any]:
+    # Fields the caller set that map to a column of the model, from the mapper
+    # rather than by encoding a loaded row
+    if isinstance(obj_in, dict):
+        update_data = obj_in
+    else:
+        update_data = obj_in.dict(exclude_unset=True)
+    columns = inspect(model).column_attrs.keys()
+    return {key: value for key, value in update_data.items() if key in columns}
+
+
+def _versioned_update(
+        model: Type[Base], id: Any, values: Dict[str, Any], version: Optional[int]
+) -> Any:
+    # UPDATE statements bypass the mapper, so bump `version_id_col` by hand
+    # and only match the row at the version the caller read
+    statement = update(model).where(model.id == id).values(**values)
+    version_column = inspect(model).version_id_col
+    if version_column is None:
+        return statement
+    if version is not None:
+        statement = statement.where(version_column == version)
+    return statement.values({version_column: version_column + 1})
+
+
+def _check_version(model: Type[Base], obj: Optional[Any], version: Optional[int]) -> Optional[Any]:
+    # An empty update writes nothing, but a stale `version` must still conflict
+    version_column = inspect(model).version_id_col
+    if obj is None or version is None or version_column is None:
+        return obj
+    if getattr(obj, version_column.key) != version:
+        raise ConflictException(detail="The resource was modified by another request")
+    return obj
+
+
+def _upsert_statement(
+        db: Session,
+        model: Type[Base],
+        keys: Sequence[str],
+        index_elements: Sequence[str],
+        update_fields: Optional[Sequence[str]],
+        core: bool = False,
+        on_update: Optional[Callable[[Any, Dict[str, Any]], Dict[str, Any]]] = None,
+) -> Any:
+    # INSERT ... ON CONFLICT (index_elements) DO UPDATE for rows with `keys`,
+    # against the table with `core` so executemany bypasses ORM bulk inserts.
+    # `on_update` gets the statement and SET clause and returns extra columns
+    # to set on conflicting rows.
+    dialect = db.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    statement = _UPSERT_INSERTS[dialect](model.__table__ if core else model)
+    fields = keys if update_fields is None else update_fields
+    set_ = {
+        field: statement.excluded[field] for field in fields
+        if field in keys and field not in index_elements and field != "id"
+    }
+    if not set_:
+        return statement.on_conflict_do_nothing(index_elements=index_elements)
+    if on_update is not None:
+        set_.update(on_update(statement, set_))
+    version_column = inspect(model).version_id_col
+    if version_column is not None:
+        set_[version_column.key] = version_column + 1
+    return statement.on_conflict_do_update(index_elements=index_elements, set_=set_)
+
+
+def match_keys(
+        db: Session,
+        model: Type[Base],
+        index_elements: Sequence[str],
+        rows: Sequence[Dict[str, Any]],
+        *selected: Any,
+) -> List[Any]:
+    """
+    Get the stored rows whose conflict target matches one of `rows`.
+
+    Looks keys up a page at a time, selecting the target columns unless
+    other columns are given.
+    """
+    columns = [getattr(model, element) for element in index_elements]
+    target = columns[0] if len(columns) == 1 else tuple_(*columns)
+    matches = []
+    for start in range(0, len(rows), UPSERT_PAGE_SIZE):
+        page = rows[start:start + UPSERT_PAGE_SIZE]
+        keys = [
+            row[index_elements[0]] if len(columns) == 1
+            else tuple(row[element] for element in index_elements)
+            for row in page
+        ]
+        matches.extend(db.execute(select(*(selected or columns)).where(target.in_(keys))).all())
+    return matches
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
@@ -22,20 +140,32 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: A Pydantic model (schema) class
         """
         self.model = model
+        # Built once: each call only binds the ID and hits the compiled cache
+        self._get_statement = select(model).where(model.id == bindparam("id"))
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         """
         Get object by ID.
         """
-        return db.query(self.model).filter(self.model.id == id).first()
+        return db.execute(self._get_statement, {"id": id}).scalars().first()
 
     def get_multi(
-            self, db: Session, *, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[ModelType]:
         """
         Get multiple objects.
+
+        Pass `cursor` ("" for the first page) to page by primary key instead of
+        by offset; see `app.crud.pagination`.
         """
-        return db.query(self.model).offset(skip).limit(limit).all()
+        query = paginate(db.query(self.model), self.model, skip=skip, limit=limit, cursor=cursor)
+        return fetch_page(query, with_total=with_total, estimate_from=self.model.__table__)
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """
@@ -44,8 +174,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def update(
@@ -58,24 +187,379 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         Update object.
         """
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in _column_values(self.model, obj_in).items():
+            setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
+    def update_by_id(
+            self,
+            db: Session,
+            *,
+            id: Any,
+            obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+            version: Optional[int] = None,
+    ) -> Optional[ModelType]:
+        """
+        Update object by ID without loading it first.
+
+        Only the fields set on `obj_in` are written, with a single
+        UPDATE ... RETURNING. Returns None if no object has the ID.
+
+        On versioned models the version is incremented, and when `version` is
+        given the row is only written if it still has that version.
+
+        Raises:
+            ConflictException: If the object was changed since `version`
+        """
+        values = _column_values(self.model, obj_in)
+        values.pop("id", None)
+        if not values:
+            return _check_version(self.model, self.get(db, id=id), version)
+        obj = db.scalars(
+            _versioned_update(self.model, id, values, version).returning(self.model)
+        ).one_or_none()
+        if obj is None and version is not None and self.get(db, id=id) is not None:
+            raise ConflictException(detail="The resource was modified by another request")
+        commit_or_flush(db)
+        return obj
+
     def remove(self, db: Session, *, id: Any) -> ModelType:
         """
         Remove object.
+
+        Models without one-to-many or many-to-many relationships are removed
+        with a single DELETE ... RETURNING instead of a lookup followed by a
+        DELETE.
+        """
+        if _dependent_relationships(self.model):
+            obj = db.query(self.model).get(id)
+            db.delete(obj)
+        else:
+            obj = db.scalars(
+                delete(self.model).where(self.model.id == id).returning(self.model)
+            ).one_or_none()
+        commit_or_flush(db)
+        return obj
+
+    def get_by_ids(self, db: Session, *, ids: Sequence[Any]) -> List[ModelType]:
         """
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
-        return obj
\ No newline at end of file
+        Get objects by ID, in the order of `ids`. Missing IDs are skipped.
+        """
+        if not ids:
+            return []
+        objs = {obj.id: obj for obj in db.query(self.model).filter(self.model.id.in_(ids))}
+        return [objs[id] for id in ids if id in objs]
+
+    def create_multi(self, db: Session, *, objs_in: Sequence[CreateSchemaType]) -> List[ModelType]:
+        """
+        Create many objects with batched multi-row INSERTs in one transaction.
+
+        Fields without a matching column are ignored and objects without an
+        `id` get a new UUID, as the model-specific `create` methods do.
+        """
+        if not objs_in:
+            return []
+        columns = self.model.__table__.columns.keys()
+        rows = []
+        for obj_in in objs_in:
+            row = {key: value for key, value in obj_in.dict().items() if key in columns}
+            row.setdefault("id", new_id())
+            rows.append(row)
+        db_objs = list(db.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True), rows
+        ))
+        commit_or_flush(db)
+        return db_objs
+
+    def update_multi(
+            self,
+            db: Session,
+            *,
+            objs_in: Dict[Any, Union[UpdateSchemaType, Dict[str, Any]]]
+    ) -> List[ModelType]:
+        """
+        Update many objects, keyed by ID, with executemany UPDATEs in one transaction.
+
+        Objects are not loaded first; IDs that do not exist are skipped.
+
+        On versioned models an object that sets `version` is only written if its
+        row still has that version. The rows are locked and checked before any
+        is written, so a stale object fails the whole batch.
+
+        Raises:
+            ConflictException: If an object was changed since its `version`
+        """
+        table = self.model.__table__
+        version_column = inspect(self.model).version_id_col
+        # One executemany per set of changed columns, with or without a version
+        batches: Dict[Tuple[Tuple[str, ...], bool], List[Dict[str, Any]]] = {}
+        versions: Dict[Any, int] = {}
+        for id, obj_in in objs_in.items():
+            values = _column_values(self.model, obj_in)
+            values.pop("id", None)
+            version = None
+            if version_column is not None:
+                version = values.pop(version_column.key, None)
+            if not values:
+                continue
+            row = {"_id": id, **values}
+            if version is not None:
+                versions[id] = row["_version"] = version
+            batches.setdefault((tuple(sorted(values)), version is not None), []).append(row)
+        if versions:
+            current = dict(db.execute(
+                select(table.c.id, version_column)
+                .where(table.c.id.in_(list(versions)))
+                .with_for_update()
+            ).all())
+            stale = [
+                id for id, version in versions.items() if id in current and current[id] != version
+            ]
+            if stale:
+                raise ConflictException(
+                    detail=f"Modified by another request: {', '.join(str(id) for id in stale)}"
+                )
+        statement = update(table).where(table.c.id == bindparam("_id"))
+        if version_column is not None:
+            statement = statement.values({version_column: version_column + 1})
+        for (_, versioned), rows in batches.items():
+            if versioned:
+                db.execute(statement.where(version_column == bindparam("_version")), rows)
+            else:
+                db.execute(statement, rows)
+        if batches:
+            commit_or_flush(db)
+        # Reload objects this session already holds, the UPDATEs bypassed them
+        objs = db.scalars(
+            select(self.model)
+            .where(self.model.id.in_(list(objs_in)))
+            .execution_options(populate_existing=True)
+        )
+        by_id = {obj.id: obj for obj in objs}
+        return [by_id[id] for id in objs_in if id in by_id]
+
+    def upsert(
+            self,
+            db: Session,
+            *,
+            obj_in: Union[CreateSchemaType, Dict[str, Any]],
+            index_elements: Sequence[str] = ("id",),
+            update_fields: Optional[Sequence[str]] = None,
+    ) -> ModelType:
+        """
+        Insert an object, or update the row it conflicts with, in one statement.
+
+        **Parameters**
+
+        * `index_elements`: Columns of the primary key or unique index that
+          identify an existing row
+        * `update_fields`: Fields written over an existing row, all fields set
+          on `obj_in` by default
+        """
+        row = _column_values(self.model, obj_in)
+        row.setdefault("id", new_id())
+        statement = _upsert_statement(
+            db, self.model, list(row), index_elements, update_fields,
+            on_update=self._upsert_on_update,
+        )
+        obj = db.scalars(
+            statement.values(**row)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        ).one_or_none()
+        if obj is None:
+            # Nothing to update, the existing row was left as it is
+            obj = db.scalars(select(self.model).filter_by(
+                **{element: row[element] for element in index_elements}
+            )).one()
+        commit_or_flush(db)
+        return obj
+
+    def upsert_multi(
+            self,
+            db: Session,
+            *,
+            objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+            index_elements: Sequence[str] = ("id",),
+            update_fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Insert or update many objects with batched INSERT ... ON CONFLICT DO
+        UPDATE statements in one transaction. See `upsert` for the parameters.
+
+        Returns:
+            Number of rows inserted and number of existing rows updated
+        """
+        # One statement per set of fields, as in update_multi. A row can only be
+        # written once per statement, so the last object for a key wins.
+        batches: Dict[Tuple[str, ...], Dict[Tuple[Any, ...], Dict[str, Any]]] = {}
+        for obj_in in objs_in:
+            row = _column_values(self.model, obj_in)
+            row.setdefault("id", new_id())
+            key = tuple(row[element] for element in index_elements)
+            batches.setdefault(tuple(sorted(row)), {})[key] = row
+
+        inserted = updated = 0
+        postgres = db.get_bind().dialect.name == "postgresql"
+        for keys, rows_by_key in batches.items():
+            rows = list(rows_by_key.values())
+            statement = _upsert_statement(
+                db, self.model, keys, index_elements, update_fields, core=True,
+                on_update=self._upsert_on_update,
+            )
+            if postgres:
+                # xmax is only set on row versions written by an UPDATE
+                created = db.scalars(
+                    statement.returning(literal_column("xmax = 0", Boolean)), rows
+                ).all()
+                inserted += sum(created)
+                updated += len(created) - sum(created)
+            else:
+                existing = len(match_keys(db, self.model, index_elements, rows))
+                written = db.execute(statement, rows).rowcount
+                inserted += len(rows) - existing
+                updated += written - (len(rows) - existing)
+        commit_or_flush(db)
+        return inserted, updated
+
+    def _upsert_on_update(self, statement: Any, set_: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extra columns to set when an upsert updates an existing row.
+
+        Override to keep derived columns in step with the written fields.
+        """
+        return {}
+
+    def remove_multi(self, db: Session, *, ids: Sequence[Any]) -> List[ModelType]:
+        """
+        Remove many objects in one transaction.
+
+        Models without one-to-many or many-to-many relationships use one
+        DELETE ... RETURNING. Otherwise deletes go through the session so
+        cascades and association rows are handled, with the related rows
+        loaded up front rather than once per object.
+        """
+        dependents = _dependent_relationships(self.model)
+        if not dependents:
+            objs = list(db.scalars(
+                delete(self.model).where(self.model.id.in_(ids)).returning(self.model)
+            ))
+            commit_or_flush(db)
+            return objs
+
+        objs = (
+            db.query(self.model)
+            .options(*[selectinload(relationship.class_attribute) for relationship in dependents])
+            .filter(self.model.id.in_(ids))
+            .all()
+        )
+        for obj in objs:
+            db.delete(obj)
+        commit_or_flush(db)
+        return objs
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        CRUD object with default methods to Create, Read, Update, Delete (CRUD)
+        on an AsyncSession.
+
+        **Parameters**
+
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """
+        Get object by ID.
+        """
+        return await db.get(self.model, id)
+
+    async def get_multi(
+            self,
+            db: AsyncSession,
+            *,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
+    ) -> List[ModelType]:
+        """
+        Get multiple objects.
+        """
+        return await fetch_page_async(
+            db,
+            paginate(select(self.model), self.model, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total, estimate_from=self.model.__table__,
+        )
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """
+        Create new object.
+        """
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        await db.commit()
+        return db_obj
+
+    async def update(
+            self,
+            db: AsyncSession,
+            *,
+            db_obj: ModelType,
+            obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """
+        Update object.
+        """
+        for field, value in _column_values(self.model, obj_in).items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.commit()
+        return db_obj
+
+    async def update_by_id(
+            self,
+            db: AsyncSession,
+            *,
+            id: Any,
+            obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+            version: Optional[int] = None,
+    ) -> Optional[ModelType]:
+        """
+        Update object by ID without loading it first.
+
+        Raises:
+            ConflictException: If the object was changed since `version`
+        """
+        values = _column_values(self.model, obj_in)
+        values.pop("id", None)
+        if not values:
+            return _check_version(self.model, await self.get(db, id=id), version)
+        obj = (await db.scalars(
+            _versioned_update(self.model, id, values, version).returning(self.model)
+        )).one_or_none()
+        if obj is None and version is not None and await self.get(db, id=id) is not None:
+            raise ConflictException(detail="The resource was modified by another request")
+        await db.commit()
+        return obj
+
+    async def remove(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
+        """
+        Remove object.
+        """
+        if _dependent_relationships(self.model):
+            obj = await db.get(self.model, id)
+            if obj is not None:
+                await db.delete(obj)
+        else:
+            obj = (await db.scalars(
+                delete(self.model).where(self.model.id == id).returning(self.model)
+            )).one_or_none()
+        await db.commit()
+        return obj
@@ -1,12 +1,13 @@
-import uuid
 from sqlalchemy.orm import Session
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 from app.models.chatbot import ChatMessage
 from app.schemas.chatbot import ChatMessageCreate
 
 
 class CRUDChatbot:
     def create_message(self, db: Session, *, obj_in: ChatMessageCreate) -> ChatMessage:
-        chat_id = str(uuid.uuid4())
+        chat_id = new_id()
         db_obj = ChatMessage(
             id=chat_id,
             user_id=obj_in.user_id,
@@ -14,8 +15,7 @@ class CRUDChatbot:
             response=obj_in.response,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
 
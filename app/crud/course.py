@@ -1,23 +1,31 @@
-import uuid
 from typing import Any, Dict, List, Optional, Union
 
+from sqlalchemy import bindparam, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.pagination import fetch_page_async, paginate
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
+from app.models.associations import user_course_association
 from app.models.course import Course
 from app.models.user import User
 from app.schemas.course import CourseCreate, CourseUpdate
 
+# Runs on most student requests, so it is built once and served from the compiled cache
+IS_ENROLLED_STATEMENT = select(exists().where(
+    user_course_association.c.user_id == bindparam("user_id"),
+    user_course_association.c.course_id == bindparam("course_id"),
+))
 
-class CRUDCourse(CRUDBase[Course, CourseCreate, CourseUpdate]):
-    def get(self, db: Session, id: str) -> Optional[Course]:
-        return db.query(Course).filter(Course.id == id).first()
 
+class CRUDCourse(CRUDBase[Course, CourseCreate, CourseUpdate]):
     def create(self, db: Session, *, obj_in: CourseCreate) -> Course:
         """
         Create new course.
         """
-        course_id = str(uuid.uuid4())
+        course_id = new_id()
         db_obj = Course(
             id=course_id,
             title=obj_in.title,
@@ -29,62 +37,62 @@ class CRUDCourse(CRUDBase[Course, CourseCreate, CourseUpdate]):
             price=obj_in.price,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def get_multi_by_instructor(
-            self, db: Session, *, instructor_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            instructor_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
     ) -> List[Course]:
         """
         Get courses by instructor.
         """
-        return (
+        query = (
             db.query(Course)
             .filter(Course.instructor_id == instructor_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return paginate(query, Course, skip=skip, limit=limit, cursor=cursor).all()
 
     def get_multi_by_category(
-            self, db: Session, *, category: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            category: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
     ) -> List[Course]:
         """
         Get courses by category.
         """
-        return (
+        query = (
             db.query(Course)
             .filter(Course.category == category)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return paginate(query, Course, skip=skip, limit=limit, cursor=cursor).all()
 
     def get_published_courses(
-            self, db: Session, *, skip: int = 0, limit: int = 100
+            self, db: Session, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[Course]:
         """
         Get all published courses.
         """
-        return (
+        query = (
             db.query(Course)
             .filter(Course.is_published == True)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return paginate(query, Course, skip=skip, limit=limit, cursor=cursor).all()
 
     def is_user_enrolled(self, db: Session, *, user_id: str, course_id: str) -> bool:
         """
         Check if user is enrolled in the course.
         """
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return False
-
-        # This assumes there's a many-to-many relationship between users and courses
-        return any(course.id == course_id for course in user.enrolled_courses)
+        return bool(db.scalar(IS_ENROLLED_STATEMENT, {"user_id": user_id, "course_id": course_id}))
 
     def enroll_user(self, db: Session, *, user_id: str, course_id: str) -> bool:
         """
@@ -99,7 +107,7 @@ class CRUDCourse(CRUDBase[Course, CourseCreate, CourseUpdate]):
         # This assumes there's a many-to-many relationship between users and courses
         if course not in user.enrolled_courses:
             user.enrolled_courses.append(course)
-            db.commit()
+            commit_or_flush(db)
 
         return True
 
@@ -116,9 +124,44 @@ class CRUDCourse(CRUDBase[Course, CourseCreate, CourseUpdate]):
         # This assumes there's a many-to-many relationship between users and courses
         if course in user.enrolled_courses:
             user.enrolled_courses.remove(course)
-            db.commit()
+            commit_or_flush(db)
 
         return True
 
 
-course = CRUDCourse(Course)
\ No newline at end of file
+class AsyncCRUDCourse(AsyncCRUDBase[Course, CourseCreate, CourseUpdate]):
+    async def get_multi_by_user(
+            self,
+            db: AsyncSession,
+            *,
+            user_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
+    ) -> List[Course]:
+        """
+        Get courses the user is enrolled in.
+        """
+        query = (
+            select(Course)
+            .join(user_course_association, user_course_association.c.course_id == Course.id)
+            .where(user_course_association.c.user_id == user_id)
+        )
+        return await fetch_page_async(
+            db,
+            paginate(query, Course, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
+        )
+
+    async def is_user_enrolled(self, db: AsyncSession, *, user_id: str, course_id: str) -> bool:
+        """
+        Check if user is enrolled in the course.
+        """
+        return bool(await db.scalar(
+            IS_ENROLLED_STATEMENT, {"user_id": user_id, "course_id": course_id}
+        ))
+
+
+course = CRUDCourse(Course)
+async_course = AsyncCRUDCourse(Course)
\ No newline at end of file
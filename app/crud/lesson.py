@@ -1,9 +1,14 @@
-import uuid
 from typing import Any, Dict, List, Optional, Union
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.pagination import fetch_page, fetch_page_async, paginate
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
+from app.models.associations import user_course_association
 from app.models.lesson import Lesson
 from app.schemas.lesson import LessonCreate, LessonUpdate
 
@@ -13,7 +18,7 @@ class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
         """
         Create new lesson.
         """
-        lesson_id = str(uuid.uuid4())
+        lesson_id = new_id()
         db_obj = Lesson(
             id=lesson_id,
             title=obj_in.title,
@@ -25,39 +30,48 @@ class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
             video_url=obj_in.video_url,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def get_multi_by_course(
-            self, db: Session, *, course_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            course_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
     ) -> List[Lesson]:
         """
         Get lessons by course.
         """
-        return (
+        query = (
             db.query(Lesson)
             .filter(Lesson.course_id == course_id)
-            .order_by(Lesson.order)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return fetch_page(paginate(
+            query, Lesson, skip=skip, limit=limit, cursor=cursor, order_by=[Lesson.order]
+        ))
 
     def get_published_lessons(
-            self, db: Session, *, course_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            course_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
     ) -> List[Lesson]:
         """
         Get published lessons for a course.
         """
-        return (
+        query = (
             db.query(Lesson)
             .filter(Lesson.course_id == course_id, Lesson.is_published == True)
-            .order_by(Lesson.order)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return fetch_page(paginate(
+            query, Lesson, skip=skip, limit=limit, cursor=cursor, order_by=[Lesson.order]
+        ))
 
     def update_lesson_order(
             self, db: Session, *, lesson_id: str, new_order: int
@@ -71,8 +85,7 @@ class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
 
         lesson.order = new_order
         db.add(lesson)
-        db.commit()
-        db.refresh(lesson)
+        commit_or_flush(db)
         return lesson
 
     def mark_lesson_completed(
@@ -92,7 +105,7 @@ class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
         # This assumes there's a many-to-many relationship between users and completed_lessons
         if lesson not in user.completed_lessons:
             user.completed_lessons.append(lesson)
-            db.commit()
+            commit_or_flush(db)
 
         return True
 
@@ -113,4 +126,62 @@ class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
         return any(lesson.id == lesson_id for lesson in user.completed_lessons)
 
 
-lesson = CRUDLesson(Lesson)
\ No newline at end of file
+class AsyncCRUDLesson(AsyncCRUDBase[Lesson, LessonCreate, LessonUpdate]):
+    async def get_multi_by_course(
+            self,
+            db: AsyncSession,
+            *,
+            course_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
+    ) -> List[Lesson]:
+        """
+        Get lessons by course.
+        """
+        query = (
+            select(Lesson)
+            .where(Lesson.course_id == course_id)
+        )
+        return await fetch_page_async(
+            db,
+            paginate(
+                query, Lesson, skip=skip, limit=limit, cursor=cursor, order_by=[Lesson.order]
+            ),
+            with_total=with_total,
+        )
+
+    async def get_multi_by_user(
+            self,
+            db: AsyncSession,
+            *,
+            user_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
+    ) -> List[Lesson]:
+        """
+        Get lessons of the courses the user is enrolled in.
+        """
+        query = (
+            select(Lesson)
+            .join(
+                user_course_association,
+                user_course_association.c.course_id == Lesson.course_id,
+            )
+            .where(user_course_association.c.user_id == user_id)
+        )
+        return await fetch_page_async(
+            db,
+            paginate(
+                query, Lesson, skip=skip, limit=limit, cursor=cursor,
+                order_by=[Lesson.course_id, Lesson.order],
+            ),
+            with_total=with_total,
+        )
+
+
+lesson = CRUDLesson(Lesson)
+async_lesson = AsyncCRUDLesson(Lesson)
\ No newline at end of file
@@ -0,0 +1,308 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Type
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Table, and_, false, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException
+from app.core.keyring import keyring
+
+CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_HEADER = "X-Total-Count"
+TOTAL_ESTIMATED_HEADER = "X-Total-Count-Estimated"
+# Execution option naming the attributes a paginated query is sorted by
+KEYSET_OPTION = "keyset"
+# Execution option holding a cursor page's query without the cursor condition
+UNFILTERED_OPTION = "keyset_unfiltered"
+DEFAULT_KEYSET = ("id",)
+
+# Live row estimate kept by the planner, refreshed by VACUUM and ANALYZE
+_ESTIMATE_ROWS = text(
+    "SELECT reltuples::bigint FROM pg_class "
+    "WHERE relname = :table AND relkind = 'r' AND pg_table_is_visible(oid)"
+)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Build an opaque cursor pointing after the row with the given sort key.
+
+    Cursors are signed with the active JWT key, so any worker can verify them
+    and they survive restarts and key rotations like tokens do.
+
+    Args:
+        values: Sort key of the last row of the current page, ending with its ID
+
+    Returns:
+        Signed cursor
+    """
+    payload = json.dumps(jsonable_encoder(list(values)), separators=(",", ":"))
+    payload = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    return f"{payload}.{keyring.sign(payload)}"
+
+
+def decode_cursor(cursor: str) -> Optional[List[Any]]:
+    """
+    Verify a cursor and get the sort key it points after.
+
+    An empty cursor starts from the first row.
+
+    Raises:
+        BadRequestException: If the cursor is malformed or was not issued here
+    """
+    if not cursor:
+        return None
+    payload, _, signed = cursor.partition(".")
+    if not keyring.verify(payload, signed):
+        raise BadRequestException(detail="Invalid cursor")
+    try:
+        values = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        raise BadRequestException(detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise BadRequestException(detail="Invalid cursor")
+    return values
+
+
+def _sort_keys(order_by: Sequence[Any], model: Type[Any]) -> List[Tuple[Any, bool]]:
+    keys = []
+    for clause in order_by:
+        if isinstance(clause, UnaryExpression):
+            keys.append((clause.element, clause.modifier is operators.desc_op))
+        else:
+            keys.append((clause, False))
+    # The ID breaks ties, so every row has a distinct position
+    keys.append((model.id, False))
+    return keys
+
+
+def _order_clauses(keys: Sequence[Tuple[Any, bool]]) -> List[Any]:
+    clauses = []
+    for column, descending in keys:
+        clause = column.desc() if descending else column.asc()
+        # NULLs go last in both modes, whatever the database's default is
+        clauses.append(clause.nulls_last() if column.nullable else clause)
+    return clauses
+
+
+def _cursor_value(column: Any, value: Any) -> Any:
+    # Dates were encoded as ISO strings by jsonable_encoder
+    if isinstance(value, str):
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        if python_type in (datetime, date):
+            try:
+                return python_type.fromisoformat(value)
+            except ValueError:
+                raise BadRequestException(detail="Invalid cursor")
+    return value
+
+
+def _after(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]) -> Any:
+    """
+    Condition matching the rows sorted after the given sort key.
+
+    Expands the row comparison `(a, b, id) > (:a, :b, :id)` so that it also
+    holds for descending keys and NULLs sorted last.
+    """
+    clauses = []
+    equal: List[Any] = []
+    for (column, descending), value in zip(keys, values):
+        if value is not None:
+            beyond = column < value if descending else column > value
+            if column.nullable:
+                beyond = or_(beyond, column.is_(None))
+            clauses.append(and_(*equal, beyond))
+            equal.append(column == value)
+        else:
+            # Nothing sorts after NULL except within the NULLs themselves
+            equal.append(column.is_(None))
+    return or_(*clauses) if clauses else false()
+
+
+def paginate(
+        query: Any,
+        model: Type[Any],
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: Sequence[Any] = (),
+) -> Any:
+    """
+    Apply offset or keyset pagination to a `Query` or `select()`.
+
+    Rows are sorted by `order_by` (columns, optionally `.desc()`), then by
+    primary key. With a cursor the page starts right after the sort key the
+    cursor carries, so the database seeks through the index instead of
+    counting off skipped rows. Without one, the legacy skip/limit applies.
+
+    Run the query with `fetch_page`/`fetch_page_async` when passing `order_by`,
+    so `next_cursor` knows which values to put in the next cursor.
+    """
+    keys = _sort_keys(order_by, model)
+    if order_by:
+        query = query.order_by(None).order_by(*_order_clauses(keys)).execution_options(
+            **{KEYSET_OPTION: tuple(column.key for column, _ in keys)}
+        )
+    if cursor is None:
+        return query.offset(skip).limit(limit)
+
+    after = decode_cursor(cursor)
+    query = query.order_by(None)
+    if after is not None:
+        if len(after) != len(keys):
+            raise BadRequestException(detail="Invalid cursor")
+        values = [_cursor_value(column, value) for (column, _), value in zip(keys, after)]
+        query = query.execution_options(**{UNFILTERED_OPTION: query}).filter(_after(keys, values))
+    return query.order_by(*_order_clauses(keys)).limit(limit)
+
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """
+    Get the cursor of the page after `items`, or None on the last page.
+    """
+    if not items or len(items) < limit:
+        return None
+    keyset = getattr(items, "keyset", DEFAULT_KEYSET)
+    return encode_cursor([getattr(items[-1], key) for key in keyset])
+
+
+def set_next_cursor(
+        response: Response, items: Sequence[Any], limit: int, cursor: Optional[str]
+) -> None:
+    """
+    Advertise the next page of a cursor-paginated list in a response header.
+    """
+    if cursor is None:
+        return
+    following = next_cursor(items, limit)
+    if following is not None:
+        response.headers[CURSOR_HEADER] = following
+
+
+class Page(list):
+    """
+    Rows of one page, along with the number of rows across all pages when
+    counted, and the attributes their cursors are built from.
+    """
+    def __init__(
+            self,
+            items: Iterable[Any],
+            total: Optional[int] = None,
+            estimated: bool = False,
+            keyset: Sequence[str] = DEFAULT_KEYSET,
+    ):
+        super().__init__(items)
+        self.total = total
+        self.estimated = estimated
+        self.keyset = tuple(keyset)
+
+
+def _keyset(query: Any) -> Sequence[str]:
+    return query.get_execution_options().get(KEYSET_OPTION, DEFAULT_KEYSET)
+
+
+def _unpaged(query: Any) -> Any:
+    return query.limit(None).offset(None).order_by(None)
+
+
+def _unfiltered(query: Any) -> Optional[Any]:
+    return query.get_execution_options().get(UNFILTERED_OPTION)
+
+
+def _count_statement(statement: Any) -> Any:
+    return select(func.count()).select_from(_unpaged(statement).subquery())
+
+
+def _use_estimate(estimate: Optional[int]) -> bool:
+    # reltuples is -1 on tables that were never analyzed
+    return estimate is not None and estimate >= settings.COUNT_ESTIMATE_MIN_ROWS
+
+
+def fetch_page(
+        query: Any, *, with_total: bool = False, estimate_from: Optional[Table] = None
+) -> List[Any]:
+    """
+    Run a paginated `Query`, optionally counting the rows of all pages.
+
+    The total comes from a `count(*) OVER ()` column on the page query itself,
+    so it takes no extra round trip. Pass `estimate_from` on unfiltered queries:
+    once that table is larger than COUNT_ESTIMATE_MIN_ROWS the planner's row
+    estimate is used instead, and the page is marked as estimated. On cursor
+    pages the window would only count the rows past the cursor, so the total
+    is counted separately without the cursor condition.
+    """
+    keyset = _keyset(query)
+    if not with_total:
+        return Page(query.all(), keyset=keyset)
+
+    db: Session = query.session
+    if estimate_from is not None and db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(_ESTIMATE_ROWS, {"table": estimate_from.name}).scalar()
+        if _use_estimate(estimate):
+            return Page(query.all(), total=estimate, estimated=True, keyset=keyset)
+
+    unfiltered = _unfiltered(query)
+    if unfiltered is not None:
+        return Page(query.all(), total=_unpaged(unfiltered).count(), keyset=keyset)
+
+    rows = query.add_columns(func.count().over()).all()
+    if not rows:
+        # Past the last page, nothing carried the window count
+        return Page([], total=_unpaged(query).count(), keyset=keyset)
+    return Page([row[0] for row in rows], total=rows[0][-1], keyset=keyset)
+
+
+async def fetch_page_async(
+        db: AsyncSession,
+        statement: Any,
+        *,
+        with_total: bool = False,
+        estimate_from: Optional[Table] = None,
+) -> List[Any]:
+    """
+    Run a paginated `select()` on an AsyncSession. See `fetch_page`.
+    """
+    keyset = _keyset(statement)
+    if not with_total:
+        return Page(await db.scalars(statement), keyset=keyset)
+
+    if estimate_from is not None and db.get_bind().dialect.name == "postgresql":
+        estimate = (await db.execute(_ESTIMATE_ROWS, {"table": estimate_from.name})).scalar()
+        if _use_estimate(estimate):
+            return Page(
+                await db.scalars(statement), total=estimate, estimated=True, keyset=keyset
+            )
+
+    unfiltered = _unfiltered(statement)
+    if unfiltered is not None:
+        total = await db.scalar(_count_statement(unfiltered))
+        return Page(await db.scalars(statement), total=total, keyset=keyset)
+
+    rows = (await db.execute(statement.add_columns(func.count().over()))).all()
+    if not rows:
+        total = await db.scalar(_count_statement(statement))
+        return Page([], total=total, keyset=keyset)
+    return Page([row[0] for row in rows], total=rows[0][-1], keyset=keyset)
+
+
+def set_total(response: Response, items: Sequence[Any]) -> None:
+    """
+    Advertise the total of a page fetched with `with_total` in response headers.
+    """
+    if not isinstance(items, Page) or items.total is None:
+        return
+    response.headers[TOTAL_HEADER] = str(items.total)
+    if items.estimated:
+        response.headers[TOTAL_ESTIMATED_HEADER] = "true"
@@ -1,9 +1,11 @@
-import uuid
 from typing import Any, Dict, List, Optional, Union
 
 from sqlalchemy.orm import Session
 
 from app.crud.base import CRUDBase
+from app.crud.pagination import fetch_page, paginate
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 from app.models.recommendation import Recommendation
 from app.schemas.recommendation import RecommendationCreate, RecommendationUpdate
 from app.services.recommendation_service import RecommendationService
@@ -15,7 +17,7 @@ class CRUDRecommendation(CRUDBase[Recommendation, RecommendationCreate, Recommen
         """
         Create new recommendation.
         """
-        recommendation_id = str(uuid.uuid4())
+        recommendation_id = new_id()
         db_obj = Recommendation(
             id=recommendation_id,
             user_id=obj_in.user_id,
@@ -25,24 +27,29 @@ class CRUDRecommendation(CRUDBase[Recommendation, RecommendationCreate, Recommen
             score=obj_in.score,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def get_multi_by_user(
-            self, db: Session, *, user_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            user_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
     ) -> List[Recommendation]:
         """
         Get recommendations by user.
         """
-        return (
+        query = (
             db.query(Recommendation)
             .filter(Recommendation.user_id == user_id)
-            .order_by(Recommendation.score.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return fetch_page(paginate(
+            query, Recommendation, skip=skip, limit=limit, cursor=cursor,
+            order_by=[Recommendation.score.desc()],
+        ))
 
     def get_recommended_courses(
             self, db: Session, *, user_id: str, limit: int = 5
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import generate_refresh_token, hash_refresh_token
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class CRUDRefreshToken:
+    def create(
+            self, db: Session, *, user_obj: User, family_id: Optional[str] = None, commit: bool = True
+    ) -> Tuple[RefreshToken, str]:
+        """
+        Issue a refresh token, starting a new family unless one is given.
+
+        Returns:
+            The stored token and its plaintext, which is not kept
+        """
+        plaintext = generate_refresh_token()
+        db_obj = RefreshToken(
+            id=new_id(),
+            family_id=family_id or new_id(),
+            user_id=user_obj.id,
+            hashed_token=hash_refresh_token(plaintext),
+            token_version=user_obj.token_version or 0,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        db.add(db_obj)
+        if commit:
+            commit_or_flush(db)
+        return db_obj, plaintext
+
+    def get_by_token(self, db: Session, *, token: str, for_update: bool = False) -> Optional[RefreshToken]:
+        """
+        Get a refresh token by its plaintext.
+        """
+        query = db.query(RefreshToken).filter(
+            RefreshToken.hashed_token == hash_refresh_token(token)
+        )
+        if for_update:
+            query = query.with_for_update()
+        return query.first()
+
+    def rotate(self, db: Session, *, token: str) -> Optional[Tuple[User, str]]:
+        """
+        Exchange a refresh token for a new one in the same family.
+
+        Presenting a token that was already rotated means it was copied, so
+        the whole family is revoked.
+
+        Returns:
+            The user and the new plaintext token, or None if the token is not
+            valid
+        """
+        db_obj = self.get_by_token(db, token=token, for_update=True)
+        if db_obj is None:
+            return None
+        now = datetime.now(timezone.utc)
+        if db_obj.used_at is not None:
+            self.revoke_family(db, family_id=db_obj.family_id)
+            return None
+        if db_obj.revoked_at is not None or _aware(db_obj.expires_at) <= now:
+            db.rollback()
+            return None
+
+        user_obj = db.get(User, db_obj.user_id)
+        if (
+                user_obj is None
+                or not user_obj.is_active
+                or db_obj.token_version != (user_obj.token_version or 0)
+        ):
+            self.revoke_family(db, family_id=db_obj.family_id)
+            return None
+
+        db_obj.used_at = now
+        _, plaintext = self.create(db, user_obj=user_obj, family_id=db_obj.family_id, commit=False)
+        commit_or_flush(db)
+        return user_obj, plaintext
+
+    def revoke_family(self, db: Session, *, family_id: str) -> int:
+        """
+        Revoke every token of a family.
+
+        Always commits, the revocation must outlive a request that fails.
+        """
+        revoked = (
+            db.query(RefreshToken)
+            .filter(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .update({RefreshToken.revoked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+        )
+        db.commit()
+        return revoked
+
+
+refresh_token = CRUDRefreshToken()
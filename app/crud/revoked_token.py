@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.revoked_token import RevokedToken
+
+
+class CRUDRevokedToken:
+    def create(
+            self, db: Session, *, jti: str, expires_at: datetime, user_id: Optional[str] = None
+    ) -> RevokedToken:
+        """
+        Persist a revoked token ID.
+        """
+        db_obj = db.get(RevokedToken, jti)
+        if db_obj is None:
+            db_obj = RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at)
+            db.add(db_obj)
+            db.commit()
+        return db_obj
+
+    def get_revoked_since(
+            self, db: Session, *, since: Optional[datetime], now: datetime
+    ) -> List[RevokedToken]:
+        """
+        Get unexpired revocations recorded at or after `since`.
+        """
+        query = db.query(RevokedToken).filter(RevokedToken.expires_at > now)
+        if since is not None:
+            query = query.filter(RevokedToken.revoked_at >= since)
+        return query.all()
+
+    def remove_expired(self, db: Session, *, now: datetime) -> int:
+        """
+        Delete revocations whose tokens have expired anyway.
+        """
+        deleted = (
+            db.query(RevokedToken)
+            .filter(RevokedToken.expires_at <= now)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return deleted
+
+
+revoked_token = CRUDRevokedToken()
@@ -1,9 +1,11 @@
-import uuid
 from typing import Any, Dict, List, Optional, Union
 
 from sqlalchemy.orm import Session
 
 from app.crud.base import CRUDBase
+from app.crud.pagination import fetch_page, paginate
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 from app.models.submission import Submission
 from app.schemas.submission import SubmissionCreate, SubmissionUpdate
 
@@ -13,7 +15,7 @@ class CRUDSubmission(CRUDBase[Submission, SubmissionCreate, SubmissionUpdate]):
         """
         Create new submission.
         """
-        submission_id = str(uuid.uuid4())
+        submission_id = new_id()
         db_obj = Submission(
             id=submission_id,
             assignment_id=obj_in.assignment_id,
@@ -25,36 +27,51 @@ class CRUDSubmission(CRUDBase[Submission, SubmissionCreate, SubmissionUpdate]):
             status="submitted",
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def get_multi_by_assignment(
-            self, db: Session, *, assignment_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            assignment_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[Submission]:
         """
         Get submissions by assignment.
         """
-        return (
+        query = (
             db.query(Submission)
             .filter(Submission.assignment_id == assignment_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return fetch_page(
+            paginate(query, Submission, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
         )
 
     def get_multi_by_user(
-            self, db: Session, *, user_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            user_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[Submission]:
         """
         Get submissions by user.
         """
-        return (
+        query = (
             db.query(Submission)
             .filter(Submission.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return fetch_page(
+            paginate(query, Submission, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
         )
 
     def get_by_user_and_assignment(
@@ -87,23 +104,20 @@ class CRUDSubmission(CRUDBase[Submission, SubmissionCreate, SubmissionUpdate]):
         submission.status = "graded"
 
         db.add(submission)
-        db.commit()
-        db.refresh(submission)
+        commit_or_flush(db)
         return submission
 
     def get_ungraded_submissions(
-            self, db: Session, *, skip: int = 0, limit: int = 100
+            self, db: Session, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[Submission]:
         """
         Get all ungraded submissions.
         """
-        return (
+        query = (
             db.query(Submission)
             .filter(Submission.status == "submitted")
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return paginate(query, Submission, skip=skip, limit=limit, cursor=cursor).all()
 
 
 submission = CRUDSubmission(Submission)
\ No newline at end of file
@@ -3,7 +3,10 @@ from typing import Any, Dict, List, Optional, Union
 
 from sqlalchemy.orm import Session
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.pagination import fetch_page, paginate
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 from app.models.test import Test
 from app.schemas.test import TestCreate, TestUpdate
 
@@ -13,7 +16,7 @@ class CRUDTest(CRUDBase[Test, TestCreate, TestUpdate]):
         """
         Create new test.
         """
-        test_id = str(uuid.uuid4())
+        test_id = new_id()
         db_obj = Test(
             id=test_id,
             title=obj_in.title,
@@ -25,43 +28,65 @@ class CRUDTest(CRUDBase[Test, TestCreate, TestUpdate]):
             is_published=obj_in.is_published,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def get_multi_by_lesson(
-            self, db: Session, *, lesson_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            lesson_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[Test]:
         """
         Get tests by lesson.
         """
-        return (
+        query = (
             db.query(Test)
             .filter(Test.lesson_id == lesson_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return fetch_page(
+            paginate(query, Test, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
         )
 
     def get_multi_by_course(
-            self, db: Session, *, course_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            course_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[Test]:
         """
         Get tests by course.
         """
         from app.models.lesson import Lesson
 
-        return (
+        query = (
             db.query(Test)
             .join(Lesson, Test.lesson_id == Lesson.id)
             .filter(Lesson.course_id == course_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return fetch_page(
+            paginate(query, Test, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
         )
 
     def get_multi_by_user(
-            self, db: Session, *, user_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            user_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[Test]:
         """
         Get tests that user has access to.
@@ -77,16 +102,17 @@ class CRUDTest(CRUDBase[Test, TestCreate, TestUpdate]):
         # This assumes there's a many-to-many relationship between users and enrolled_courses
         course_ids = [course.id for course in user.enrolled_courses]
 
-        return (
+        query = (
             db.query(Test)
             .join(Lesson, Test.lesson_id == Lesson.id)
             .filter(
                 Lesson.course_id.in_(course_ids),
                 Test.is_published == True
             )
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return fetch_page(
+            paginate(query, Test, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
         )
 
     def add_question(
@@ -116,7 +142,7 @@ class CRUDTest(CRUDBase[Test, TestCreate, TestUpdate]):
         )
 
         db.add(question)
-        db.commit()
+        commit_or_flush(db)
 
         # Return test with questions
         return self.get_test_with_questions(db=db, test_id=test_id)
@@ -166,4 +192,5 @@ class CRUDTest(CRUDBase[Test, TestCreate, TestUpdate]):
         return test_dict
 
 
-test = CRUDTest(Test)
\ No newline at end of file
+test = CRUDTest(Test)
+async_test = AsyncCRUDBase(Test)
\ No newline at end of file
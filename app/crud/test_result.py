@@ -1,9 +1,11 @@
-import uuid
 from typing import Any, Dict, List, Optional, Union
 
 from sqlalchemy.orm import Session
 
 from app.crud.base import CRUDBase
+from app.crud.pagination import fetch_page, paginate
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 from app.models.test_result import TestResult
 from app.schemas.test_result import TestResultCreate, TestResultUpdate
 
@@ -13,7 +15,7 @@ class CRUDTestResult(CRUDBase[TestResult, TestResultCreate, TestResultUpdate]):
         """
         Create new test result.
         """
-        result_id = str(uuid.uuid4())
+        result_id = new_id()
         db_obj = TestResult(
             id=result_id,
             test_id=obj_in.test_id,
@@ -26,37 +28,48 @@ class CRUDTestResult(CRUDBase[TestResult, TestResultCreate, TestResultUpdate]):
             attempt_number=obj_in.attempt_number,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def get_multi_by_test(
-            self, db: Session, *, test_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            test_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
     ) -> List[TestResult]:
         """
         Get results by test.
         """
-        return (
+        query = (
             db.query(TestResult)
             .filter(TestResult.test_id == test_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        return fetch_page(
+            paginate(query, TestResult, skip=skip, limit=limit, cursor=cursor),
+            with_total=with_total,
         )
 
     def get_multi_by_user(
-            self, db: Session, *, user_id: str, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            user_id: str,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
     ) -> List[TestResult]:
         """
         Get results by user.
         """
-        return (
+        query = (
             db.query(TestResult)
             .filter(TestResult.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return paginate(query, TestResult, skip=skip, limit=limit, cursor=cursor).all()
 
     def get_by_user_and_test(
             self, db: Session, *, user_id: str, test_id: str
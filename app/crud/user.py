@@ -1,13 +1,28 @@
-import uuid
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
 
+from sqlalchemy import bindparam, case, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.exceptions import ServiceUnavailableException
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import api_key_cache, principal_cache
+from app.core.security import password_needs_rehash
+from app.crud.base import AsyncCRUDBase, CRUDBase, match_keys
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
+# Checked on every authenticated request that misses the principal cache
+TOKEN_VERSION_STATEMENT = select(User.token_version).where(User.id == bindparam("user_id"))
+# Columns behind the role/is_active claims and the password of issued tokens
+TOKEN_CLAIM_FIELDS = ("role", "is_active", "hashed_password")
+# Stored for users upserted without a password; matches no password
+UNUSABLE_PASSWORD = "!"
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
@@ -20,18 +35,17 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """
         Create new user.
         """
-        user_id = str(uuid.uuid4())
+        user_id = new_id()
         db_obj = User(
             id=user_id,
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=password_hasher.hash_sync(obj_in.password),
             name=obj_in.name,
             role=obj_in.role,
             is_active=obj_in.is_active,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db)
         return db_obj
 
     def update(
@@ -45,24 +59,183 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         else:
             update_data = obj_in.dict(exclude_unset=True)
         if update_data.get("password"):
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = password_hasher.hash_sync(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        if self._changes_token_claims(db_obj, update_data):
+            update_data["token_version"] = (db_obj.token_version or 0) + 1
+        db_obj = super().update(db, db_obj=db_obj, obj_in=update_data)
+        self._invalidate_principals(db_obj.id)
+        return db_obj
+
+    def remove(self, db: Session, *, id: Any) -> User:
+        """
+        Remove user.
+        """
+        obj = super().remove(db, id=id)
+        self._invalidate_principals(id)
+        return obj
+
+    def upsert(
+            self,
+            db: Session,
+            *,
+            obj_in: Union[UserCreate, Dict[str, Any]],
+            index_elements: Sequence[str] = ("email",),
+            update_fields: Optional[Sequence[str]] = None,
+    ) -> User:
+        """
+        Insert a user, or update the user it conflicts with, by email by default.
+
+        A plain `password` is hashed. Users inserted without one get an unusable
+        password, and updated users keep theirs. Issued tokens of an updated
+        user are invalidated when its role, activity or password changes.
+        """
+        obj = super().upsert(
+            db, obj_in=self._hash_password(obj_in), index_elements=index_elements,
+            update_fields=update_fields,
+        )
+        self._invalidate_principals(obj.id)
+        return obj
+
+    def upsert_multi(
+            self,
+            db: Session,
+            *,
+            objs_in: Sequence[Union[UserCreate, Dict[str, Any]]],
+            index_elements: Sequence[str] = ("email",),
+            update_fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Insert or update many users. See `upsert`.
+
+        Returns:
+            Number of users inserted and number of existing users updated
+        """
+        rows = [self._hash_password(obj_in) for obj_in in objs_in]
+        counts = super().upsert_multi(
+            db, objs_in=rows, index_elements=index_elements, update_fields=update_fields
+        )
+        for (user_id,) in match_keys(db, User, index_elements, rows, User.id):
+            self._invalidate_principals(user_id)
+        return counts
+
+    def _upsert_on_update(self, statement: Any, set_: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Keep the password of users upserted without one, and bump the token
+        version of users whose token claims the upsert changes.
+        """
+        columns = statement.table.c
+        extra = {}
+        if "hashed_password" in set_:
+            extra["hashed_password"] = case(
+                (set_["hashed_password"] == UNUSABLE_PASSWORD, columns.hashed_password),
+                else_=set_["hashed_password"],
+            )
+        set_ = {**set_, **extra}
+        claims = [field for field in TOKEN_CLAIM_FIELDS if field in set_]
+        if not claims:
+            return extra
+        changed = or_(*[columns[field].is_distinct_from(set_[field]) for field in claims])
+        extra["token_version"] = case(
+            (changed, columns.token_version + 1), else_=columns.token_version
+        )
+        return extra
+
+    @staticmethod
+    def _invalidate_principals(user_id: Any) -> None:
+        # The user's own principal and those of its API keys, which carry its
+        # role and activity too
+        principal_cache.invalidate(user_id)
+        api_key_cache.invalidate_principal(user_id)
+
+    @staticmethod
+    def _hash_password(obj_in: Union[UserCreate, Dict[str, Any]]) -> Dict[str, Any]:
+        row = dict(obj_in) if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        password = row.pop("password", None)
+        if password:
+            row["hashed_password"] = password_hasher.hash_sync(password)
+        else:
+            # hashed_password is NOT NULL, which is checked before ON CONFLICT
+            row.setdefault("hashed_password", UNUSABLE_PASSWORD)
+        return row
+
+    @staticmethod
+    def _changes_token_claims(db_obj: User, update_data: Dict[str, Any]) -> bool:
+        """
+        Check whether an update invalidates the claims of issued tokens.
+        """
+        if "hashed_password" in update_data:
+            return True
+        return any(
+            field in update_data and update_data[field] != getattr(db_obj, field)
+            for field in ("role", "is_active")
+        )
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         """
         Authenticate user.
         """
         user = self.get_by_email(db, email=email)
-        if not user:
+        if not user or user.hashed_password == UNUSABLE_PASSWORD:
+            return None
+        if not password_hasher.verify_sync(password, user.hashed_password):
+            return None
+        if password_needs_rehash(user.hashed_password):
+            try:
+                self._store_rehash(db, user, password_hasher.hash_sync(password))
+            except ServiceUnavailableException:
+                pass
+        return user
+
+    async def authenticate_async(
+        self, db: Session, *, email: str, password: str
+    ) -> Optional[User]:
+        """
+        Authenticate user without holding a threadpool slot during bcrypt.
+        """
+        user = await run_in_threadpool(self.get_by_email, db, email=email)
+        if not user or user.hashed_password == UNUSABLE_PASSWORD:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await password_hasher.verify(password, user.hashed_password):
             return None
+        if password_needs_rehash(user.hashed_password):
+            try:
+                hashed_password = await password_hasher.hash(password)
+            except ServiceUnavailableException:
+                return user
+            await run_in_threadpool(self._store_rehash, db, user, hashed_password)
         return user
 
+    @staticmethod
+    def _store_rehash(db: Session, user: User, hashed_password: str) -> None:
+        """
+        Persist a rehash of the same password with the configured work factor.
+
+        Goes around `update` on purpose: the password is unchanged, so issued
+        tokens stay valid.
+        """
+        user.hashed_password = hashed_password
+        db.add(user)
+        commit_or_flush(db)
+
     def get_user_by_id(self, db: Session, user_id: Union[str, int]) -> Optional[User]:
-        return db.query(User).filter(User.id == user_id).first()
+        return self.get(db, id=user_id)
+
+    def get_token_version(self, db: Session, user_id: Union[str, int]) -> Optional[int]:
+        """
+        Get the current token version of a user without loading the row.
+        """
+        return db.scalar(TOKEN_VERSION_STATEMENT, {"user_id": user_id})
+
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_token_version(self, db: AsyncSession, user_id: Union[str, int]) -> Optional[int]:
+        """
+        Get the current token version of a user without loading the row.
+        """
+        return await db.scalar(TOKEN_VERSION_STATEMENT, {"user_id": user_id})
 
 
-user = CRUDUser(User)
\ No newline at end of file
+user = CRUDUser(User)
+async_user = AsyncCRUDUser(User)
\ No newline at end of file
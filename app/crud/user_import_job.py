@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.user_import_job import UserImportJob
+from app.schemas.user import UserImportResult
+
+
+class CRUDUserImportJob:
+    def create(self, db: Session, *, total: int, created_by: Optional[str] = None) -> UserImportJob:
+        """
+        Record a queued import of `total` rows.
+        """
+        db_obj = UserImportJob(total=total, created_by=created_by, errors=[])
+        db.add(db_obj)
+        db.commit()
+        return db_obj
+
+    def get(self, db: Session, *, id: str) -> Optional[UserImportJob]:
+        return db.get(UserImportJob, id)
+
+    def set_progress(self, db: Session, *, id: str, processed: int) -> None:
+        """
+        Mark a job running and record how many rows it has processed.
+        """
+        db.execute(
+            update(UserImportJob)
+            .where(UserImportJob.id == id)
+            .values(status="running", processed=processed)
+        )
+        db.commit()
+
+    def complete(self, db: Session, *, id: str, result: UserImportResult) -> None:
+        """
+        Store the outcome of a finished import.
+        """
+        db.execute(
+            update(UserImportJob)
+            .where(UserImportJob.id == id)
+            .values(
+                status="completed",
+                processed=result.total,
+                created=result.created,
+                errors=[error.dict() for error in result.errors],
+                finished_at=datetime.now(timezone.utc),
+            )
+        )
+        db.commit()
+
+    def fail(self, db: Session, *, id: str, detail: str) -> None:
+        """
+        Mark a job failed. Batches committed before the failure are kept.
+        """
+        db.execute(
+            update(UserImportJob)
+            .where(UserImportJob.id == id)
+            .values(status="failed", detail=detail, finished_at=datetime.now(timezone.utc))
+        )
+        db.commit()
+
+
+user_import_job = CRUDUserImportJob()
@@ -10,4 +10,9 @@ from app.models.assignment import Assignment
 from app.models.submission import Submission
 from app.models.test import Test
 from app.models.test_result import TestResult
+from app.models.revoked_token import RevokedToken
+from app.models.rate_limit_bucket import RateLimitBucket
+from app.models.api_key import ApiKey
+from app.models.refresh_token import RefreshToken
+from app.models.user_import_job import UserImportJob
 from app.models.chatbot import ChatMessage  # 👈 ОБЯЗАТЕЛЬНО!
@@ -8,6 +8,9 @@ from sqlalchemy.orm import as_declarative
 class Base:
     id: Any
     __name__: str
+    # Fetch server-generated columns with RETURNING during the flush, so
+    # written objects never need a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     @declared_attr
     def __tablename__(cls) -> str:
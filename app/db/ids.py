@@ -0,0 +1,57 @@
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUID (version 7, RFC 9562).
+
+    The first 48 bits are the Unix time in milliseconds and the rest is random,
+    so new keys land at the end of primary key indexes instead of all over them.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    random_bits = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76  # version
+        | (random_bits >> 62 & 0xFFF) << 64  # 12 random bits
+        | 0b10 << 62  # RFC 4122 variant
+        | random_bits & 0x3FFF_FFFF_FFFF_FFFF  # 62 random bits
+    )
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """
+    Generate a primary key value.
+    """
+    return str(uuid7())
+
+
+class UUIDStr(str):
+    """
+    ID received from a client, validated as a UUID and kept in its canonical
+    string form, the form the `Uuid(as_uuid=False)` columns compare against.
+
+    Use it for path, query and body IDs so a malformed ID gets a 422 up front
+    instead of reaching the database.
+    """
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema: dict) -> None:
+        field_schema.update(type="string", format="uuid")
+
+    @classmethod
+    def validate(cls, value) -> "UUIDStr":
+        if isinstance(value, uuid.UUID):
+            return cls(value)
+        if not isinstance(value, str):
+            raise TypeError("string required")
+        try:
+            return cls(uuid.UUID(value))
+        except ValueError:
+            raise ValueError("value is not a valid uuid")
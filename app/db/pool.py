@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Any, Dict, Type
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolStats:
+    def __init__(self):
+        """
+        Counters for a connection pool, updated by `instrumented_pool_class`.
+        """
+        self.pool: Any = None
+        self.wait = Histogram(POOL_WAIT_BUCKETS)
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connect_errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool occupancy and checkout metrics.
+        """
+        pool = self.pool
+        with self._lock:
+            counters = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connect_errors": self.connect_errors,
+            }
+        if isinstance(pool, QueuePool):
+            counters.update(
+                pool_size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+            )
+        counters["wait_seconds"] = self.wait.snapshot()
+        return counters
+
+
+def instrumented_pool_class(base: Type[QueuePool], pool_stats: PoolStats) -> Type[QueuePool]:
+    """
+    Subclass a queue pool so every checkout is timed and failures are counted.
+
+    The class carries the stats object, so pools recreated by `dispose()`
+    keep reporting to it.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        base.__init__(self, *args, **kwargs)
+        pool_stats.pool = self
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            with pool_stats._lock:
+                pool_stats.timeouts += 1
+            raise
+        except Exception:
+            with pool_stats._lock:
+                pool_stats.connect_errors += 1
+            raise
+        finally:
+            pool_stats.wait.observe(time.perf_counter() - started_at)
+        with pool_stats._lock:
+            pool_stats.checkouts += 1
+        return connection
+
+    return type(f"Instrumented{base.__name__}", (base,), {"__init__": __init__, "connect": connect})
+
+
+def engine_options(database_url: str, pool_class: Type[QueuePool], pool_stats: PoolStats) -> Dict[str, Any]:
+    """
+    Pool arguments for `create_engine` / `create_async_engine` from settings.
+
+    SQLite keeps SQLAlchemy's default pool, which does not take queue options.
+    """
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    return {
+        "poolclass": instrumented_pool_class(pool_class, pool_stats),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    }
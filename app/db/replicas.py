@@ -0,0 +1,188 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.core.keyring import keyring
+from app.core.metrics import metrics
+from app.db.pool import PoolStats, engine_options
+from app.db.session import get_async_database_url
+
+logger = logging.getLogger(__name__)
+
+# Where clients send the read-your-writes pin back: browsers keep the cookie,
+# other clients echo the header
+READ_PIN_COOKIE = "lms_read_pin"
+READ_PIN_HEADER = "X-Read-Pin"
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine, pool_stats: PoolStats):
+        """
+        A read replica with its own engine and session factory.
+
+        **Parameters**
+
+        * `name`: Label used in logs and metrics
+        * `engine`: Async engine connected to the replica
+        * `pool_stats`: Stats of the engine's connection pool
+        """
+        self.name = name
+        self.engine = engine
+        self.pool_stats = pool_stats
+        self.session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        self.healthy = True
+        self.checked_at: Optional[float] = None
+        self.reads = 0
+        self.failed_checks = 0
+
+
+class ReplicaRouter:
+    def __init__(
+            self,
+            replicas: List[Replica],
+            pin_seconds: float,
+            health_check_interval: float,
+            health_check_timeout: float,
+    ):
+        """
+        Round-robin choice of a healthy read replica, with read-your-writes.
+
+        A user who just wrote is pinned to the primary for `pin_seconds`, long
+        enough for replicas to replay the write. The pin is a signed token the
+        client sends back (see `pin_token`), so it holds whichever worker or
+        instance serves the next read.
+
+        **Parameters**
+
+        * `replicas`: Replicas to spread reads over
+        * `pin_seconds`: How long a user reads from the primary after a write
+        * `health_check_interval`: Minimum seconds between checks of a replica
+        * `health_check_timeout`: Seconds before a health check counts as failed
+        """
+        self.replicas = replicas
+        self.pin_seconds = pin_seconds
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self._next = itertools.count()
+        self.primary_reads = 0
+        self.pinned_reads = 0
+
+    def pin_token(self, user_id: str) -> Optional[str]:
+        """
+        Get a token sending the user's reads to the primary for the pin window.
+
+        The token holds the wall-clock end of the window, signed with the JWT
+        key ring together with the user ID. None when there are no replicas.
+        """
+        if not self.replicas:
+            return None
+        pinned_until = int((time.time() + self.pin_seconds) * 1000)
+        return f"{pinned_until}.{keyring.sign(f'{user_id}:{pinned_until}')}"
+
+    @staticmethod
+    def is_pinned(user_id: str, token: Optional[str]) -> bool:
+        """
+        Check whether a pin token was issued to the user and has not expired.
+        """
+        if not token:
+            return False
+        pinned_until, _, signed = token.partition(".")
+        if not pinned_until.isdigit() or int(pinned_until) <= time.time() * 1000:
+            return False
+        return keyring.verify(f"{user_id}:{pinned_until}", signed)
+
+    async def choose(
+            self, user_id: Optional[str] = None, pin: Optional[str] = None
+    ) -> Optional[Replica]:
+        """
+        Pick the replica for a read.
+
+        **Parameters**
+
+        * `user_id`: User the read is for
+        * `pin`: Pin token the client sent back after its last write
+
+        Returns:
+            A healthy replica, or None if the read must go to the primary
+        """
+        if not self.replicas:
+            return None
+        if user_id is not None and self.is_pinned(user_id, pin):
+            self.pinned_reads += 1
+            return None
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next) % len(self.replicas)]
+            if await self._is_healthy(replica):
+                replica.reads += 1
+                return replica
+        self.primary_reads += 1
+        return None
+
+    async def _is_healthy(self, replica: Replica) -> bool:
+        now = time.monotonic()
+        if replica.checked_at is not None and now - replica.checked_at < self.health_check_interval:
+            return replica.healthy
+        replica.checked_at = now
+        try:
+            await asyncio.wait_for(self._ping(replica), timeout=self.health_check_timeout)
+        except Exception:
+            if replica.healthy:
+                logger.warning("Read replica %s failed its health check", replica.name, exc_info=True)
+            replica.healthy = False
+            replica.failed_checks += 1
+        else:
+            if not replica.healthy:
+                logger.info("Read replica %s is healthy again", replica.name)
+            replica.healthy = True
+        return replica.healthy
+
+    @staticmethod
+    async def _ping(replica: Replica) -> None:
+        async with replica.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get routing counters and per-replica health.
+        """
+        return {
+            "pinned_reads": self.pinned_reads,
+            "primary_reads": self.primary_reads,
+            "replicas": {
+                replica.name: {
+                    "healthy": replica.healthy,
+                    "reads": replica.reads,
+                    "failed_checks": replica.failed_checks,
+                    "pool": replica.pool_stats.stats(),
+                }
+                for replica in self.replicas
+            },
+        }
+
+
+def _create_replica(index: int, database_url: str) -> Replica:
+    async_url = get_async_database_url(database_url)
+    pool_stats = PoolStats()
+    engine = create_async_engine(
+        async_url, **engine_options(async_url, AsyncAdaptedQueuePool, pool_stats)
+    )
+    return Replica(f"replica-{index}", engine, pool_stats)
+
+
+replica_router = ReplicaRouter(
+    replicas=[
+        _create_replica(index, url)
+        for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ],
+    pin_seconds=settings.REPLICA_PIN_SECONDS,
+    health_check_interval=settings.REPLICA_HEALTH_CHECK_SECONDS,
+    health_check_timeout=settings.REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS,
+)
+metrics.register("db_replicas", replica_router.stats)
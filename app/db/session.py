@@ -1,10 +1,83 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.pool import PoolStats, engine_options
+from app.db.statement_cache import StatementCacheStats, instrument_statement_cache
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+# Session.info flag set on sessions whose transaction is committed by the request
+REQUEST_TRANSACTION = "request_transaction"
+# Session.info key holding the request's Deadline
+REQUEST_DEADLINE = "request_deadline"
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Derive the async driver URL from a sync database URL.
+    """
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()!r}")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+pool_stats = PoolStats()
+engine = create_engine(
+    settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, QueuePool, pool_stats)
+)
+# Writes return the persisted row (see Base.__mapper_args__), so committed
+# objects stay loaded instead of being reloaded on the next attribute access
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+async_database_url = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+async_pool_stats = PoolStats()
+async_engine = create_async_engine(
+    async_database_url,
+    **engine_options(async_database_url, AsyncAdaptedQueuePool, async_pool_stats)
+)
+# Attributes cannot be lazily reloaded outside of an await, so keep them after commit
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+statement_cache_stats = StatementCacheStats()
+instrument_statement_cache(engine, statement_cache_stats)
+async_statement_cache_stats = StatementCacheStats()
+instrument_statement_cache(async_engine.sync_engine, async_statement_cache_stats)
+
+metrics.register("db_pool", pool_stats.stats)
+metrics.register("db_pool_async", async_pool_stats.stats)
+metrics.register("statement_cache", statement_cache_stats.stats)
+metrics.register("statement_cache_async", async_statement_cache_stats.stats)
+
+
+@event.listens_for(Session, "after_begin")
+def apply_statement_timeout(session: Session, transaction, connection) -> None:
+    # SET LOCAL ends with the transaction, so every transaction of the request
+    # gets the budget that is left when it begins
+    deadline = session.info.get(REQUEST_DEADLINE)
+    if deadline is not None and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {deadline.statement_timeout_ms()}")
+
+
+def commit_or_flush(db: Session) -> None:
+    """
+    Commit, or only flush if the session's transaction belongs to the request.
+
+    Request transactions are committed once by the `commit_request_transaction`
+    middleware, or rolled back when the request fails.
+    """
+    if db.info.get(REQUEST_TRANSACTION):
+        db.flush()
+    else:
+        db.commit()
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
     db: Session = SessionLocal()
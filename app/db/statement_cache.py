@@ -0,0 +1,52 @@
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StatementCacheStats:
+    def __init__(self):
+        """
+        Hits and misses of an engine's compiled statement cache, updated by
+        `instrument_statement_cache`.
+        """
+        self.engine: Any = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        dialect = context.dialect
+        with self._lock:
+            if context.cache_hit == dialect.CACHE_HIT:
+                self.hits += 1
+            elif context.cache_hit == dialect.CACHE_MISS:
+                self.misses += 1
+            else:
+                # Driver SQL and statements that opt out of caching
+                self.uncached += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache hit counts and the number of cached compilations.
+        """
+        with self._lock:
+            counters = {"hits": self.hits, "misses": self.misses, "uncached": self.uncached}
+        cached = counters["hits"] + counters["misses"]
+        counters["hit_ratio"] = counters["hits"] / cached if cached else None
+        compiled_cache = getattr(self.engine, "_compiled_cache", None)
+        if compiled_cache is not None:
+            counters["entries"] = len(compiled_cache)
+        return counters
+
+
+def instrument_statement_cache(engine: Engine, cache_stats: StatementCacheStats) -> None:
+    """
+    Count compiled cache hits for every statement the engine executes.
+
+    Pass `AsyncEngine.sync_engine` for an async engine.
+    """
+    cache_stats.engine = engine
+    event.listen(engine, "after_cursor_execute", cache_stats.record)
@@ -1,10 +1,27 @@
+import logging
+import time
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import StatementError
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.api.api_v1.router import api_router
 from app.core.config import settings
+from app.core.deadline import deadline_stats, route_key
+from app.core.metrics import metrics as metrics_registry
 from app.core.exceptions import LMSException
+from app.core.keyring import keyring
+from app.core.security import calibrate_bcrypt_rounds, set_bcrypt_rounds
+from app.api.deps import READ_ONLY_METHODS
+from app.crud.pagination import CURSOR_HEADER, TOTAL_ESTIMATED_HEADER, TOTAL_HEADER
+from app.db.replicas import READ_PIN_COOKIE, READ_PIN_HEADER, replica_router
+
+logger = logging.getLogger(__name__)
+
+QUERY_CANCELED = "57014"
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -19,14 +36,83 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Response headers the browser UI reads from list and detail endpoints
+    expose_headers=[TOTAL_HEADER, TOTAL_ESTIMATED_HEADER, CURSOR_HEADER, "ETag", READ_PIN_HEADER],
 )
 
+@app.middleware("http")
+async def commit_request_transaction(request: Request, call_next):
+    response = await call_next(request)
+    # The body is not sent yet, so a failed commit still turns into an error
+    db = getattr(request.state, "db", None)
+    if db is not None and response.status_code < 400:
+        await run_in_threadpool(db.commit)
+    return response
+
+
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    # Read-your-writes: the user's next reads skip the replicas for a while,
+    # on any worker, as long as the client sends the pin back
+    principal_id = getattr(request.state, "principal_id", None)
+    if principal_id and request.method not in READ_ONLY_METHODS and response.status_code < 400:
+        pin = replica_router.pin_token(principal_id)
+        if pin is not None:
+            response.headers[READ_PIN_HEADER] = pin
+            response.set_cookie(
+                READ_PIN_COOKIE, pin, max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite="lax",
+            )
+    return response
+
+
+@app.middleware("http")
+async def start_request_deadline(request: Request, call_next):
+    # Registered last so it runs first: the budget covers the other middlewares
+    request.state.started_at = time.monotonic()
+    return await call_next(request)
+
+
+@app.on_event("startup")
+def load_signing_keys():
+    # Fail fast on a missing or invalid key ring instead of on the first login
+    keyring.load()
+
+
+@app.on_event("startup")
+def calibrate_password_hashing():
+    if settings.BCRYPT_CALIBRATE_ON_STARTUP and not settings.BCRYPT_ROUNDS:
+        rounds = calibrate_bcrypt_rounds(settings.PASSWORD_HASH_TARGET_MS)
+        logger.info("Calibrated bcrypt cost to %s rounds", rounds)
+        set_bcrypt_rounds(rounds)
+
+
 # Exception handler
 @app.exception_handler(LMSException)
 async def lms_exception_handler(request: Request, exc: LMSException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=exc.headers,
+    )
+
+
+@app.exception_handler(StatementError)
+async def statement_error_handler(request: Request, exc: StatementError):
+    pgcode = getattr(exc.orig, "pgcode", None)
+    # statement_timeout, set from the request deadline, cancelled the query
+    if pgcode == QUERY_CANCELED:
+        deadline_stats.record_statement_timeout(route_key(request))
+        return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+    raise exc
+
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    # A versioned row changed between loading it and flushing the update
+    return JSONResponse(
+        status_code=409, content={"detail": "The resource was modified by another request"}
     )
 
 # Include routes
@@ -40,6 +126,10 @@ def root():
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def metrics():
+    return metrics_registry.collect()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
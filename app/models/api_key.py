@@ -0,0 +1,23 @@
+from sqlalchemy import Boolean, Column, String, Enum, ForeignKey, DateTime, Uuid
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base
+from app.db.ids import new_id
+
+
+class ApiKey(Base):
+    __tablename__ = "api_key"
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
+    name = Column(String, nullable=False)
+    # First characters of the key, shown to identify it without revealing it
+    prefix = Column(String, nullable=False)
+    hashed_key = Column(String, unique=True, index=True, nullable=False)
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    role = Column(Enum("student", "teacher", "admin", name="user_role", create_type=False), nullable=False)
+    is_active = Column(Boolean(), default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    user = relationship("User")
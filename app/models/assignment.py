@@ -1,15 +1,21 @@
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Index, Uuid
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
+from app.db.ids import new_id
 
 
 class Assignment(Base):
-    id = Column(String, primary_key=True, index=True)
+    # Assignments of a lesson, upcoming ones first
+    __table_args__ = (
+        Index("ix_assignment_lesson_id_due_date", "lesson_id", "due_date"),
+    )
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
     title = Column(String, index=True)
     description = Column(Text)
     due_date = Column(DateTime, nullable=True)
-    lesson_id = Column(String, ForeignKey("lesson.id"))
+    lesson_id = Column(Uuid(as_uuid=False), ForeignKey("lesson.id"))
 
     # Relationships
     lesson = relationship("Lesson", back_populates="assignments")
@@ -1,9 +1,11 @@
-from sqlalchemy import Table, Column, ForeignKey, String
+from sqlalchemy import Table, Column, ForeignKey, Index, Uuid
 from app.db.base_class import Base
 
 user_course_association = Table(
     "user_course_association",
     Base.metadata,
-    Column("user_id", String, ForeignKey("user.id")),
-    Column("course_id", String, ForeignKey("course.id")),
+    Column("user_id", Uuid(as_uuid=False), ForeignKey("user.id"), primary_key=True),
+    Column("course_id", Uuid(as_uuid=False), ForeignKey("course.id"), primary_key=True),
+    # The primary key covers a user's courses, this covers a course's students
+    Index("ix_user_course_association_course_id_user_id", "course_id", "user_id"),
 )
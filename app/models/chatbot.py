@@ -1,13 +1,17 @@
-from sqlalchemy import Column, String, ForeignKey, Text, DateTime
+from sqlalchemy import Column, String, ForeignKey, Text, DateTime, Index, Uuid
 from sqlalchemy.sql import func
 from app.db.base_class import Base
+from app.db.ids import new_id
 
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_user_id_created_at", "user_id", "created_at"),
+    )
 
-    id = Column(String, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("user.id"))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("user.id"))
     message = Column(Text, nullable=False)
     response = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
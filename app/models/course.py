@@ -1,9 +1,14 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Boolean, Float
+from sqlalchemy import Column, String, Text, ForeignKey, Boolean, Float, Index, Integer, Uuid
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
+from app.db.ids import new_id
 from app.models.associations import user_course_association
 class Course(Base):
-    id = Column(String, primary_key=True, index=True)
+    __table_args__ = (
+        Index("ix_course_instructor_id", "instructor_id"),
+    )
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
     title = Column(String, index=True)
     description = Column(Text, nullable=True)
 
@@ -12,9 +17,14 @@ class Course(Base):
     price = Column(Float, nullable=True)
     is_published = Column(Boolean, default=False)
 
-    owner_id = Column(String, ForeignKey("user.id"))
-    instructor_id = Column(String, ForeignKey("user.id"), nullable=False)
+    owner_id = Column(Uuid(as_uuid=False), ForeignKey("user.id"))
+    instructor_id = Column(Uuid(as_uuid=False), ForeignKey("user.id"), nullable=False)
     tags = Column(Text, nullable=True)
+    # Bumped on every write, an UPDATE against an older version matches no row
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {**Base.__mapper_args__, "version_id_col": version}
+
     owner = relationship("User", back_populates="owned_courses", foreign_keys=[owner_id])
     instructor = relationship("User", back_populates="instructed_courses", foreign_keys=[instructor_id])
 
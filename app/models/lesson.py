@@ -1,18 +1,28 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, Boolean
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Boolean, Index, Uuid
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
+from app.db.ids import new_id
 
 
 class Lesson(Base):
-    id = Column(String, primary_key=True, index=True)
+    # Lessons of a course in order
+    __table_args__ = (
+        Index("ix_lesson_course_id_order", "course_id", "order"),
+    )
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
     title = Column(String, index=True)
     content = Column(Text)
-    course_id = Column(String, ForeignKey("course.id"))
+    course_id = Column(Uuid(as_uuid=False), ForeignKey("course.id"))
 
     order = Column(Integer, nullable=True)
     duration_minutes = Column(Integer, nullable=True)
     is_published = Column(Boolean, default=False)
     video_url = Column(String, nullable=True)
+    # Optimistic concurrency version, incremented by every UPDATE
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {**Base.__mapper_args__, "version_id_col": version}
 
     # Relationships
     course = relationship("Course", back_populates="lessons")
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Float
+
+from app.db.base_class import Base
+
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_bucket"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    # Unix timestamp of the last refill, shared by all workers
+    updated_at = Column(Float, nullable=False)
@@ -1,16 +1,22 @@
-from sqlalchemy import Column, String, ForeignKey, Float, DateTime
+from sqlalchemy import Column, String, ForeignKey, Float, DateTime, Index, Uuid
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
+from app.db.ids import new_id
 
 
 class Recommendation(Base):
-    id = Column(String, primary_key=True, index=True)
+    # A user's recommendations, best first
+    __table_args__ = (
+        Index("ix_recommendation_user_id_score", "user_id", "score"),
+    )
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
     score = Column(Float)  # Relevance score
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    user_id = Column(String, ForeignKey("user.id"))
-    course_id = Column(String, ForeignKey("course.id"))
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("user.id"))
+    course_id = Column(Uuid(as_uuid=False), ForeignKey("course.id"))
 
     # Relationships
     user = relationship("User", back_populates="recommendations")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, Uuid
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.db.ids import new_id
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_token"
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
+    # Every token rotated from the same login shares a family
+    family_id = Column(Uuid(as_uuid=False), nullable=False, index=True)
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    hashed_token = Column(String, unique=True, index=True, nullable=False)
+    # User token version at issue time, a password or role change retires the token
+    token_version = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, ForeignKey, DateTime, Uuid
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_token"
+
+    jti = Column(String, primary_key=True)
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("user.id", ondelete="CASCADE"), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
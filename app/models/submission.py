@@ -1,17 +1,23 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Float, DateTime
+from sqlalchemy import Column, String, Text, ForeignKey, Float, DateTime, Index, Uuid
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
+from app.db.ids import new_id
 
 
 class Submission(Base):
-    id = Column(String, primary_key=True, index=True)
+    __table_args__ = (
+        Index("ix_submission_assignment_id", "assignment_id"),
+        Index("ix_submission_student_id_assignment_id", "student_id", "assignment_id"),
+    )
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
     content = Column(Text)
     grade = Column(Float, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    student_id = Column(String, ForeignKey("user.id"))
-    assignment_id = Column(String, ForeignKey("assignment.id"))
+    student_id = Column(Uuid(as_uuid=False), ForeignKey("user.id"))
+    assignment_id = Column(Uuid(as_uuid=False), ForeignKey("assignment.id"))
 
     # Relationships
     student = relationship("User", back_populates="submissions")
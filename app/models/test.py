@@ -1,14 +1,23 @@
-from sqlalchemy import Column, String, ForeignKey, JSON
+from sqlalchemy import Column, String, ForeignKey, Integer, JSON, Index, Uuid
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
+from app.db.ids import new_id
 
 
 class Test(Base):
-    id = Column(String, primary_key=True, index=True)
+    __table_args__ = (
+        Index("ix_test_course_id", "course_id"),
+    )
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
     title = Column(String, index=True)
     questions = Column(JSON)  # JSON array of questions
-    course_id = Column(String, ForeignKey("course.id"))
+    course_id = Column(Uuid(as_uuid=False), ForeignKey("course.id"))
+    # Write version, as on Course
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {**Base.__mapper_args__, "version_id_col": version}
 
     # Relationships
     course = relationship("Course", back_populates="tests")
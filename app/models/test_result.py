@@ -1,16 +1,23 @@
-from sqlalchemy import Column, String, ForeignKey, Float, DateTime
+from sqlalchemy import Column, String, ForeignKey, Float, DateTime, Index, Uuid
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
+from app.db.ids import new_id
 
 
 class TestResult(Base):
-    id = Column(String, primary_key=True, index=True)
+    # A user's attempts at a test, best first; a test's results and average score
+    __table_args__ = (
+        Index("ix_testresult_user_id_test_id_score", "user_id", "test_id", "score"),
+        Index("ix_testresult_test_id_score", "test_id", "score"),
+    )
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
     score = Column(Float)
     completed_at = Column(DateTime(timezone=True), server_default=func.now())
-    user_id = Column(String, ForeignKey("user.id"))
-    test_id = Column(String, ForeignKey("test.id"))
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("user.id"))
+    test_id = Column(Uuid(as_uuid=False), ForeignKey("test.id"))
 
     # Relationships
     user = relationship("User", back_populates="test_results")
@@ -1,17 +1,20 @@
-from sqlalchemy import Boolean, Column, String, Enum, Table, ForeignKey
+from sqlalchemy import Boolean, Column, String, Enum, Table, ForeignKey, Integer, Uuid
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
+from app.db.ids import new_id
 from app.models.course import Course
 from app.models.associations import user_course_association
 
 
 class User(Base):
-    id = Column(String, primary_key=True, index=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
     name = Column(String, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(Enum("student", "teacher", "admin", name="user_role"), default="student")
     is_active = Column(Boolean(), default=True)
+    # Bumped whenever role, activity or password change to invalidate issued tokens
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     owned_courses = relationship(
         "Course",
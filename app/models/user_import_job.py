@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, JSON, Uuid
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.db.ids import new_id
+
+
+class UserImportJob(Base):
+    __tablename__ = "user_import_job"
+
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=new_id)
+    # queued, running, completed or failed
+    status = Column(String, nullable=False, default="queued")
+    total = Column(Integer, nullable=False)
+    processed = Column(Integer, nullable=False, default=0)
+    created = Column(Integer, nullable=False, default=0)
+    # Per-row errors, written when the import completes
+    errors = Column(JSON, nullable=False, default=list)
+    detail = Column(String, nullable=True)
+    created_by = Column(Uuid(as_uuid=False), ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,39 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from app.db.ids import UUIDStr
+
+
+# Properties to receive via API on creation
+class ApiKeyCreate(BaseModel):
+    name: str
+    user_id: UUIDStr
+    role: str = "student"
+    expires_at: Optional[datetime] = None
+
+
+# Properties to receive via API on update
+class ApiKeyUpdate(BaseModel):
+    name: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
+# Properties to return via API
+class ApiKey(BaseModel):
+    id: str
+    name: str
+    prefix: str
+    user_id: str
+    role: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+# Returned once on creation, the only time the plaintext key is available
+class ApiKeyCreated(ApiKey):
+    key: str
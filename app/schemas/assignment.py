@@ -2,13 +2,15 @@ from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel
 
+from app.db.ids import UUIDStr
+
 
 # Shared properties
 class AssignmentBase(BaseModel):
     title: str
     description: str
     due_date: Optional[datetime] = None
-    lesson_id: str
+    lesson_id: UUIDStr
 
 
 # Properties to receive via API on creation
@@ -21,7 +23,12 @@ class AssignmentUpdate(AssignmentBase):
     title: Optional[str] = None
     description: Optional[str] = None
     due_date: Optional[datetime] = None
-    lesson_id: Optional[str] = None
+    lesson_id: Optional[UUIDStr] = None
+
+
+# Item of a batch update
+class AssignmentBatchUpdate(AssignmentUpdate):
+    id: UUIDStr
 
 
 # Properties shared by models stored in DB
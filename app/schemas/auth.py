@@ -6,13 +6,22 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
 
 
 class TokenPayload(BaseModel):
     sub: str
     exp: Optional[int] = None
+    jti: Optional[str] = None
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+    ver: Optional[int] = None
 
 
 class LoginRequest(BaseModel):
     email: str
-    password: str
\ No newline at end of file
+    password: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
@@ -2,9 +2,11 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 
+from app.db.ids import UUIDStr
+
 
 class ChatMessageCreate(BaseModel):
-    user_id: str
+    user_id: UUIDStr
     message: str
     response: Optional[str] = None
 
@@ -1,6 +1,8 @@
 from typing import Optional, List
 from pydantic import BaseModel
 
+from app.db.ids import UUIDStr
+
 
 # Shared properties
 class CourseBase(BaseModel):
@@ -15,7 +17,7 @@ class CourseBase(BaseModel):
 
 # Properties to receive via API on creation
 class CourseCreate(CourseBase):
-    instructor_id: str  # обязательное поле при создании
+    instructor_id: UUIDStr  # обязательное поле при создании
 
 
 # Properties to receive via API on update
@@ -3,6 +3,8 @@ from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel, Field
 
+from app.db.ids import UUIDStr
+
 
 # Shared properties
 class LessonBase(BaseModel):
@@ -15,7 +17,7 @@ class LessonBase(BaseModel):
 class LessonCreate(BaseModel):
     title: str
     content: str
-    course_id: str
+    course_id: UUIDStr
     order: Optional[int] = None
     duration_minutes: Optional[int] = None
     is_published: Optional[bool] = False
@@ -26,13 +28,20 @@ class LessonCreate(BaseModel):
 class LessonUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
-    course_id: Optional[str] = None
+    course_id: Optional[UUIDStr] = None
     order: Optional[int] = None
     duration_minutes: Optional[int] = None
     is_published: Optional[bool] = None
     video_url: Optional[str] = None
 
 
+# Item of a batch update
+class LessonBatchUpdate(LessonUpdate):
+    id: UUIDStr
+    # Only update the row if it is still at this version
+    version: Optional[int] = None
+
+
 # Properties shared by models stored in DB
 class LessonInDBBase(LessonBase):
     id: str
@@ -2,11 +2,13 @@ from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel
 
+from app.db.ids import UUIDStr
+
 
 # Shared properties
 class SubmissionBase(BaseModel):
     content: str
-    assignment_id: str
+    assignment_id: UUIDStr
 
 
 # Properties to receive via API on creation
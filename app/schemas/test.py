@@ -4,6 +4,8 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
+from app.db.ids import UUIDStr
+
 
 class Question(BaseModel):
     question_text: str
@@ -13,7 +15,7 @@ class Question(BaseModel):
 
 class TestBase(BaseModel):
     title: str
-    course_id: str
+    course_id: UUIDStr
     description: Optional[str] = None
 
 
@@ -26,6 +28,12 @@ class TestUpdate(BaseModel):
     description: Optional[str] = None
 
 
+class TestBatchUpdate(TestUpdate):
+    id: UUIDStr
+    # Only update the row if it is still at this version
+    version: Optional[int] = None
+
+
 class TestOut(TestBase):
     id: str
     created_at: datetime
@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 from typing import Optional, List
 
 from pydantic import BaseModel, EmailStr, Field
@@ -39,4 +40,34 @@ class User(UserInDBBase):
 
 # Additional properties stored in DB
 class UserInDB(UserInDBBase):
-    hashed_password: str
\ No newline at end of file
+    hashed_password: str
+
+
+# Per-row problem reported by a bulk import
+class UserImportRowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    detail: str
+
+
+# Outcome of a bulk import
+class UserImportResult(BaseModel):
+    total: int
+    created: int
+    errors: List[UserImportRowError] = []
+
+
+# Progress and outcome of a bulk import running in the background
+class UserImportJob(BaseModel):
+    id: str
+    status: str
+    total: int
+    processed: int
+    created: int
+    errors: List[UserImportRowError] = []
+    detail: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
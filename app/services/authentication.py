@@ -8,7 +8,7 @@ from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.security import verify_password
+from app.core.password_hasher import password_hasher
 from app.crud.user import user
 from app.db.session import SessionLocal
 from app.models.user import User
@@ -32,7 +32,7 @@ class AuthenticationService:
         user_obj = user.get_by_email(db, email=email)
         if not user_obj:
             return None
-        if not verify_password(password, user_obj.hashed_password):
+        if not password_hasher.verify_sync(password, user_obj.hashed_password):
             return None
         return user_obj
 
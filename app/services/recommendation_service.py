@@ -1,6 +1,8 @@
 import numpy as np
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
+from app.db.ids import new_id
+from app.db.session import commit_or_flush
 from app.models.test import Test
 from app.models.user import User
 from app.models.course import Course
@@ -132,7 +134,7 @@ class RecommendationService:
         saved_recommendations = []
         for rec in recommendations:
             recommendation = Recommendation(
-                id=str(uuid.uuid4()),
+                id=new_id(),
                 user_id=user_id,
                 course_id=rec["course"].id,
                 score=rec["score"]
@@ -140,8 +142,6 @@ class RecommendationService:
             db.add(recommendation)
             saved_recommendations.append(recommendation)
 
-        db.commit()
-        for rec in saved_recommendations:
-            db.refresh(rec)
+        commit_or_flush(db)
 
         return saved_recommendations
\ No newline at end of file
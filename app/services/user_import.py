@@ -0,0 +1,352 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.security import get_password_hash, pwd_context, set_bcrypt_rounds
+from app.crud.user_import_job import user_import_job
+from app.db.ids import new_id
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.models.user_import_job import UserImportJob
+from app.schemas.user import UserCreate, UserImportResult, UserImportRowError
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+DUPLICATE_EMAIL_DETAIL = "The user with this email already exists in the system."
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """
+    Guess the import format from a file name or content type.
+
+    Args:
+        filename: Uploaded file name
+        content_type: Uploaded file content type
+
+    Returns:
+        "csv" or "ndjson"
+    """
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def parse_rows(content: str, fmt: str) -> List[Tuple[int, Any]]:
+    """
+    Split an import file into records.
+
+    Args:
+        content: File contents
+        fmt: "csv" with a header row, or "ndjson" with one object per line
+
+    Returns:
+        (line number, record) pairs; unparseable NDJSON lines have a None record
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format {fmt!r}")
+
+    rows: List[Tuple[int, Any]] = []
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        for record in reader:
+            rows.append((
+                reader.line_num,
+                {
+                    key.strip(): value for key, value in record.items()
+                    if key and value not in (None, "")
+                },
+            ))
+        return rows
+
+    for line_number, line in enumerate(content.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            rows.append((line_number, json.loads(line)))
+        except ValueError:
+            rows.append((line_number, None))
+    return rows
+
+
+def validate_rows(
+        rows: Iterable[Tuple[int, Any]]
+) -> Tuple[List[Tuple[int, UserCreate]], List[UserImportRowError]]:
+    """
+    Validate records and drop emails repeated within the file.
+
+    Returns:
+        Valid users with their line numbers, and errors for the rejected rows
+    """
+    roles = set(User.__table__.c.role.type.enums)
+    valid: List[Tuple[int, UserCreate]] = []
+    errors: List[UserImportRowError] = []
+    seen: Dict[str, int] = {}
+    for row_number, record in rows:
+        if not isinstance(record, dict):
+            errors.append(UserImportRowError(row=row_number, detail="Row is not a JSON object"))
+            continue
+        try:
+            user_in = UserCreate(**record)
+        except ValidationError as e:
+            errors.append(UserImportRowError(
+                row=row_number,
+                email=record.get("email"),
+                detail="; ".join(
+                    f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                    for error in e.errors()
+                ),
+            ))
+            continue
+        if user_in.role not in roles:
+            errors.append(UserImportRowError(
+                row=row_number, email=user_in.email, detail=f"Invalid role {user_in.role!r}"
+            ))
+            continue
+        if user_in.email in seen:
+            errors.append(UserImportRowError(
+                row=row_number,
+                email=user_in.email,
+                detail=f"Duplicate email, first seen on row {seen[user_in.email]}",
+            ))
+            continue
+        seen[user_in.email] = row_number
+        valid.append((row_number, user_in))
+    return valid, errors
+
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+
+# Imports run one at a time per process, in the background; the rows of the
+# queued ones are held in memory, so only a few may wait
+_import_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-import")
+_import_slots = threading.BoundedSemaphore(settings.USER_IMPORT_MAX_QUEUED_JOBS)
+
+
+def get_hash_executor(processes: int) -> ProcessPoolExecutor:
+    """
+    Get the hashing process pool shared by every import, starting it on first use.
+
+    `processes` only sizes the pool when it is started.
+    """
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            # Spawned rather than forked: the API process runs threads, which fork
+            # does not copy safely. Workers get the cost in use here, even if calibrated.
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=set_bcrypt_rounds,
+                initargs=(pwd_context.handler("bcrypt").default_rounds,),
+            )
+        return _hash_executor
+
+
+def _hash_passwords(executor: Optional[Executor], passwords: List[str], processes: int) -> List[str]:
+    if executor is None:
+        return [get_password_hash(password) for password in passwords]
+    chunksize = max(len(passwords) // (processes * 4), 1)
+    return list(executor.map(get_password_hash, passwords, chunksize=chunksize))
+
+
+def _insert_batch(
+        db: Session, batch: List[Tuple[int, Dict[str, Any]]], errors: List[UserImportRowError]
+) -> int:
+    """
+    Insert a batch in one statement, falling back to one savepoint per row if a
+    concurrent insert took one of the emails.
+    """
+    try:
+        db.execute(insert(User), [values for _, values in batch])
+        db.commit()
+        return len(batch)
+    except IntegrityError:
+        db.rollback()
+
+    created = 0
+    for row_number, values in batch:
+        try:
+            with db.begin_nested():
+                db.execute(insert(User), [values])
+            created += 1
+        except IntegrityError:
+            errors.append(UserImportRowError(
+                row=row_number, email=values["email"], detail=DUPLICATE_EMAIL_DETAIL
+            ))
+    db.commit()
+    return created
+
+
+def import_users(
+        db: Session,
+        rows: List[Tuple[int, Any]],
+        *,
+        batch_size: int = settings.USER_IMPORT_BATCH_SIZE,
+        processes: Optional[int] = settings.USER_IMPORT_PROCESSES,
+        progress: Optional[ProgressCallback] = None,
+) -> UserImportResult:
+    """
+    Create users in bulk.
+
+    Passwords are hashed across the shared process pool and users are written with one
+    multi-row INSERT per batch. Each batch is committed on its own, so a failed
+    import keeps the batches before it.
+
+    Args:
+        db: Database session
+        rows: (line number, record) pairs from `parse_rows`
+        batch_size: Users hashed and inserted per batch
+        processes: Hashing processes, one per CPU core if not set
+        progress: Called with (processed rows, total rows) after each batch
+
+    Returns:
+        Number of users created and per-row errors
+    """
+    total = len(rows)
+    valid, errors = validate_rows(rows)
+    processed = len(errors)
+    created = 0
+    processes = processes or os.cpu_count() or 1
+    if progress:
+        progress(processed, total)
+
+    executor = None
+    if processes > 1 and len(valid) > 1:
+        executor = get_hash_executor(processes)
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        existing = {
+            email for email, in db.query(User.email).filter(
+                User.email.in_([user_in.email for _, user_in in batch])
+            )
+        }
+        pending = []
+        for row_number, user_in in batch:
+            if user_in.email in existing:
+                errors.append(UserImportRowError(
+                    row=row_number, email=user_in.email, detail=DUPLICATE_EMAIL_DETAIL
+                ))
+            else:
+                pending.append((row_number, user_in))
+
+        hashed_passwords = _hash_passwords(
+            executor, [user_in.password for _, user_in in pending], processes
+        )
+        created += _insert_batch(db, [
+            (row_number, {
+                "id": new_id(),
+                "email": user_in.email,
+                "hashed_password": hashed_password,
+                "name": user_in.name,
+                "role": user_in.role,
+                "is_active": user_in.is_active,
+            })
+            for (row_number, user_in), hashed_password in zip(pending, hashed_passwords)
+        ], errors)
+        processed += len(batch)
+        if progress:
+            progress(processed, total)
+
+    errors.sort(key=lambda error: error.row)
+    return UserImportResult(total=total, created=created, errors=errors)
+
+
+def run_import_job(
+        job_id: str, rows: List[Tuple[int, Any]], session_factory: sessionmaker = SessionLocal
+) -> None:
+    """
+    Run a queued import, recording its progress and outcome on the job.
+
+    Runs on its own session, outside of any request, so it has no deadline.
+    """
+    with session_factory() as db:
+        def report(processed: int, total: int) -> None:
+            user_import_job.set_progress(db, id=job_id, processed=processed)
+
+        try:
+            result = import_users(db, rows, progress=report)
+        except Exception:
+            logger.exception("User import %s failed", job_id)
+            db.rollback()
+            user_import_job.fail(db, id=job_id, detail="Import failed, rows before the failure were kept")
+        else:
+            user_import_job.complete(db, id=job_id, result=result)
+
+
+def _run_queued_import(job_id: str, rows: List[Tuple[int, Any]]) -> None:
+    try:
+        run_import_job(job_id, rows)
+    finally:
+        _import_slots.release()
+
+
+def submit_import(
+        db: Session, rows: List[Tuple[int, Any]], *, created_by: Optional[str] = None
+) -> UserImportJob:
+    """
+    Queue an import to run in the background.
+
+    Raises a 503 while USER_IMPORT_MAX_QUEUED_JOBS imports are queued or running
+    in this process.
+
+    Returns:
+        The job, to poll for progress
+    """
+    if not _import_slots.acquire(blocking=False):
+        raise ServiceUnavailableException(
+            detail="Too many user imports in progress, please retry",
+            retry_after=settings.USER_IMPORT_RETRY_AFTER_SECONDS,
+        )
+    try:
+        job = user_import_job.create(db, total=len(rows), created_by=created_by)
+        _import_runner.submit(_run_queued_import, job.id, rows)
+    except Exception:
+        _import_slots.release()
+        raise
+    return job
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import users from a CSV or NDJSON file")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS)
+    parser.add_argument("--batch-size", type=int, default=settings.USER_IMPORT_BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=settings.USER_IMPORT_PROCESSES)
+    args = parser.parse_args()
+
+    with open(args.file, encoding="utf-8-sig") as f:
+        content = f.read()
+    rows = parse_rows(content, args.format or detect_format(args.file))
+
+    def report(processed: int, total: int) -> None:
+        print(f"\r{processed}/{total} rows", end="", file=sys.stderr, flush=True)
+
+    db = SessionLocal()
+    try:
+        result = import_users(
+            db, rows, batch_size=args.batch_size, processes=args.processes, progress=report
+        )
+    finally:
+        db.close()
+    print(file=sys.stderr)
+    print(result.json(indent=2))
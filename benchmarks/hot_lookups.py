@@ -0,0 +1,108 @@
+"""
+Per-call cost of the hottest lookups, built per call vs. cached statements.
+
+"before" rebuilds a legacy Query on every call, the way the CRUD methods used
+to; "after" calls the CRUD methods, which execute statements built once at
+import time. Both run against in-memory SQLite, so the numbers are dominated by
+SQLAlchemy's own overhead rather than by the database.
+
+    DATABASE_URL=sqlite:// TEST_DATABASE_URL=sqlite:// python -m benchmarks.hot_lookups
+"""
+import argparse
+import time
+from typing import Callable, Dict
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.db.base  # noqa: F401 - registers every model with the mapper
+from app.crud.base import CRUDBase
+from app.crud.course import course
+from app.crud.user import user
+from app.db.base_class import Base
+from app.db.ids import new_id
+from app.db.statement_cache import StatementCacheStats, instrument_statement_cache
+from app.models.associations import user_course_association
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.user import User
+
+
+def seed(db: Session) -> Dict[str, str]:
+    user_id, course_id, lesson_id = new_id(), new_id(), new_id()
+    db.execute(insert(User).values(id=user_id, email="bench@example.com", hashed_password="x"))
+    db.execute(insert(Course).values(id=course_id, title="Bench", instructor_id=user_id))
+    db.execute(insert(Lesson).values(id=lesson_id, title="Bench", course_id=course_id))
+    db.execute(insert(user_course_association).values(user_id=user_id, course_id=course_id))
+    db.commit()
+    return {"user_id": user_id, "course_id": course_id, "lesson_id": lesson_id}
+
+
+def lookups(ids: Dict[str, str]) -> Dict[str, Dict[str, Callable[[Session], object]]]:
+    user_id, course_id, lesson_id = ids["user_id"], ids["course_id"], ids["lesson_id"]
+    lesson = CRUDBase(Lesson)
+
+    def enrolled_before(db: Session) -> bool:
+        user_obj = db.query(User).filter(User.id == user_id).first()
+        return any(c.id == course_id for c in user_obj.enrolled_courses)
+
+    return {
+        "user.get_user_by_id": {
+            "before": lambda db: db.query(User).filter(User.id == user_id).first(),
+            "after": lambda db: user.get_user_by_id(db, user_id=user_id),
+        },
+        "user.get_token_version": {
+            "before": lambda db: db.query(User.token_version).filter(User.id == user_id).scalar(),
+            "after": lambda db: user.get_token_version(db, user_id=user_id),
+        },
+        "CRUDBase.get (lesson)": {
+            "before": lambda db: db.query(Lesson).filter(Lesson.id == lesson_id).first(),
+            "after": lambda db: lesson.get(db, id=lesson_id),
+        },
+        "course.get": {
+            "before": lambda db: db.query(Course).filter(Course.id == course_id).first(),
+            "after": lambda db: course.get(db, id=course_id),
+        },
+        "course.is_user_enrolled": {
+            "before": enrolled_before,
+            "after": lambda db: course.is_user_enrolled(db, user_id=user_id, course_id=course_id),
+        },
+    }
+
+
+def per_call_us(factory: sessionmaker, fn: Callable[[Session], object], calls: int) -> float:
+    # A fresh session per call, like a request, so the identity map stays empty
+    for _ in range(50):
+        with factory() as db:
+            fn(db)
+    started_at = time.perf_counter()
+    for _ in range(calls):
+        with factory() as db:
+            fn(db)
+    return (time.perf_counter() - started_at) / calls * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    with factory() as db:
+        ids = seed(db)
+    cache_stats = StatementCacheStats()
+    instrument_statement_cache(engine, cache_stats)
+
+    print(f"{'lookup':<26}{'before us':>12}{'after us':>12}{'speedup':>10}")
+    for name, variants in lookups(ids).items():
+        before = per_call_us(factory, variants["before"], args.calls)
+        after = per_call_us(factory, variants["after"], args.calls)
+        print(f"{name:<26}{before:>12.1f}{after:>12.1f}{before / after:>9.2f}x")
+    print(f"compiled cache: {cache_stats.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,14 @@ def db_engine():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_login_throttle():
+    # Every test logs in again as the same users from the same client
+    from app.core.rate_limit import InMemoryTokenBucketBackend, login_throttle
+
+    login_throttle.backend = InMemoryTokenBucketBackend()
+
+
 @pytest.fixture(scope="function")
 def db_session(db_engine):
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
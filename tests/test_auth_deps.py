@@ -0,0 +1,74 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api import deps
+from app.core.principal_cache import principal_cache
+from app.core.revocation import revocation_store
+from app.core.security import create_access_token
+from app.db.base_class import Base
+from app.db.ids import new_id
+from app.models.user import User
+
+
+def make_request():
+    return SimpleNamespace(
+        state=SimpleNamespace(), scope={}, method="GET", url=SimpleNamespace(path="/")
+    )
+
+
+def authenticate(monkeypatch, *, token_version, claimed_version):
+    """
+    Store a user on an in-memory async database, then authenticate a token
+    claiming `claimed_version` with a cold principal cache.
+    """
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all, tables=[User.__table__])
+            factory = async_sessionmaker(engine, expire_on_commit=False)
+            monkeypatch.setattr(deps, "AsyncSessionLocal", factory)
+            user_id = new_id()
+            async with factory() as db:
+                db.add(User(
+                    id=user_id, email="user@example.com", hashed_password="x",
+                    role="teacher", token_version=token_version,
+                ))
+                await db.commit()
+            token = create_access_token(
+                user_id, expires_delta=timedelta(minutes=5),
+                role="teacher", is_active=True, token_version=claimed_version,
+            )
+            request = make_request()
+            principal = await deps.get_current_user_async(
+                request, token=token, api_key_value=None
+            )
+            return request, principal
+        finally:
+            await engine.dispose()
+
+    # Async routes must not open sync sessions
+    monkeypatch.setattr(deps, "SessionLocal", None)
+    monkeypatch.setattr(revocation_store, "refresh_due", lambda: False)
+    principal_cache.clear()
+    return asyncio.run(run())
+
+
+def test_async_auth_loads_the_user_on_a_cache_miss(monkeypatch):
+    request, principal = authenticate(monkeypatch, token_version=2, claimed_version=2)
+
+    assert (principal.role, principal.token_version) == ("teacher", 2)
+    assert request.state.principal_id == principal.id
+    assert principal_cache.get(principal.id) == principal
+
+
+def test_async_auth_rejects_an_outdated_token(monkeypatch):
+    with pytest.raises(HTTPException) as exc_info:
+        authenticate(monkeypatch, token_version=3, claimed_version=2)
+    assert exc_info.value.status_code == 403
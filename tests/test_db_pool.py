@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from app.db.pool import PoolStats, engine_options, instrumented_pool_class
+
+
+def test_pool_stats_track_checkouts_and_timeouts(tmp_path):
+    pool_stats = PoolStats()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class(QueuePool, pool_stats),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        assert pool_stats.stats()["checked_out"] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = pool_stats.stats()
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["checked_out"] == 0
+    assert stats["wait_seconds"]["count"] == 2
+
+    engine.dispose()
+    with engine.connect():
+        assert pool_stats.stats()["checkouts"] == 2
+
+
+def test_sqlite_keeps_default_pool():
+    assert "poolclass" not in engine_options("sqlite://", QueuePool, PoolStats())
+    assert engine_options("postgresql://db/lms", QueuePool, PoolStats())["pool_size"] > 0
@@ -0,0 +1,270 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import sessionmaker
+
+import app.db.base  # noqa: F401
+from app.core.exceptions import ConflictException
+from app.core.principal_cache import api_key_cache, principal_cache
+from app.crud.api_key import api_key
+from app.crud.base import CRUDBase
+from app.crud.user import UNUSABLE_PASSWORD, user
+from app.db.base_class import Base
+from app.db.ids import new_id
+from app.db.session import REQUEST_TRANSACTION, commit_or_flush, get_async_database_url
+from app.db.statement_cache import StatementCacheStats, instrument_statement_cache
+from app.models.api_key import ApiKey
+from app.models.associations import user_course_association
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.recommendation import Recommendation
+from app.models.user import User
+from app.schemas.api_key import ApiKeyCreate
+from app.schemas.lesson import LessonBatchUpdate
+
+
+def test_async_database_url_swaps_driver():
+    assert get_async_database_url("postgresql://lms:secret@db:5432/lms") == (
+        "postgresql+asyncpg://lms:secret@db:5432/lms"
+    )
+    assert get_async_database_url("postgresql+psycopg2://db/lms") == "postgresql+asyncpg://db/lms"
+    assert get_async_database_url("sqlite:///./lms.db") == "sqlite+aiosqlite:///./lms.db"
+
+
+def test_async_database_url_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        get_async_database_url("mysql://db/lms")
+
+
+def test_writes_are_single_statements():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Recommendation.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement.split()[0]),
+    )
+    crud = CRUDBase(Recommendation)
+    rec_id = new_id()
+
+    db_obj = crud.create(db, obj_in={"id": rec_id, "user_id": new_id(), "course_id": new_id(), "score": 0.5})
+    assert statements == ["INSERT"]
+    # The server default came back with the INSERT
+    assert "created_at" in db_obj.__dict__
+
+    statements.clear()
+    db.expunge_all()
+    updated = crud.update_by_id(db, id=rec_id, obj_in={"score": 0.9, "unknown": 1})
+    assert statements == ["UPDATE"]
+    assert updated.score == 0.9
+    assert crud.update_by_id(db, id=new_id(), obj_in={"score": 0.1}) is None
+
+    statements.clear()
+    assert crud.remove(db, id=rec_id).id == rec_id
+    assert statements == ["DELETE"]
+    db.close()
+
+
+def test_request_transaction_only_flushes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Recommendation.__table__])
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(conn))
+    db = sessionmaker(bind=engine)()
+    db.info[REQUEST_TRANSACTION] = True
+
+    CRUDBase(Recommendation).create(
+        db, obj_in={"id": new_id(), "user_id": new_id(), "course_id": new_id(), "score": 0.5}
+    )
+    assert commits == []
+
+    db.commit()
+    assert len(commits) == 1
+
+    del db.info[REQUEST_TRANSACTION]
+    db.add(Recommendation(user_id=new_id(), course_id=new_id(), score=0.1))
+    commit_or_flush(db)
+    assert len(commits) == 2
+    db.close()
+
+
+def test_update_by_id_checks_version():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Lesson.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    crud = CRUDBase(Lesson)
+    lesson = crud.create(db, obj_in={"title": "Intro", "content": "", "course_id": new_id()})
+    assert lesson.version == 1
+
+    assert crud.update_by_id(db, id=lesson.id, obj_in={"title": "Basics"}, version=1).version == 2
+    with pytest.raises(ConflictException):
+        crud.update_by_id(db, id=lesson.id, obj_in={"title": "Stale"}, version=1)
+    assert crud.update_by_id(db, id=new_id(), obj_in={"title": "Gone"}, version=1) is None
+    # Writes without a version still bump it
+    assert crud.update_by_id(db, id=lesson.id, obj_in={"title": "Again"}).version == 3
+    # Empty bodies write nothing but still check the version
+    assert crud.update_by_id(db, id=lesson.id, obj_in={}, version=3).version == 3
+    with pytest.raises(ConflictException):
+        crud.update_by_id(db, id=lesson.id, obj_in={}, version=2)
+    db.close()
+
+
+def test_update_multi_checks_versions():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Lesson.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    crud = CRUDBase(Lesson)
+    first, second = (
+        crud.create(db, obj_in={"title": title, "content": "", "course_id": new_id()})
+        for title in ["First", "Second"]
+    )
+
+    updated = crud.update_multi(db, objs_in={
+        first.id: LessonBatchUpdate(id=first.id, title="First v2", version=1),
+        second.id: {"title": "Second v2"},
+        new_id(): {"title": "Gone", "version": 1},
+    })
+    assert [(obj.title, obj.version) for obj in updated] == [("First v2", 2), ("Second v2", 2)]
+
+    with pytest.raises(ConflictException) as exc_info:
+        crud.update_multi(db, objs_in={
+            first.id: {"title": "Stale", "version": 1},
+            second.id: {"title": "Second v3", "version": 2},
+        })
+    assert first.id in exc_info.value.detail
+    assert second.id not in exc_info.value.detail
+    db.rollback()
+    # The stale item failed the whole batch
+    assert [obj.title for obj in db.query(Lesson).order_by(Lesson.title)] == ["First v2", "Second v2"]
+    db.close()
+
+
+def test_upsert_reports_inserted_and_updated_rows():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    crud = CRUDBase(User)
+    existing = crud.upsert(
+        db, obj_in={"email": "a@example.com", "name": "A", "hashed_password": "x"},
+        index_elements=["email"],
+    )
+
+    rows = [
+        {"email": f"{name}@example.com", "name": name.upper(), "hashed_password": "x"}
+        for name in ["a", "b", "c", "b"]
+    ]
+    assert crud.upsert_multi(db, objs_in=rows, index_elements=["email"]) == (2, 1)
+    assert crud.upsert_multi(db, objs_in=rows, index_elements=["email"]) == (0, 3)
+
+    again = crud.upsert(
+        db, obj_in={"email": "a@example.com", "name": "Renamed", "hashed_password": "x"},
+        index_elements=["email"], update_fields=["name"],
+    )
+    assert again.id == existing.id
+    assert again.name == "Renamed"
+    assert db.query(User).count() == 3
+    db.close()
+
+
+def test_get_is_served_from_the_compiled_cache():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Recommendation.__table__])
+    cache_stats = StatementCacheStats()
+    instrument_statement_cache(engine, cache_stats)
+    db = sessionmaker(bind=engine)()
+    crud = CRUDBase(Recommendation)
+
+    assert crud.get(db, id=new_id()) is None
+    assert cache_stats.stats()["misses"] == 1
+    for _ in range(3):
+        assert crud.get(db, id=new_id()) is None
+    # Other CRUD objects for the same model build an equal statement
+    assert CRUDBase(Recommendation).get(db, id=new_id()) is None
+
+    stats = cache_stats.stats()
+    assert (stats["hits"], stats["misses"]) == (4, 1)
+    db.close()
+
+
+def test_remove_clears_enrollments_of_a_user():
+    engine = create_engine("sqlite://")
+    # Enforce foreign keys like Postgres does
+    event.listen(engine, "connect", lambda conn, record: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    teacher = User(email="t@example.com", hashed_password="x")
+    student = User(email="s@example.com", hashed_password="x")
+    db.add_all([teacher, student])
+    db.flush()
+    db.add(Course(title="Intro", instructor_id=teacher.id, students=[student]))
+    db.add(Recommendation(user_id=student.id, score=0.5))
+    db.commit()
+
+    assert CRUDBase(User).remove(db, id=student.id).id == student.id
+    assert db.scalars(select(user_course_association.c.user_id)).all() == []
+    assert db.scalars(select(Recommendation.user_id)).all() == [None]
+    assert db.get(User, teacher.id) is not None
+    db.close()
+
+
+def test_user_upserts_invalidate_issued_tokens():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    row = {"email": "a@example.com", "name": "A", "hashed_password": "x", "role": "student"}
+    existing = user.upsert(db, obj_in=row)
+    principal_cache.put(existing)
+
+    # Same claims: tokens stay valid
+    assert user.upsert_multi(db, objs_in=[{**row, "name": "Renamed"}]) == (0, 1)
+    assert user.get_token_version(db, user_id=existing.id) == 0
+    assert principal_cache.get(existing.id) is None
+
+    promoted = user.upsert(db, obj_in={**row, "role": "teacher"})
+    assert promoted.token_version == 1
+    assert user.upsert_multi(
+        db, objs_in=[{**row, "role": "teacher", "is_active": False}, {**row, "email": "b@example.com"}]
+    ) == (1, 1)
+    assert user.get_token_version(db, user_id=existing.id) == 2
+    db.close()
+
+
+def test_user_upserts_without_password_keep_the_existing_one():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    existing = user.upsert(db, obj_in={"email": "a@example.com", "hashed_password": "x"})
+
+    renamed = user.upsert(db, obj_in={"email": "a@example.com", "name": "Renamed"})
+    assert (renamed.id, renamed.name, renamed.hashed_password) == (existing.id, "Renamed", "x")
+    assert renamed.token_version == 0
+    assert user.upsert_multi(
+        db, objs_in=[{"email": "a@example.com", "role": "teacher"}, {"email": "b@example.com"}]
+    ) == (1, 1)
+    assert user.get_by_email(db, email="a@example.com").hashed_password == "x"
+    # Users inserted without a password cannot log in until they set one
+    assert user.authenticate(db, email="b@example.com", password=UNUSABLE_PASSWORD) is None
+    db.close()
+
+
+def test_api_key_role_is_capped_at_owner_role():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__, ApiKey.__table__])
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    owner_id = new_id()
+    db.execute(insert(User).values(
+        id=owner_id, email="owner@example.com", hashed_password="x", role="admin"
+    ))
+    db.commit()
+    key_obj, _ = api_key.create(db, obj_in=ApiKeyCreate(name="ci", user_id=owner_id, role="admin"))
+    assert api_key.get_valid_by_hash(db, hashed_key=key_obj.hashed_key)[1] == "admin"
+
+    owner = SimpleNamespace(id=owner_id, role="admin", is_active=True, token_version=0)
+    api_key_cache.put(owner, key=key_obj.hashed_key)
+    user.update(db, db_obj=db.get(User, owner_id), obj_in={"role": "student"})
+
+    assert api_key_cache.get(key_obj.hashed_key) is None
+    assert api_key.get_valid_by_hash(db, hashed_key=key_obj.hashed_key)[1] == "student"
+    db.close()
@@ -0,0 +1,71 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from app.core.deadline import Deadline, deadline_stats, request_deadline
+from app.core.exceptions import GatewayTimeoutException
+from app.db.session import REQUEST_DEADLINE, apply_statement_timeout
+
+
+class FakeConnection:
+    def __init__(self, dialect_name):
+        self.dialect = SimpleNamespace(name=dialect_name)
+        self.statements = []
+
+    def exec_driver_sql(self, statement):
+        self.statements.append(statement)
+
+
+def make_request(method, path):
+    return Request({
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [],
+        "route": SimpleNamespace(path=path),
+    })
+
+
+def test_check_raises_once_budget_is_spent():
+    Deadline(1).check("first stage")
+
+    late = Deadline(1, route="GET /late", started_at=time.monotonic() - 2)
+    before = deadline_stats.stats()["stage_timeouts"]
+    with pytest.raises(GatewayTimeoutException) as exc_info:
+        late.check("second stage")
+
+    assert exc_info.value.status_code == 504
+    assert deadline_stats.stats()["stage_timeouts"] == before + 1
+    assert deadline_stats.stats()["by_route"]["GET /late"]["stage_timeouts"] >= 1
+
+
+def test_route_budget_overrides_default(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.REQUEST_DEADLINE_SECONDS", 5)
+    monkeypatch.setattr("app.core.config.settings.REQUEST_DEADLINES", {"POST /slow": 60})
+
+    assert request_deadline(make_request("POST", "/slow")).budget == 60
+    request = make_request("GET", "/slow")
+    deadline = request_deadline(request)
+    assert deadline.budget == 5
+    # The deadline is created once per request
+    assert request_deadline(request) is deadline
+
+
+def test_statement_timeout_is_the_remaining_budget():
+    session = SimpleNamespace(info={REQUEST_DEADLINE: Deadline(2)})
+    postgres = FakeConnection("postgresql")
+    apply_statement_timeout(session, None, postgres)
+
+    assert len(postgres.statements) == 1
+    timeout_ms = int(postgres.statements[0].rsplit(" ", 1)[1])
+    assert 1000 < timeout_ms <= 2000
+
+    sqlite = FakeConnection("sqlite")
+    apply_statement_timeout(session, None, sqlite)
+    assert sqlite.statements == []
+
+    session.info[REQUEST_DEADLINE] = Deadline(1, started_at=time.monotonic() - 2)
+    with pytest.raises(GatewayTimeoutException):
+        apply_statement_timeout(session, None, postgres)
@@ -0,0 +1,42 @@
+import time
+import uuid
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from app.db.ids import UUIDStr, new_id, uuid7
+
+
+def test_uuid7_sets_version_and_variant():
+    # Random bits must never spill into the version or variant fields
+    for value in (uuid7() for _ in range(1000)):
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_starts_with_current_time():
+    before = time.time_ns() // 1_000_000
+    value = uuid7()
+    after = time.time_ns() // 1_000_000
+
+    assert before <= value.int >> 80 <= after
+
+
+def test_ids_sort_by_creation_time():
+    first = new_id()
+    time.sleep(0.002)
+    second = new_id()
+
+    assert first < second
+    assert str(uuid.UUID(first)) == first
+
+
+def test_uuid_str_is_validated_and_canonical():
+    class Item(BaseModel):
+        id: UUIDStr
+
+    value = new_id()
+    assert Item(id=value.upper()).id == value
+    assert Item(id=uuid.UUID(value)).id == value
+    with pytest.raises(ValidationError):
+        Item(id="not-a-uuid")
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.db.ids import new_id
+from app.models.assignment import Assignment
+from app.models.associations import user_course_association
+from app.models.chatbot import ChatMessage
+from app.models.lesson import Lesson
+from app.models.recommendation import Recommendation
+from app.models.submission import Submission
+from app.models.test import Test as TestModel
+from app.models.test_result import TestResult as ResultModel
+
+
+def explain(db: Session, statement) -> str:
+    """
+    Get the query plan of a statement as text.
+
+    Sequential scans are disabled on PostgreSQL so the plan shows whether an
+    index can serve the query at all, whatever the size of the test tables.
+    """
+    sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        return json.dumps(db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar())
+    return " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+# IDs are Uuid columns, Postgres rejects literals that are not UUIDs
+USER_ID, TEST_ID, ASSIGNMENT_ID, COURSE_ID, LESSON_ID = (new_id() for _ in range(5))
+
+HOT_QUERIES = [
+    (
+        "best_result",
+        select(ResultModel)
+        .where(ResultModel.user_id == USER_ID, ResultModel.test_id == TEST_ID)
+        .order_by(ResultModel.score.desc())
+        .limit(1),
+        "ix_testresult_user_id_test_id_score",
+    ),
+    (
+        "results_by_test",
+        select(ResultModel).where(ResultModel.test_id == TEST_ID),
+        "ix_testresult_test_id_score",
+    ),
+    (
+        "submissions_by_assignment",
+        select(Submission).where(Submission.assignment_id == ASSIGNMENT_ID),
+        "ix_submission_assignment_id",
+    ),
+    (
+        "submission_by_student_and_assignment",
+        select(Submission).where(
+            Submission.student_id == USER_ID, Submission.assignment_id == ASSIGNMENT_ID
+        ),
+        "ix_submission_student_id_assignment_id",
+    ),
+    (
+        "lessons_by_course",
+        select(Lesson).where(Lesson.course_id == COURSE_ID).order_by(Lesson.order),
+        "ix_lesson_course_id_order",
+    ),
+    (
+        "assignments_by_lesson",
+        select(Assignment).where(Assignment.lesson_id == LESSON_ID),
+        "ix_assignment_lesson_id_due_date",
+    ),
+    (
+        "tests_by_course",
+        select(TestModel).where(TestModel.course_id == COURSE_ID),
+        "ix_test_course_id",
+    ),
+    (
+        "recommendations_by_user",
+        select(Recommendation)
+        .where(Recommendation.user_id == USER_ID)
+        .order_by(Recommendation.score.desc()),
+        "ix_recommendation_user_id_score",
+    ),
+    (
+        "chat_messages_by_user",
+        select(ChatMessage).where(ChatMessage.user_id == USER_ID),
+        "ix_chat_messages_user_id_created_at",
+    ),
+    (
+        "students_of_course",
+        select(user_course_association.c.user_id)
+        .where(user_course_association.c.course_id == COURSE_ID),
+        "ix_user_course_association_course_id_user_id",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "statement, index", [query[1:] for query in HOT_QUERIES], ids=[query[0] for query in HOT_QUERIES]
+)
+def test_hot_query_uses_index(db_session: Session, statement, index):
+    assert index in explain(db_session, statement)
+    db_session.rollback()
+
+
+def test_enrollment_lookup_uses_primary_key(db_session: Session):
+    plan = explain(
+        db_session,
+        select(user_course_association.c.course_id)
+        .where(user_course_association.c.user_id == USER_ID),
+    )
+    db_session.rollback()
+
+    assert "user_course_association_pkey" in plan or "sqlite_autoindex_user_course_association" in plan
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from jose import JWTError, jwt
+
+from app.core.keyring import KeyRing, rotate_keys_file
+
+
+def test_token_carries_active_kid():
+    ring = KeyRing(keys_json=json.dumps({"active": "k1", "keys": {"k1": "secret-1"}}))
+    token = ring.encode({"sub": "user-1"})
+
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+    assert ring.decode(token)["sub"] == "user-1"
+
+
+def test_rotation_keeps_previous_tokens_valid(tmp_path):
+    keys_file = str(tmp_path / "jwt_keys.json")
+    rotate_keys_file(keys_file, keep=1)
+    ring = KeyRing(keys_file=keys_file, reload_interval=0)
+    old_token = ring.encode({"sub": "user-1"})
+
+    new_kid = rotate_keys_file(keys_file, keep=1)
+    new_token = ring.encode({"sub": "user-2"})
+
+    assert ring.active_kid == new_kid
+    assert ring.decode(old_token)["sub"] == "user-1"
+    assert ring.decode(new_token)["sub"] == "user-2"
+
+    rotate_keys_file(keys_file, keep=1)
+    with pytest.raises(JWTError):
+        ring.decode(old_token)
+
+
+def test_unknown_kid_is_rejected():
+    ring = KeyRing(keys_json=json.dumps({"active": "k1", "keys": {"k1": "secret-1"}}))
+    other = KeyRing(keys_json=json.dumps({"active": "k2", "keys": {"k2": "secret-2"}}))
+
+    with pytest.raises(JWTError):
+        ring.decode(other.encode({"sub": "user-1"}))
+
+
+def test_unknown_kid_reloads_rotated_key_file(tmp_path):
+    keys_file = str(tmp_path / "jwt_keys.json")
+    rotate_keys_file(keys_file, keep=1)
+    ring = KeyRing(keys_file=keys_file, reload_interval=3600)
+    ring.load()
+
+    # Rotated by another instance, before this one's next scheduled check
+    rotate_keys_file(keys_file, keep=1)
+    other = KeyRing(keys_file=keys_file)
+    token = other.encode({"sub": "user-1"})
+
+    assert ring.decode(token)["sub"] == "user-1"
+    assert ring.active_kid == other.active_kid
+
+    # Forced reloads are rate-limited
+    rotate_keys_file(keys_file, keep=1)
+    with pytest.raises(JWTError):
+        ring.decode(KeyRing(keys_file=keys_file).encode({"sub": "user-2"}))
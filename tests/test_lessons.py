@@ -294,4 +294,52 @@ def test_reorder_lessons(client: TestClient, admin_token: str, db_session: Sessi
     assert content[1]["order"] == 2
 
     assert content[2]["id"] == lesson_ids[0]
-    assert content[2]["order"] == 3
\ No newline at end of file
+    assert content[2]["order"] == 3
+
+def test_batch_lessons(client: TestClient, admin_token: str, db_session: Session):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    admin_id = response.json()["id"]
+
+    course_id = str(uuid.uuid4())
+    db_session.add(Course(
+        id=course_id,
+        title="Course for Batch Lessons",
+        description="Lessons are loaded in bulk",
+        instructor_id=admin_id,
+        is_published=True
+    ))
+    db_session.commit()
+
+    # Create
+    response = client.post(
+        f"{settings.API_V1_STR}/lessons/batch",
+        headers=headers,
+        json=[
+            {"title": f"Lesson {i}", "content": f"Content {i}", "order": i, "course_id": course_id}
+            for i in range(1, 6)
+        ],
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [lesson["title"] for lesson in content] == [f"Lesson {i}" for i in range(1, 6)]
+    lesson_ids = [lesson["id"] for lesson in content]
+
+    # Update
+    response = client.patch(
+        f"{settings.API_V1_STR}/lessons/batch",
+        headers=headers,
+        json=[{"id": lesson_ids[0], "title": "Renamed"}, {"id": lesson_ids[1], "order": 10}],
+    )
+    assert response.status_code == 200
+    assert [lesson["title"] for lesson in response.json()] == ["Renamed", "Lesson 2"]
+
+    # Delete
+    response = client.post(
+        f"{settings.API_V1_STR}/lessons/batch/delete",
+        headers=headers,
+        json={"ids": lesson_ids[:3]},
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert db_session.query(Lesson).filter(Lesson.course_id == course_id).count() == 2
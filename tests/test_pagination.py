@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from starlette.responses import Response
+
+from app.core.exceptions import BadRequestException
+from app.crud.pagination import (
+    TOTAL_ESTIMATED_HEADER, TOTAL_HEADER, Page, decode_cursor, encode_cursor, fetch_page,
+    next_cursor, paginate, set_total,
+)
+from app.db.base_class import Base
+from app.db.ids import new_id
+from app.models.course import Course
+from app.models.lesson import Lesson
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor([3, "0b7c2f6e-course"])
+
+    assert decode_cursor(cursor) == [3, "0b7c2f6e-course"]
+
+
+def test_empty_cursor_starts_from_first_row():
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "abc.def", encode_cursor(["a"])[:-2] + "xx"])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(BadRequestException):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_only_on_full_page():
+    rows = [SimpleNamespace(id="a"), SimpleNamespace(id="b")]
+
+    assert decode_cursor(next_cursor(rows, limit=2)) == ["b"]
+    assert next_cursor(rows, limit=3) is None
+    assert next_cursor([], limit=2) is None
+
+
+def test_paginate_seeks_past_cursor_by_primary_key():
+    query = paginate(
+        select(Course).order_by(Course.title), Course, limit=10, cursor=encode_cursor(["b"])
+    )
+    sql = str(query.compile(compile_kwargs={"literal_binds": True}))
+
+    assert "course.id > 'b'" in sql
+    assert "ORDER BY course.id" in sql
+    assert "OFFSET" not in sql
+    assert "title" not in sql.split("ORDER BY")[1]
+
+
+@pytest.fixture
+def course_db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Course.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add_all([Course(title=f"Course {i}", instructor_id=new_id()) for i in range(5)])
+    db.commit()
+    yield db
+    db.close()
+
+
+def test_fetch_page_counts_rows_of_all_pages(course_db):
+    page = fetch_page(
+        paginate(course_db.query(Course), Course, skip=0, limit=2), with_total=True
+    )
+
+    assert len(page) == 2
+    assert page.total == 5
+    assert not page.estimated
+    # Past the last page the total still comes back
+    assert fetch_page(
+        paginate(course_db.query(Course), Course, skip=10, limit=2), with_total=True
+    ).total == 5
+
+
+def test_cursor_pages_count_rows_of_all_pages(course_db):
+    totals, cursor = [], ""
+    while cursor is not None:
+        page = fetch_page(
+            paginate(course_db.query(Course), Course, limit=2, cursor=cursor), with_total=True
+        )
+        totals.append(page.total)
+        cursor = next_cursor(page, limit=2)
+
+    assert totals == [5, 5, 5]
+
+
+def test_set_total_only_for_counted_pages():
+    response = Response()
+    set_total(response, [])
+    assert TOTAL_HEADER not in response.headers
+
+    set_total(response, Page([], total=1200000, estimated=True))
+    assert response.headers[TOTAL_HEADER] == "1200000"
+    assert response.headers[TOTAL_ESTIMATED_HEADER] == "true"
+
+
+def test_cursor_pages_keep_the_custom_sort_order():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Lesson.__table__])
+    db = sessionmaker(bind=engine)()
+    course_id = new_id()
+    db.add_all([
+        Lesson(title=f"Lesson {i}", course_id=course_id, order=order)
+        for i, order in enumerate([3, 1, None, 2, 1, None, 5])
+    ])
+    db.commit()
+    expected = [
+        lesson.id for lesson in sorted(
+            db.query(Lesson), key=lambda lesson: (lesson.order is None, lesson.order or 0, lesson.id)
+        )
+    ]
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = fetch_page(paginate(
+            db.query(Lesson), Lesson, limit=2, cursor=cursor, order_by=[Lesson.order]
+        ))
+        assert page.keyset == ("order", "id")
+        seen.extend(lesson.id for lesson in page)
+        cursor = next_cursor(page, limit=2)
+
+    assert seen == expected
+    with pytest.raises(BadRequestException):
+        paginate(db.query(Lesson), Lesson, cursor=encode_cursor(["id-only"]), order_by=[Lesson.order])
+    db.close()
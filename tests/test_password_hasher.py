@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from app.core.exceptions import ServiceUnavailableException
+from app.core.password_hasher import PasswordHasher
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(max_workers=1, queue_size=1, retry_after=2)
+    hashed = hasher.hash_sync("secret")
+
+    assert hasher.verify_sync("secret", hashed)
+    assert not hasher.verify_sync("wrong", hashed)
+    stats = hasher.stats()
+    assert stats["completed"] == 3
+    assert stats["hash_latency_seconds"]["count"] == 3
+
+
+def test_rejects_when_saturated():
+    hasher = PasswordHasher(max_workers=1, queue_size=1, retry_after=2)
+    release = threading.Event()
+    running = hasher.submit(release.wait)
+    queued = hasher.submit(release.wait)
+
+    with pytest.raises(ServiceUnavailableException) as exc_info:
+        hasher.submit(release.wait)
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "2"
+    assert hasher.stats()["rejected"] == 1
+
+    release.set()
+    running.result()
+    queued.result()
+    assert hasher.stats()["queue_depth"] == 0
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from app.core.principal_cache import Principal, PrincipalCache
+
+
+def make_user(user_id="u1", role="student", is_active=True, token_version=0):
+    return SimpleNamespace(
+        id=user_id, role=role, is_active=is_active, token_version=token_version
+    )
+
+
+def test_put_and_get_returns_snapshot():
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    principal = cache.put(make_user(role="teacher"))
+
+    assert principal == Principal(id="u1", role="teacher", is_active=True)
+    assert cache.get("u1") is principal
+    assert cache.stats()["hits"] == 1
+
+
+def test_miss_and_expiry(monkeypatch):
+    cache = PrincipalCache(ttl_seconds=10, max_size=10)
+    assert cache.get("u1") is None
+
+    now = [1000.0]
+    monkeypatch.setattr("app.core.principal_cache.time.monotonic", lambda: now[0])
+    cache.put(make_user())
+    now[0] += 11
+    assert cache.get("u1") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_eviction():
+    cache = PrincipalCache(ttl_seconds=60, max_size=2)
+    cache.put(make_user("u1"))
+    cache.put(make_user("u2"))
+    cache.get("u1")
+    cache.put(make_user("u3"))
+
+    assert cache.get("u2") is None
+    assert cache.get("u1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate():
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    cache.put(make_user())
+    cache.invalidate("u1")
+
+    assert cache.get("u1") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_invalidate_principal_drops_every_key_of_a_user():
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    cache.put(make_user(), key="key-a")
+    cache.put(make_user(), key="key-b")
+    cache.put(make_user("u2"), key="key-c")
+    cache.invalidate_principal("u1")
+
+    assert cache.get("key-a") is None and cache.get("key-b") is None
+    assert cache.get("key-c") is not None
+    assert cache.stats()["invalidations"] == 2
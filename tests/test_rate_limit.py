@@ -0,0 +1,63 @@
+import pytest
+
+from app.core.exceptions import TooManyRequestsException
+from app.core.rate_limit import (
+    MAX_RETRY_AFTER_SECONDS, InMemoryTokenBucketBackend, LoginThrottle, TokenBucketBackend,
+)
+
+
+def make_throttle(**kwargs):
+    options = dict(email_burst=2, email_per_minute=1, ip_burst=3, ip_per_minute=1)
+    options.update(kwargs)
+    return LoginThrottle(backend=InMemoryTokenBucketBackend(), **options)
+
+
+def test_email_bucket_is_case_insensitive():
+    throttle = make_throttle()
+    throttle.check(email="User@example.com", ip="10.0.0.1")
+    throttle.check(email="user@example.com", ip="10.0.0.2")
+
+    with pytest.raises(TooManyRequestsException) as exc_info:
+        throttle.check(email="USER@example.com", ip="10.0.0.3")
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+    assert throttle.stats()["throttled_email"] == 1
+
+
+def test_ip_bucket_spans_emails():
+    throttle = make_throttle()
+    for i in range(3):
+        throttle.check(email=f"user{i}@example.com", ip="10.0.0.1")
+
+    with pytest.raises(TooManyRequestsException):
+        throttle.check(email="other@example.com", ip="10.0.0.1")
+    assert throttle.stats()["throttled_ip"] == 1
+    throttle.check(email="other@example.com", ip="10.0.0.2")
+
+
+def test_bucket_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: now[0])
+    backend = InMemoryTokenBucketBackend()
+
+    assert backend.consume("key", capacity=1, refill_per_second=0.5)[0]
+    allowed, retry_after = backend.consume("key", capacity=1, refill_per_second=0.5)
+    assert not allowed
+    assert retry_after == pytest.approx(2.0)
+
+    now[0] += 2
+    assert backend.consume("key", capacity=1, refill_per_second=0.5)[0]
+
+
+def test_bucket_that_never_refills_caps_retry_after():
+    throttle = make_throttle(email_burst=1, email_per_minute=0)
+    throttle.check(email="user@example.com", ip="10.0.0.1")
+
+    with pytest.raises(TooManyRequestsException) as exc_info:
+        throttle.check(email="user@example.com", ip="10.0.0.2")
+    assert int(exc_info.value.headers["Retry-After"]) == MAX_RETRY_AFTER_SECONDS
+
+
+def test_backend_must_implement_consume():
+    with pytest.raises(TypeError):
+        TokenBucketBackend()
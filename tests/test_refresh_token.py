@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.refresh_token import refresh_token
+from app.db.base_class import Base
+from app.db.ids import new_id
+from app.db.session import REQUEST_TRANSACTION
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__, RefreshToken.__table__])
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user_obj(db):
+    user_id = new_id()
+    db.execute(insert(User).values(id=user_id, email="user@example.com", hashed_password="x"))
+    db.commit()
+    return db.get(User, user_id)
+
+
+def test_rotation_returns_a_new_token(db, user_obj):
+    first, plaintext = refresh_token.create(db, user_obj=user_obj)
+
+    rotated_user, rotated = refresh_token.rotate(db, token=plaintext)
+
+    assert rotated_user.id == user_obj.id
+    assert rotated != plaintext
+    second = refresh_token.get_by_token(db, token=rotated)
+    assert second.family_id == first.family_id
+    assert second.used_at is None and second.revoked_at is None
+    # The new token can be rotated in turn
+    assert refresh_token.rotate(db, token=rotated) is not None
+
+
+def test_rotated_token_is_rejected(db, user_obj):
+    _, plaintext = refresh_token.create(db, user_obj=user_obj)
+    refresh_token.rotate(db, token=plaintext)
+
+    assert refresh_token.rotate(db, token=plaintext) is None
+    assert refresh_token.rotate(db, token="unknown") is None
+
+
+def test_reusing_a_rotated_token_revokes_the_family(db, user_obj):
+    _, plaintext = refresh_token.create(db, user_obj=user_obj)
+    _, rotated = refresh_token.rotate(db, token=plaintext)
+    _, other_family = refresh_token.create(db, user_obj=user_obj)
+
+    assert refresh_token.rotate(db, token=plaintext) is None
+
+    # The token issued by the rotation is revoked along with the reused one
+    assert db.query(RefreshToken).filter(RefreshToken.revoked_at.isnot(None)).count() == 2
+    assert refresh_token.rotate(db, token=rotated) is None
+    # Other logins of the user keep working
+    assert refresh_token.rotate(db, token=other_family) is not None
+
+
+def test_token_version_change_retires_tokens(db, user_obj):
+    _, plaintext = refresh_token.create(db, user_obj=user_obj)
+    user_obj.token_version += 1
+    db.commit()
+
+    assert refresh_token.rotate(db, token=plaintext) is None
+
+
+def test_request_transaction_is_left_to_the_request(db, user_obj):
+    db.info[REQUEST_TRANSACTION] = True
+    _, plaintext = refresh_token.create(db, user_obj=user_obj)
+    _, rotated = refresh_token.rotate(db, token=plaintext)
+    db.rollback()
+
+    assert refresh_token.get_by_token(db, token=plaintext) is None
+    assert refresh_token.get_by_token(db, token=rotated) is None
@@ -0,0 +1,63 @@
+import asyncio
+
+from app.db.replicas import ReplicaRouter
+
+
+class FakeReplica:
+    def __init__(self, name, healthy=True):
+        self.name = name
+        self.up = healthy
+        self.healthy = True
+        self.checked_at = None
+        self.reads = 0
+        self.failed_checks = 0
+
+
+def make_router(replicas, pin_seconds=60):
+    router = ReplicaRouter(
+        replicas, pin_seconds=pin_seconds, health_check_interval=60, health_check_timeout=1
+    )
+
+    async def ping(replica):
+        if not replica.up:
+            raise ConnectionError(replica.name)
+
+    router._ping = ping
+    return router
+
+
+def test_round_robin_skips_unhealthy_replicas():
+    first, down, second = FakeReplica("a"), FakeReplica("b", healthy=False), FakeReplica("c")
+    router = make_router([first, down, second])
+
+    chosen = [asyncio.run(router.choose("user-1")).name for _ in range(4)]
+
+    assert chosen == ["a", "c", "a", "c"]
+    assert down.healthy is False
+
+
+def test_writer_is_pinned_to_primary():
+    router = make_router([FakeReplica("a")])
+    pin = router.pin_token("user-1")
+
+    # Any worker sharing the key ring honours the pin
+    other_worker = make_router([FakeReplica("a")])
+    assert asyncio.run(other_worker.choose("user-1", pin=pin)) is None
+    assert asyncio.run(router.choose("user-1")).name == "a"
+    # A pin only holds for the user it was issued to
+    assert asyncio.run(router.choose("user-2", pin=pin)).name == "a"
+
+
+def test_pin_expires():
+    router = make_router([FakeReplica("a")], pin_seconds=0)
+
+    assert not router.is_pinned("user-1", router.pin_token("user-1"))
+
+
+def test_tampered_pin_is_ignored():
+    router = make_router([FakeReplica("a")])
+    pinned_until, _, signed = router.pin_token("user-1").partition(".")
+
+    assert router.is_pinned("user-1", f"{pinned_until}.{signed}")
+    assert not router.is_pinned("user-1", f"{int(pinned_until) + 60000}.{signed}")
+    assert not router.is_pinned("user-1", "garbage")
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.revocation import BloomFilter, RevocationStore
+from app.db.base_class import Base
+from app.models.revoked_token import RevokedToken
+
+
+def test_bloom_filter_membership():
+    bloom = BloomFilter(capacity=1000, error_rate=0.001)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+
+    assert all(f"jti-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 50
+
+
+def test_revoked_until_expiry():
+    store = RevocationStore(capacity=100, error_rate=0.001, refresh_interval=60)
+    now = datetime.now(timezone.utc)
+    store._add("live", now + timedelta(minutes=5))
+    store._add("expired", now - timedelta(seconds=1))
+
+    assert store.is_revoked("live")
+    assert not store.is_revoked("expired")
+    assert not store.is_revoked("unknown")
+
+    assert store._prune(now) == 1
+    assert store.stats()["revoked"] == 1
+    assert store.is_revoked("live")
+
+
+
+def test_refresh_prunes_on_its_own_session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[RevokedToken.__table__])
+    factory = sessionmaker(bind=engine, expire_on_commit=False)
+    now = datetime.now(timezone.utc)
+    with factory() as db:
+        db.add_all([
+            RevokedToken(jti="live", expires_at=now + timedelta(minutes=5)),
+            RevokedToken(jti="expired", expires_at=now - timedelta(seconds=1)),
+        ])
+        db.commit()
+    store = RevocationStore(
+        capacity=100, error_rate=0.001, refresh_interval=60, session_factory=factory
+    )
+    store._add("expired", now - timedelta(seconds=1))
+
+    store.maybe_refresh()
+
+    assert store.is_revoked("live")
+    with factory() as db:
+        assert [row.jti for row in db.query(RevokedToken)] == ["live"]
@@ -0,0 +1,80 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core import security
+from app.core.config import Settings
+from app.core.security import (
+    create_access_token,
+    generate_api_key,
+    generate_refresh_token,
+    hash_api_key,
+    hash_refresh_token,
+    verify_token,
+)
+from app.schemas.auth import TokenPayload
+
+
+def test_access_token_without_claims():
+    payload = TokenPayload(**verify_token(create_access_token("user-1")))
+
+    assert payload.sub == "user-1"
+    assert payload.role is None
+    assert payload.ver is None
+
+
+def test_access_token_with_claims():
+    token = create_access_token(
+        "user-1", role="teacher", is_active=True, token_version=3
+    )
+    payload = TokenPayload(**verify_token(token))
+
+    assert payload.role == "teacher"
+    assert payload.is_active is True
+    assert payload.ver == 3
+
+
+def test_api_key_hash_is_keyed_and_stable():
+    prefix, api_key = generate_api_key()
+
+    assert api_key.startswith(f"lms_{prefix}_")
+    assert hash_api_key(api_key) == hash_api_key(api_key)
+    assert hash_api_key(api_key) != hash_api_key(api_key + "x")
+    assert len(hash_api_key(api_key)) == 64
+
+
+def test_password_needs_rehash_when_cost_changes():
+    original = security.pwd_context.to_dict()
+    try:
+        security.set_bcrypt_rounds(4)
+        hashed = security.get_password_hash("secret")
+        assert not security.password_needs_rehash(hashed)
+
+        security.set_bcrypt_rounds(5)
+        assert security.password_needs_rehash(hashed)
+        assert security.verify_password("secret", hashed)
+    finally:
+        security.pwd_context.load(original)
+
+
+def test_calibrate_bcrypt_rounds_stays_in_range():
+    assert security.calibrate_bcrypt_rounds(0, min_rounds=4, max_rounds=6, samples=1) == 4
+    assert 4 <= security.calibrate_bcrypt_rounds(10000, min_rounds=4, max_rounds=6, samples=1) <= 6
+
+
+def test_refresh_tokens_are_unique_and_hashed():
+    first, second = generate_refresh_token(), generate_refresh_token()
+
+    assert first != second
+    assert hash_refresh_token(first) == hash_refresh_token(first)
+    assert hash_refresh_token(first) != hash_refresh_token(second)
+
+
+def test_api_key_pepper_is_required(monkeypatch):
+    # Falling back to a per-process secret would orphan every stored key
+    monkeypatch.delenv("API_KEY_PEPPER", raising=False)
+    with pytest.raises(ValidationError):
+        Settings(_env_file=None)
+
+    monkeypatch.setenv("API_KEY_PEPPER", "too-short")
+    with pytest.raises(ValidationError):
+        Settings(_env_file=None)
@@ -0,0 +1,66 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.db.base  # noqa: F401
+from app.crud.user_import_job import user_import_job
+from app.db.base_class import Base
+from app.models.user import User
+from app.models.user_import_job import UserImportJob
+from app.services.user_import import detect_format, parse_rows, run_import_job, validate_rows
+
+
+def test_detect_format():
+    assert detect_format("cohort.csv") == "csv"
+    assert detect_format("cohort.ndjson") == "ndjson"
+    assert detect_format("upload", "application/x-ndjson") == "ndjson"
+
+
+def test_parse_csv_skips_empty_values():
+    content = "email,password,name,role\na@example.com,pw,A,\nb@example.com,pw,B,teacher\n"
+
+    rows = parse_rows(content, "csv")
+
+    assert rows == [
+        (2, {"email": "a@example.com", "password": "pw", "name": "A"}),
+        (3, {"email": "b@example.com", "password": "pw", "name": "B", "role": "teacher"}),
+    ]
+
+
+def test_validate_reports_each_bad_row():
+    content = "\n".join([
+        '{"email": "a@example.com", "password": "pw", "name": "A"}',
+        '{"email": "a@example.com", "password": "pw", "name": "A again"}',
+        '{"email": "not-an-email", "password": "pw", "name": "B"}',
+        '{"email": "c@example.com", "password": "pw", "name": "C", "role": "dean"}',
+        'not json',
+    ])
+
+    valid, errors = validate_rows(parse_rows(content, "ndjson"))
+
+    assert [row for row, _ in valid] == [1]
+    assert [error.row for error in errors] == [2, 3, 4, 5]
+    assert errors[0].detail == "Duplicate email, first seen on row 1"
+    assert errors[1].detail.startswith("email:")
+
+
+def test_import_job_records_outcome():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[User.__table__, UserImportJob.__table__])
+    factory = sessionmaker(bind=engine, expire_on_commit=False)
+    rows = parse_rows("\n".join([
+        '{"email": "a@example.com", "password": "pw", "name": "A"}',
+        '{"email": "a@example.com", "password": "pw", "name": "A again"}',
+    ]), "ndjson")
+    with factory() as db:
+        job = user_import_job.create(db, total=len(rows))
+    assert job.status == "queued"
+
+    run_import_job(job.id, rows, session_factory=factory)
+
+    with factory() as db:
+        job = user_import_job.get(db, id=job.id)
+        assert (job.status, job.processed, job.created) == ("completed", 2, 1)
+        assert [error["row"] for error in job.errors] == [2]
+        assert job.finished_at is not None
+        assert db.query(User).count() == 1